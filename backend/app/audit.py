@@ -0,0 +1,380 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import BigInteger, column, event, func, insert, select, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from .config import env_bool, env_float, env_int, env_str
+from .db import get_db_session
+from .metrics import Histogram
+from .models import AuditLog, Client
+from .serialize import dumps
+from .versioning import audit_version
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MODES = ("sync", "async")
+BATCH_BUCKETS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+# Session.info key for (transaction id, rows) spooled by a transaction that
+# hasn't committed yet.
+PENDING_KEY = "audit_pending"
+
+
+def _decode(line: bytes) -> Optional[dict]:
+    try:
+        row = json.loads(line)
+    except ValueError:
+        # A crash can leave the last line half-written.
+        return None
+    row["id"] = uuid.UUID(row["id"])
+    row["client_id"] = uuid.UUID(row["client_id"])
+    if row.get("user_id"):
+        row["user_id"] = uuid.UUID(row["user_id"])
+    row["changed_at"] = datetime.fromisoformat(row["changed_at"])
+    return row
+
+
+def _committed_rows(session, rows: List[dict]) -> List[dict]:
+    # Rows are spooled before their transaction commits, tagged with its id;
+    # keep those whose transaction did. Postgres forgets the status of very
+    # old transactions (NULL), and those almost all committed.
+    txids = {row["txid"] for row in rows if "txid" in row}
+    if not txids:
+        return rows
+    spooled = values(column("txid", BigInteger), name="spooled").data([(txid,) for txid in txids])
+    status = dict(session.execute(select(spooled.c.txid, func.txid_status(spooled.c.txid))).all())
+    return [
+        {key: value for key, value in row.items() if key != "txid"}
+        for row in rows
+        if status.get(row.get("txid"), "committed") in ("committed", None)
+    ]
+
+
+def _live_rows(session, rows: List[dict]) -> List[dict]:
+    # Clients deleted since the change was recorded would have taken their
+    # audit rows with them (ON DELETE CASCADE), so drop those rows too.
+    ids = {row["client_id"] for row in rows}
+    existing = set(session.scalars(select(Client.id).where(Client.id.in_(ids))))
+    return [row for row in rows if row["client_id"] in existing]
+
+
+class AuditWriter:
+    """Writes audit rows either inside the change's transaction or behind it.
+
+    In ``sync`` mode ``write`` inserts the rows in the caller's transaction,
+    so a change and its audit trail commit together.
+
+    In ``async`` mode the rows are appended to a local spool file before the
+    change commits, tagged with its transaction id, and put on a bounded
+    queue once it has; a background thread inserts them in multi-row
+    batches. The spool is truncated once everything in it has reached the
+    database or been rolled back. Whatever is left in it after a crash, or
+    when the queue was full or a flush failed, is replayed: rows whose
+    transaction did not commit are dropped, and the rest are inserted with
+    ``ON CONFLICT DO NOTHING`` on the row id, so replays never duplicate a
+    row. These inserts bump ``audit_version`` rather than the client book's
+    version, which they don't change. This mode needs Postgres, for
+    ``txid_current``/``txid_status`` and ``ON CONFLICT``; ``dialect`` is the
+    database's backend name, checked when known.
+    """
+
+    def __init__(
+        self,
+        mode: str = "sync",
+        queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        spool_dir: str = "audit-spool",
+        spool_fsync: bool = False,
+        dialect: Optional[str] = None,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"AUDIT_MODE must be one of {', '.join(MODES)}")
+        if mode == "async" and dialect is not None and dialect != "postgresql":
+            raise ValueError(f"AUDIT_MODE=async needs a Postgres database, not {dialect}")
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_dir = Path(spool_dir)
+        self.spool_fsync = spool_fsync
+        self.flush_ms = Histogram()
+        self.batch_rows = Histogram(BATCH_BUCKETS)
+        self.enqueued = 0
+        self.flushed = 0
+        self.spooled_only = 0
+        self.failures = 0
+        self.replayed = 0
+        self.max_depth = 0
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._spool = None
+        self._spool_path: Optional[Path] = None
+        # Spool lines of transactions that haven't committed or rolled back.
+        self._in_flight: Dict[int, bytes] = {}
+        self._needs_replay = False
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "AuditWriter":
+        # Only the URL is parsed: no engine is built at import.
+        url = os.getenv("DATABASE_URL")
+        return cls(
+            mode=env_str("AUDIT_MODE", "sync"),
+            queue_size=env_int("AUDIT_QUEUE_SIZE", 10000),
+            batch_size=env_int("AUDIT_BATCH_SIZE", 500),
+            flush_interval=env_float("AUDIT_FLUSH_MS", 200) / 1000,
+            spool_dir=env_str("AUDIT_SPOOL_DIR", "audit-spool"),
+            spool_fsync=env_bool("AUDIT_SPOOL_FSYNC"),
+            dialect=make_url(url).get_backend_name() if url else None,
+        )
+
+    @property
+    def is_async(self) -> bool:
+        return self.mode == "async"
+
+    def write(self, session, rows: List[dict]) -> None:
+        """Call before committing the change ``rows`` describe.
+
+        In async mode the rows are queued when ``session`` commits, and
+        forgotten if it rolls back.
+        """
+        if not rows:
+            return
+        if not self.is_async:
+            session.execute(insert(AuditLog), rows)
+            return
+        changed_at = datetime.now(timezone.utc)
+        for row in rows:
+            row.setdefault("changed_at", changed_at)
+        txid = session.scalar(select(func.txid_current()))
+        pending = session.info.setdefault(PENDING_KEY, (txid, []))
+        pending[1].extend(rows)
+        lines = b"".join(dumps(dict(row, txid=txid)) + b"\n" for row in rows)
+        with self._lock:
+            if self._spool is not None:
+                self._append(lines)
+                self._in_flight[txid] = self._in_flight.get(txid, b"") + lines
+
+    def committed(self, txid: int, rows: List[dict]) -> None:
+        """Queue the rows of transaction ``txid``, which has committed."""
+        with self._lock:
+            self._in_flight.pop(txid, None)
+            if self._spool is not None:
+                for row in rows:
+                    try:
+                        self._queue.put_nowait(row)
+                    except queue.Full:
+                        # Already in the spool; picked up by the next replay.
+                        self._needs_replay = True
+                        self.spooled_only += 1
+                    else:
+                        self.enqueued += 1
+                self.max_depth = max(self.max_depth, self._queue.qsize())
+                return
+        # Not running (e.g. a script, or after shutdown): write through.
+        version = self._insert(rows)
+        if version is not None:
+            audit_version.observe(version)
+
+    def rolled_back(self, txid: int) -> None:
+        """Forget transaction ``txid``; its spooled rows are dropped at the next checkpoint or replay."""
+        with self._lock:
+            self._in_flight.pop(txid, None)
+
+    def start(self) -> None:
+        if not self.is_async or self._thread is not None:
+            return
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self._recover()
+        self._spool_path = self.spool_dir / f"audit-{os.getpid()}-{uuid.uuid4().hex}.jsonl"
+        self._open_spool()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def _open_spool(self) -> None:
+        self._spool = open(self._spool_path, "ab")
+        if fcntl is not None:
+            # Tells other processes' recovery that this spool is still live.
+            fcntl.flock(self._spool.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _append(self, lines: bytes) -> None:
+        # Called with ``_lock`` held.
+        self._spool.write(lines)
+        self._spool.flush()
+        if self.spool_fsync:
+            os.fsync(self._spool.fileno())
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush what is queued and close the spool."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("Audit writer did not drain in %.1fs; rows stay in %s", timeout, self._spool_path)
+        self._thread = None
+        with self._lock:
+            self._spool.close()
+            self._spool = None
+        if self._spool_path.stat().st_size == 0:
+            self._spool_path.unlink()
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "queue_depth": self._queue.qsize(),
+            "queue_max_depth": self.max_depth,
+            "queue_size": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "spooled_only": self.spooled_only,
+            "replayed": self.replayed,
+            "failures": self.failures,
+            "flush_ms": self.flush_ms.snapshot(),
+            "batch_rows": self.batch_rows.snapshot(),
+        }
+
+    def _run(self) -> None:
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._take()
+            if batch and not self._flush(batch):
+                # Leave the rows to the replay and back off a little.
+                self._stopping.wait(min(self.flush_interval * 10, 5.0))
+            if self._queue.empty():
+                self._checkpoint()
+
+    def _take(self) -> List[dict]:
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stopping.is_set():
+                remaining = 0
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch: List[dict]) -> bool:
+        started = time.perf_counter()
+        try:
+            version = self._insert(batch)
+        except Exception:
+            logger.exception("Audit flush of %d rows failed", len(batch))
+            with self._lock:
+                self._needs_replay = True
+                self.failures += 1
+            return False
+        if version is not None:
+            audit_version.observe(version)
+        self.flush_ms.observe((time.perf_counter() - started) * 1000)
+        self.batch_rows.observe(len(batch))
+        self.flushed += len(batch)
+        return True
+
+    def _insert(self, rows: List[dict]) -> Optional[int]:
+        # Rows still in flight when the spool was sealed can reach the
+        # database both through the queue and through the replay.
+        with get_db_session() as session:
+            rows = _live_rows(session, _committed_rows(session, rows))
+            if not rows:
+                return None
+            session.execute(pg_insert(AuditLog).on_conflict_do_nothing(index_elements=["id"]), rows)
+            # New audit rows change audit responses, so their ETags must too.
+            version = audit_version.bump(session)
+            session.commit()
+            return version
+
+    def _checkpoint(self) -> None:
+        with self._lock:
+            if not self._queue.empty():
+                return
+            in_flight = b"".join(self._in_flight.values())
+            if not self._needs_replay:
+                if self._spool.tell() > len(in_flight):
+                    # Everything else in the spool has been flushed or rolled back.
+                    self._spool.truncate(0)
+                    self._spool.seek(0)
+                    if in_flight:
+                        self._append(in_flight)
+                return
+            self._needs_replay = False
+            if self._spool.tell():
+                self._spool.close()
+                os.replace(self._spool_path, self._spool_path.with_name(f"{self._spool_path.stem}-{uuid.uuid4().hex}.sealed"))
+                self._open_spool()
+                if in_flight:
+                    self._append(in_flight)
+        # Earlier sealed files whose replay failed are retried here too.
+        for sealed in sorted(self.spool_dir.glob(f"{self._spool_path.stem}-*.sealed")):
+            if not self._replay(sealed):
+                with self._lock:
+                    self._needs_replay = True
+
+    def _replay(self, path: Path) -> bool:
+        try:
+            with open(path, "rb") as handle:
+                rows = [row for row in map(_decode, handle) if row is not None]
+            for start in range(0, len(rows), self.batch_size):
+                batch = rows[start:start + self.batch_size]
+                version = self._insert(batch)
+                if version is not None:
+                    audit_version.observe(version)
+            self.replayed += len(rows)
+            path.unlink(missing_ok=True)
+            return True
+        except Exception:
+            logger.exception("Audit spool replay of %s failed", path)
+            return False
+
+    def _recover(self) -> None:
+        """Replay spools left behind by processes that are gone."""
+        for path in sorted(self.spool_dir.glob("audit-*")):
+            if fcntl is not None and path.suffix == ".jsonl":
+                with open(path, "rb") as handle:
+                    try:
+                        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue  # its writer is still running
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            self._replay(path)
+
+
+audit_writer = AuditWriter.from_env()
+
+
+@event.listens_for(Session, "after_commit")
+def _queue_committed_rows(session) -> None:
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending is not None:
+        audit_writer.committed(*pending)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_rolled_back_rows(session, transaction) -> None:
+    # Runs after after_commit, so anything left was rolled back or closed.
+    if transaction.parent is None:
+        pending = session.info.pop(PENDING_KEY, None)
+        if pending is not None:
+            audit_writer.rolled_back(pending[0])
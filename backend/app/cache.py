@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from .config import env_int
+
+
+class QueryCache:
+    """LRU + TTL cache of encoded response bodies, invalidated by generation.
+
+    Keys are built with ``key()``, which stamps the current generation. Any
+    write bumps the generation, so entries computed before it can never be
+    served again, even if a slow reader stores them after the bump.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "QueryCache":
+        return cls(
+            max_entries=env_int("CLIENT_CACHE_MAX_ENTRIES", 256),
+            ttl_seconds=env_int("CLIENT_CACHE_TTL_SECONDS", 60),
+            max_bytes=env_int("CLIENT_CACHE_MAX_BYTES", 64 * 1024 * 1024),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def key(self, *parts: Hashable) -> Tuple[Hashable, ...]:
+        return (self.generation,) + parts
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, body = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: Tuple[Hashable, ...], body: bytes) -> None:
+        if not self.enabled or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key[0] != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, body)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "generation": self.generation,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, key: Tuple[Hashable, ...]) -> None:
+        _, body = self._entries.pop(key)
+        self._bytes -= len(body)
+
+
+client_cache = QueryCache.from_env()
@@ -0,0 +1,277 @@
+import gzip
+import threading
+import time
+import zlib
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import anyio
+
+from .config import env_bool, env_int, env_str
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is optional
+    zstandard = None
+
+AVAILABLE = ("zstd",) * (zstandard is not None) + ("br",) * (brotli is not None) + ("gzip",)
+# Bodies compressed for one response favour speed; bodies kept in the
+# response cache are compressed once and served many times, so they get
+# more effort.
+DYNAMIC_LEVELS = {"gzip": 5, "br": 4, "zstd": 3}
+CACHED_LEVELS = {"gzip": 9, "br": 6, "zstd": 10}
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+# Server-sent events must reach the client as they are written.
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+# Larger bodies are compressed on a worker thread, off the event loop.
+THREAD_BYTES = 64 * 1024
+
+
+@lru_cache(maxsize=256)
+def _weights(header: str) -> Tuple[Tuple[str, float], ...]:
+    weights = []
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights.append((name.strip().lower(), weight))
+    return tuple(weights)
+
+
+def compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith(UNCOMPRESSED_TYPES)
+
+
+class Compression:
+    """Content-Encoding negotiation, compressors and their counters.
+
+    ``encodings`` is the server's preference order among the encodings
+    installed (zstd needs ``zstandard``, br needs ``brotli``); a client
+    weighting several equally gets the first of them.
+    """
+
+    def __init__(self, enabled: bool, min_bytes: int, encodings: Tuple[str, ...]):
+        self.enabled = enabled
+        self.min_bytes = min_bytes
+        self.encodings = tuple(name for name in encodings if name in AVAILABLE)
+        self._counters: Dict[str, Dict[str, float]] = {
+            name: {"responses": 0, "bytes_in": 0, "bytes_out": 0, "compress_ms": 0.0} for name in self.encodings
+        }
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Compression":
+        names = env_str("COMPRESSION_ENCODINGS", "zstd,br,gzip")
+        return cls(
+            enabled=env_bool("COMPRESSION", True),
+            min_bytes=env_int("COMPRESSION_MIN_BYTES", 1024),
+            encodings=tuple(name.strip().lower() for name in names.split(",") if name.strip()),
+        )
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """The encoding to answer ``Accept-Encoding`` with, or None for identity."""
+        if not self.enabled or not accept_encoding:
+            return None
+        weights = dict(_weights(accept_encoding))
+        best, best_weight = None, 0.0
+        for name in self.encodings:
+            weight = weights.get(name, weights.get("*", 0.0))
+            if weight > best_weight:
+                best, best_weight = name, weight
+        return best
+
+    def compress(self, body: bytes, encoding: str, cached: bool = False) -> bytes:
+        level = (CACHED_LEVELS if cached else DYNAMIC_LEVELS)[encoding]
+        started = time.perf_counter()
+        if encoding == "zstd":
+            result = zstandard.ZstdCompressor(level=level).compress(body)
+        elif encoding == "br":
+            result = brotli.compress(body, quality=level)
+        else:
+            result = gzip.compress(body, compresslevel=level, mtime=0)
+        self.record(encoding, len(body), len(result), (time.perf_counter() - started) * 1000)
+        return result
+
+    async def compress_async(self, body: bytes, encoding: str, cached: bool = False) -> bytes:
+        if len(body) < THREAD_BYTES:
+            return self.compress(body, encoding, cached)
+        return await anyio.to_thread.run_sync(self.compress, body, encoding, cached)
+
+    def stream(self, encoding: str) -> "StreamCompressor":
+        return StreamCompressor(self, encoding)
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int, elapsed_ms: float, responses: int = 1) -> None:
+        with self._lock:
+            counters = self._counters[encoding]
+            counters["responses"] += responses
+            counters["bytes_in"] += bytes_in
+            counters["bytes_out"] += bytes_out
+            counters["compress_ms"] += elapsed_ms
+
+    def stats(self) -> dict:
+        with self._lock:
+            encodings = {
+                name: dict(counters, compress_ms=round(counters["compress_ms"], 3))
+                for name, counters in self._counters.items()
+            }
+        return {"enabled": self.enabled, "min_bytes": self.min_bytes, "encodings": encodings}
+
+
+class StreamCompressor:
+    """Compresses a streamed body chunk by chunk, flushing after each one
+    so the client can decode every chunk as it arrives."""
+
+    def __init__(self, compression: Compression, encoding: str):
+        self.compression = compression
+        self.encoding = encoding
+        level = DYNAMIC_LEVELS[encoding]
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        elif encoding == "br":
+            self._compressor = brotli.Compressor(quality=level)
+        else:
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        self._first = True
+
+    def compress(self, chunk: bytes) -> bytes:
+        started = time.perf_counter()
+        if self.encoding == "zstd":
+            data = self._compressor.compress(chunk) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        elif self.encoding == "br":
+            data = self._compressor.process(chunk) + self._compressor.flush()
+        else:
+            data = self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        self._record(len(chunk), len(data), started)
+        return data
+
+    def finish(self) -> bytes:
+        started = time.perf_counter()
+        if self.encoding == "br":
+            data = self._compressor.finish()
+        else:
+            data = self._compressor.flush()
+        self._record(0, len(data), started)
+        return data
+
+    def _record(self, bytes_in: int, bytes_out: int, started: float) -> None:
+        # One response per stream, counted on its first chunk.
+        responses, self._first = int(self._first), False
+        self.compression.record(
+            self.encoding, bytes_in, bytes_out, (time.perf_counter() - started) * 1000, responses=responses
+        )
+
+
+def _header(headers, name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _vary(headers) -> list:
+    """``headers`` with Accept-Encoding added to Vary."""
+    vary = _header(headers, b"vary")
+    if vary is None:
+        return list(headers) + [(b"vary", b"Accept-Encoding")]
+    if b"accept-encoding" in vary.lower():
+        return list(headers)
+    return [(key, value + b", Accept-Encoding" if key.lower() == b"vary" else value) for key, value in headers]
+
+
+def _coded_etag(headers, encoding: str) -> list:
+    """``headers`` with a strong ETag suffixed by ``encoding``: the compressed
+    bytes are a different representation, so they need their own validator."""
+    return [
+        (key, value[:-1] + b"-" + encoding.encode() + b'"')
+        if key.lower() == b"etag" and value.startswith(b'"') and value.endswith(b'"')
+        else (key, value)
+        for key, value in headers
+    ]
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing JSON, NDJSON and text responses.
+
+    Responses that already carry Content-Encoding (e.g. precompressed
+    cached bodies) pass through untouched, as do server-sent events,
+    binary downloads and single bodies under ``min_bytes``.
+    """
+
+    def __init__(self, app, compression: Compression):
+        self.app = app
+        self.compression = compression
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = _header(scope["headers"], b"accept-encoding")
+        encoding = self.compression.negotiate(accept_encoding.decode("latin-1") if accept_encoding else None)
+        start = None
+        compressor: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", ())
+                content_type = (_header(headers, b"content-type") or b"").decode("latin-1")
+                if (
+                    message["status"] in (204, 304)
+                    or _header(headers, b"content-encoding") is not None
+                    or not compressible(content_type)
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None and start is not None:
+                if encoding is None or (not more_body and len(body) < self.compression.min_bytes):
+                    await send({**start, "headers": _vary(start["headers"])})
+                    start = None
+                    passthrough = True
+                    await send(message)
+                    return
+                headers = [
+                    (key, value)
+                    for key, value in _coded_etag(_vary(start["headers"]), encoding)
+                    if key.lower() != b"content-length"
+                ]
+                headers.append((b"content-encoding", encoding.encode()))
+                if not more_body:
+                    data = await self.compression.compress_async(body, encoding)
+                    headers.append((b"content-length", str(len(data)).encode()))
+                    await send({**start, "headers": headers})
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                await send({**start, "headers": headers})
+                start = None
+                compressor = self.compression.stream(encoding)
+            data = compressor.compress(body) if body else b""
+            if not more_body:
+                data += compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+compression = Compression.from_env()
@@ -0,0 +1,26 @@
+import os
+
+
+def env_str(name: str, default: str = "") -> str:
+    return os.getenv(name) or default
+
+
+def env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if not value:
+        return default
+    return int(value)
+
+
+def env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if not value:
+        return default
+    return float(value)
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.lower() in {"1", "true", "yes", "on"}
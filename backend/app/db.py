@@ -1,8 +1,18 @@
 import os
-from contextlib import contextmanager
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from .config import env_bool, env_int
+from .pool import PoolMetrics, instrument_engine, pgbouncer_connect_args, pool_options
+from .timing import instrument_statements, request_metrics, slow_query_log
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
 
 def _get_database_url() -> str:
     url = os.getenv("DATABASE_URL")
@@ -11,14 +21,178 @@ def _get_database_url() -> str:
     return url
 
 
-engine = create_engine(_get_database_url(), pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=True, bind=engine)
+def _async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"DB_ASYNC is not supported for {backend} databases")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+DB_ASYNC = env_bool("DB_ASYNC")
+# Open pooled connections and compile the common queries at startup.
+DB_WARMUP = env_bool("DB_WARMUP", True)
+DB_WARMUP_CONNECTIONS = env_int("DB_WARMUP_CONNECTIONS", env_int("DB_POOL_SIZE", 5))
+
+
+class Database:
+    """The engines and session factories, built on first use.
+
+    Importing the app doesn't read DATABASE_URL, load a driver or create a
+    pool, so tooling and tests that never query pay nothing, and each
+    worker builds its own engine. If a process forks after the engines
+    exist (gunicorn --preload, multiprocessing), the child drops the
+    inherited pool without closing the parent's sockets and opens its own
+    connections.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engine = None
+        self._sessions = None
+        self._async_engine = None
+        self._async_sessions = None
+        self.pool_metrics = PoolMetrics()
+        self.async_pool_metrics = PoolMetrics() if DB_ASYNC else None
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            self._build()
+        return self._engine
+
+    @property
+    def sessions(self):
+        if self._sessions is None:
+            self._build()
+        return self._sessions
+
+    @property
+    def async_engine(self):
+        """The asyncpg/aiosqlite engine, or None unless DB_ASYNC is set."""
+        if DB_ASYNC and self._async_engine is None:
+            self._build()
+        return self._async_engine
+
+    @property
+    def async_sessions(self):
+        if DB_ASYNC and self._async_sessions is None:
+            self._build()
+        return self._async_sessions
+
+    def _build(self) -> None:
+        with self._lock:
+            if self._engine is not None:
+                return
+            url = _get_database_url()
+            engine = create_engine(
+                url,
+                connect_args=pgbouncer_connect_args(make_url(url).drivername),
+                **pool_options(self.pool_metrics),
+            )
+            instrument_engine(engine, self.pool_metrics)
+            instrument_statements(engine, request_metrics, slow_query_log, explain_engine=engine)
+            if DB_ASYNC:
+                async_url = _async_database_url(url)
+                async_engine = create_async_engine(
+                    async_url,
+                    connect_args=pgbouncer_connect_args(make_url(async_url).drivername),
+                    **pool_options(self.async_pool_metrics, asyncio=True),
+                )
+                instrument_engine(async_engine.sync_engine, self.async_pool_metrics)
+                instrument_statements(async_engine.sync_engine, request_metrics, slow_query_log)
+                self._async_engine = async_engine
+                self._async_sessions = async_sessionmaker(autocommit=False, autoflush=True, bind=async_engine)
+            self._sessions = sessionmaker(autocommit=False, autoflush=True, bind=engine)
+            self._engine = engine
+
+    def after_fork(self) -> None:
+        """Forget connections inherited from the parent; they stay open for it."""
+        self._lock = threading.Lock()
+        for engine, metrics in ((self._engine, self.pool_metrics), (self._async_engine, self.async_pool_metrics)):
+            if engine is not None:
+                engine = getattr(engine, "sync_engine", engine)
+                engine.dispose(close=False)
+                metrics.reset()
+
+    async def warm_up(self, connections: int) -> None:
+        """Open up to ``connections`` pooled connections now, rather than on the first requests."""
+        await run_in_threadpool(_open_connections, self.engine, connections)
+        if self.async_engine is not None:
+            opened = []
+            try:
+                for _ in range(min(connections, _pool_size(self.async_engine.sync_engine))):
+                    opened.append(await self.async_engine.connect())
+            finally:
+                for connection in opened:
+                    await connection.close()
+
+    async def dispose(self) -> None:
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+        if self._engine is not None:
+            self._engine.dispose()
+
+
+def _pool_size(engine) -> int:
+    # NullPool keeps nothing, so there is nothing to warm.
+    return engine.pool.size() if hasattr(engine.pool, "size") else 0
+
+
+def _open_connections(engine, connections: int) -> None:
+    opened = []
+    try:
+        for _ in range(min(connections, _pool_size(engine))):
+            opened.append(engine.connect())
+    finally:
+        for connection in opened:
+            connection.close()
+
+
+database = Database()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=database.after_fork)
+
+
+def pool_stats() -> dict:
+    stats = {"sync": database.pool_metrics.snapshot(database.engine.pool)}
+    if database.async_engine is not None:
+        stats["async"] = database.async_pool_metrics.snapshot(database.async_engine.sync_engine.pool)
+    return stats
 
 
 @contextmanager
 def get_db_session():
-    session = SessionLocal()
+    session = database.sessions()
     try:
         yield session
     finally:
         session.close()
+
+
+@asynccontextmanager
+async def get_async_db_session():
+    session = database.async_sessions()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+def _call_with_session(fn, *args):
+    with get_db_session() as session:
+        return fn(session, *args)
+
+
+async def run_db(fn, *args):
+    """Run ``fn(session, *args)`` on the configured database path.
+
+    With DB_ASYNC the function runs on an AsyncSession via run_sync, so the
+    request never occupies a threadpool worker while waiting on the database.
+    Otherwise it runs on a regular Session in the threadpool, exactly as a
+    sync ``def`` handler would.
+    """
+    if DB_ASYNC:
+        async with get_async_db_session() as session:
+            return await session.run_sync(fn, *args)
+    return await run_in_threadpool(_call_with_session, fn, *args)
@@ -0,0 +1,210 @@
+import csv
+import io
+import re
+import zipfile
+from abc import ABC, abstractmethod
+from typing import Dict, List, Sequence
+from xml.sax.saxutils import escape
+
+from .filters import FLAG_FIELDS
+
+TAG_FIELDS = ("tickers", "currencies")
+# Control characters other than tab/newline are not allowed in XML 1.0.
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+# Spreadsheets evaluate a CSV cell starting with one of these as a formula,
+# so such cells get a leading "'".
+_CSV_FORMULA = re.compile(r"[=+\-@\t\r]")
+
+
+class _Chunks:
+    """Write-only sink the encoders write into; ``drain`` hands back what arrived."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+class Encoder(ABC):
+    """Turns batches of ClientOut-shaped dicts into a file, chunk by chunk.
+
+    ``write`` returns the bytes ready to send after each batch and
+    ``finish`` the rest, so memory is bounded by one batch whatever the
+    size of the book.
+    """
+
+    media_type: str
+    extension: str
+
+    def __init__(self, fields: Sequence[str]):
+        self.fields = tuple(fields)
+
+    @abstractmethod
+    def write(self, items: List[dict]) -> bytes:
+        ...
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class CsvEncoder(Encoder):
+    """Same layout POST /clients/bulk reads: tag cells are comma-separated."""
+
+    media_type = "text/csv; charset=utf-8"
+    extension = "csv"
+
+    def __init__(self, fields: Sequence[str]):
+        super().__init__(fields)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._writer.writerow(self.fields)
+
+    def write(self, items: List[dict]) -> bytes:
+        self._writer.writerows([_csv_cell(item.get(name)) for name in self.fields] for item in items)
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+
+class ParquetEncoder(Encoder):
+    """One row group per batch; tags are list<string> columns."""
+
+    media_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+
+    def __init__(self, fields: Sequence[str]):
+        # Imported here: pyarrow is optional and slow to import.
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("format=parquet needs pyarrow installed on the server")
+        super().__init__(fields)
+        self._pa = pa
+        self.schema = pa.schema([(name, _arrow_type(pa, name)) for name in self.fields])
+        self._sink = _Chunks()
+        self._writer = pq.ParquetWriter(pa.PythonFile(self._sink, mode="w"), self.schema, compression="zstd")
+
+    def write(self, items: List[dict]) -> bytes:
+        if items:
+            self._writer.write_batch(self._pa.RecordBatch.from_pylist(items, schema=self.schema))
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+class XlsxEncoder(Encoder):
+    """A single-sheet workbook, written as a streamed zip.
+
+    The sheet XML is compressed straight into the output as rows arrive
+    (inline strings, no shared-string table), and the zip directory
+    follows at the end, so nothing but the deflate window is held back.
+    """
+
+    media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    extension = "xlsx"
+
+    def __init__(self, fields: Sequence[str]):
+        super().__init__(fields)
+        self._sink = _Chunks()
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=zipfile.ZIP_DEFLATED)
+        for name, content in _XLSX_PARTS.items():
+            self._zip.writestr(name, content)
+        self._sheet = self._zip.open("xl/worksheets/sheet1.xml", "w")
+        self._sheet.write(_SHEET_HEAD + _xlsx_row(self.fields))
+
+    def write(self, items: List[dict]) -> bytes:
+        self._sheet.write(b"".join(_xlsx_row([item.get(name) for name in self.fields]) for item in items))
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._sheet.write(_SHEET_TAIL)
+        self._sheet.close()
+        self._zip.close()
+        return self._sink.drain()
+
+
+ENCODERS: Dict[str, type] = {"csv": CsvEncoder, "parquet": ParquetEncoder, "xlsx": XlsxEncoder}
+
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, list):
+        return ",".join(value)
+    return str(value)
+
+
+def _csv_cell(value) -> str:
+    text = _cell_text(value)
+    return "'" + text if _CSV_FORMULA.match(text) else text
+
+
+def _arrow_type(pa, name: str):
+    if name in TAG_FIELDS:
+        return pa.list_(pa.string())
+    if name in FLAG_FIELDS:
+        return pa.bool_()
+    return pa.string()
+
+
+def _xlsx_cell(value) -> str:
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    text = escape(_XML_ILLEGAL.sub("", _cell_text(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values) -> bytes:
+    return ("<row>" + "".join(_xlsx_cell(value) for value in values) + "</row>").encode()
+
+
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_XLSX_PARTS = {
+    "[Content_Types].xml": _XML_DECL
+    + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    + '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    + '<Default Extension="xml" ContentType="application/xml"/>'
+    + '<Override PartName="/xl/workbook.xml" '
+    + 'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    + '<Override PartName="/xl/worksheets/sheet1.xml" '
+    + 'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    + "</Types>",
+    "_rels/.rels": _XML_DECL
+    + f'<Relationships xmlns="{_PKG_REL_NS}">'
+    + f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+    + "</Relationships>",
+    "xl/workbook.xml": _XML_DECL
+    + f'<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}">'
+    + '<sheets><sheet name="Clients" sheetId="1" r:id="rId1"/></sheets></workbook>',
+    "xl/_rels/workbook.xml.rels": _XML_DECL
+    + f'<Relationships xmlns="{_PKG_REL_NS}">'
+    + f'<Relationship Id="rId1" Type="{_REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+    + "</Relationships>",
+}
+_SHEET_HEAD = (_XML_DECL + f'<worksheet xmlns="{_MAIN_NS}"><sheetData>').encode()
+_SHEET_TAIL = b"</sheetData></worksheet>"
@@ -0,0 +1,80 @@
+from typing import Dict, Mapping, Optional
+
+from sqlalchemy import Text, case, cast, func, literal, select, union_all
+
+from .filters import FLAG_FIELDS
+from .models import ClientCurrency, ClientTicker, Currency, Ticker
+from .serialize import Projection
+
+# Columns the facet query needs from each matching client.
+FACET_PROJECTION = Projection(("region",) + FLAG_FIELDS)
+TRUE_VALUES = {"true", "1"}
+
+
+def facet_statement(session, matched):
+    """One statement counting every facet over ``matched`` (a CTE of FACET_PROJECTION rows).
+
+    Rows are (facet, value, count). On Postgres, region and the flags come
+    from a single GROUPING SETS pass; other databases get one GROUP BY per
+    column. Tickers and currencies join the link tables once each.
+    """
+    region = func.upper(matched.c.region)
+    flags = [(name, matched.c[name]) for name in FLAG_FIELDS]
+    if session.get_bind().dialect.name == "postgresql":
+        scalars = [
+            select(
+                case(*((func.grouping(column) == 0, literal(name)) for name, column in flags), else_=literal("region")),
+                case(*((func.grouping(column) == 0, cast(column, Text)) for _, column in flags), else_=region),
+                func.count(),
+            ).group_by(func.grouping_sets(region, *(column for _, column in flags)))
+        ]
+    else:
+        scalars = [select(literal("region"), region, func.count()).group_by(region)] + [
+            select(literal(name), cast(column, Text), func.count()).group_by(column) for name, column in flags
+        ]
+    tags = [
+        select(literal(facet), value_column, func.count())
+        .select_from(matched)
+        .join(link_model, link_client_id == matched.c.id)
+        .join(tag_model, tag_model.id == link_tag_id)
+        .group_by(value_column)
+        for facet, link_model, link_client_id, link_tag_id, tag_model, value_column in (
+            ("tickers", ClientTicker, ClientTicker.client_id, ClientTicker.ticker_id, Ticker, Ticker.symbol),
+            ("currencies", ClientCurrency, ClientCurrency.client_id, ClientCurrency.currency_id, Currency, Currency.code),
+        )
+    ]
+    return union_all(*(stmt.select_from(matched) for stmt in scalars), *tags)
+
+
+def facet_counts(session, matched) -> dict:
+    tickers: Dict[str, int] = {}
+    currencies: Dict[str, int] = {}
+    regions: Dict[Optional[str], int] = {}
+    flags = dict.fromkeys(FLAG_FIELDS, 0)
+    for facet, value, count in session.execute(facet_statement(session, matched)):
+        if facet == "tickers":
+            tickers[value] = count
+        elif facet == "currencies":
+            currencies[value] = count
+        elif facet == "region":
+            regions[value] = count
+        elif value in TRUE_VALUES:
+            flags[facet] = count
+    return facet_body(sum(regions.values()), tickers, currencies, regions, flags)
+
+
+def facet_body(
+    total: int,
+    tickers: Mapping[str, int],
+    currencies: Mapping[str, int],
+    regions: Mapping[Optional[str], int],
+    flags: Mapping[str, int],
+) -> dict:
+    """ClientFacetsResponse-shaped dict; clients without a region only count towards ``total``."""
+    return {
+        "total": total,
+        "tickers": dict(sorted(tickers.items())),
+        "currencies": dict(sorted(currencies.items())),
+        "regions": dict(sorted((key, count) for key, count in regions.items() if key is not None)),
+        "flags": {name: flags.get(name, 0) for name in FLAG_FIELDS},
+    }
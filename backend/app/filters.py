@@ -0,0 +1,145 @@
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, exists, false, func, literal_column, or_, select
+
+from .models import AuditLog, Client, ClientCurrency, ClientTicker, Currency, Ticker
+
+FLAG_FIELDS = ("frn_buyer", "callable_buyer", "esg_green", "esg_social", "esg_sustainable")
+
+# (link client_id, link tag_id, tag model, tag value column)
+_TICKERS = (ClientTicker.client_id, ClientTicker.ticker_id, Ticker, Ticker.symbol)
+_CURRENCIES = (ClientCurrency.client_id, ClientCurrency.currency_id, Currency, Currency.code)
+
+
+@dataclass(frozen=True)
+class ClientFilter:
+    """Tag and flag filters for the client book.
+
+    Each tag dimension supports "has all of", "has any of" and "has none of";
+    dimensions and flags are ANDed together. ``tenor_covers`` (months) and
+    ``ois_min``/``ois_max`` (basis points, inclusive) run against the numeric
+    shadow columns; clients whose text did not parse never match them.
+    Values are expected to be
+    normalized (upper-cased, de-duplicated, sorted) so that equal filters
+    compare and hash equal, which lets the instance double as a cache key.
+    """
+
+    tickers_all: Tuple[str, ...] = ()
+    tickers_any: Tuple[str, ...] = ()
+    tickers_none: Tuple[str, ...] = ()
+    currencies_all: Tuple[str, ...] = ()
+    currencies_any: Tuple[str, ...] = ()
+    currencies_none: Tuple[str, ...] = ()
+    regions: Tuple[str, ...] = ()
+    frn_buyer: Optional[bool] = None
+    callable_buyer: Optional[bool] = None
+    esg_green: Optional[bool] = None
+    esg_social: Optional[bool] = None
+    esg_sustainable: Optional[bool] = None
+    tenor_covers: Optional[int] = None
+    ois_min: Optional[int] = None
+    ois_max: Optional[int] = None
+
+    def clauses(self, session) -> list:
+        result = []
+        result.extend(
+            _tag_clauses(session, _TICKERS, self.tickers_all, self.tickers_any, self.tickers_none)
+        )
+        result.extend(
+            _tag_clauses(
+                session, _CURRENCIES, self.currencies_all, self.currencies_any, self.currencies_none
+            )
+        )
+        if self.regions:
+            result.append(func.upper(Client.region).in_(self.regions))
+        for name in FLAG_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                column = getattr(Client, name)
+                result.append(column.is_(True) if value else column.isnot(True))
+        if self.tenor_covers is not None:
+            result.append(_tenor_covers(session, self.tenor_covers))
+        if self.ois_min is not None:
+            result.append(Client.target_spread_ois_bp >= self.ois_min)
+        if self.ois_max is not None:
+            result.append(Client.target_spread_ois_bp <= self.ois_max)
+        return result
+
+
+def _tenor_covers(session, months: int):
+    # A missing bound is open-ended, but a client needs at least one.
+    low, high = Client.tenors_min_months, Client.tenors_max_months
+    has_range = or_(low.isnot(None), high.isnot(None))
+    if session.get_bind().dialect.name == "postgresql":
+        # Same expression and predicate as idx_client_tenor_range (GiST).
+        tenor_range = func.int4range(low, high, literal_column("'[]'"))
+        return and_(has_range, tenor_range.op("@>")(months))
+    return and_(has_range, or_(low.is_(None), low <= months), or_(high.is_(None), high >= months))
+
+
+def _tag_clauses(
+    session,
+    dimension,
+    all_of: Tuple[str, ...],
+    any_of: Tuple[str, ...],
+    none_of: Tuple[str, ...],
+) -> List:
+    if not (all_of or any_of or none_of):
+        return []
+    link_client_id, link_tag_id, tag_model, tag_column = dimension
+
+    # Resolve tag values to ids up front so the planner sees literal tag ids
+    # and can use per-tag statistics; joining through the tag table instead
+    # hides the skew between popular and rare tickers.
+    wanted = set(all_of) | set(any_of) | set(none_of)
+    ids = dict(session.execute(select(tag_column, tag_model.id).where(tag_column.in_(wanted))).all())
+
+    # Each condition is a semi-join on the (tag_id, client_id) index, so cost
+    # follows the posting-list size of the requested tags rather than the
+    # book size, and dimensions never multiply each other's rows.
+    result = []
+    if all_of:
+        if any(value not in ids for value in all_of):
+            return [false()]
+        for value in all_of:
+            result.append(Client.id.in_(select(link_client_id).where(link_tag_id == ids[value])))
+    if any_of:
+        any_ids = [ids[value] for value in any_of if value in ids]
+        if not any_ids:
+            return [false()]
+        result.append(Client.id.in_(select(link_client_id).where(link_tag_id.in_(any_ids))))
+    none_ids = [ids[value] for value in none_of if value in ids]
+    if none_ids:
+        result.append(
+            ~exists().where(link_client_id == Client.id, link_tag_id.in_(none_ids))
+        )
+    return result
+
+
+@dataclass(frozen=True)
+class AuditFilter:
+    """Client, time-range and field filters for the audit log.
+
+    ``since`` is inclusive and ``until`` exclusive, so consecutive windows
+    never overlap.
+    """
+
+    client_id: Optional[uuid.UUID] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    field_names: Tuple[str, ...] = ()
+
+    def clauses(self) -> list:
+        result = []
+        if self.client_id is not None:
+            result.append(AuditLog.client_id == self.client_id)
+        if self.since is not None:
+            result.append(AuditLog.changed_at >= self.since)
+        if self.until is not None:
+            result.append(AuditLog.changed_at < self.until)
+        if self.field_names:
+            result.append(AuditLog.field_name.in_(self.field_names))
+        return result
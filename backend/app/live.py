@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from typing import Callable, Optional, Set
+
+from fastapi import HTTPException
+from sqlalchemy.engine import make_url
+
+from .config import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "client_changes"
+
+
+class Subscription:
+    """One live subscriber.
+
+    Only the newest pending version is kept, so a slow consumer never builds
+    up a queue: however far behind it falls, its next message is simply the
+    latest version.
+    """
+
+    def __init__(self, broadcaster: "Broadcaster"):
+        self.pending = 0
+        self.sent = 0
+        self._broadcaster = broadcaster
+        self._event = asyncio.Event()
+
+    def offer(self, version: int) -> None:
+        if version <= self.pending:
+            return
+        if self._event.is_set():
+            self._broadcaster.coalesced += 1
+        self.pending = version
+        self._event.set()
+
+    async def next(self, timeout: float) -> Optional[int]:
+        """Return the next version to send, or None after ``timeout`` idle seconds."""
+        while True:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+            # Let the rest of a burst land so it goes out as one message.
+            await asyncio.sleep(self._broadcaster.coalesce_seconds)
+            self._event.clear()
+            if self.pending > self.sent:
+                self.sent = self.pending
+                self._broadcaster.delivered += 1
+                return self.sent
+
+
+class Broadcaster:
+    """Fans data-version changes out to the live subscribers of this process."""
+
+    def __init__(self, coalesce_seconds: float, heartbeat_seconds: float, max_subscribers: int):
+        self.coalesce_seconds = coalesce_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_subscribers = max_subscribers
+        self.version = 0
+        self.published = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self.listening = False
+        self._subscribers: Set[Subscription] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_env(cls) -> "Broadcaster":
+        return cls(
+            coalesce_seconds=env_float("LIVE_COALESCE_MS", 50) / 1000,
+            heartbeat_seconds=env_float("LIVE_HEARTBEAT_SECONDS", 15),
+            max_subscribers=env_int("LIVE_MAX_SUBSCRIBERS", 1000),
+        )
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    def publish(self, version: int) -> None:
+        if version <= self.version:
+            return
+        self.version = version
+        self.published += 1
+        for subscription in self._subscribers:
+            subscription.offer(version)
+
+    def publish_threadsafe(self, version: int) -> None:
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.publish, version)
+
+    def subscribe(self, current_version: int) -> Subscription:
+        if len(self._subscribers) >= self.max_subscribers:
+            raise HTTPException(status_code=503, detail="Too many live subscribers")
+        subscription = Subscription(self)
+        self._subscribers.add(subscription)
+        subscription.offer(max(current_version, self.version))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def stats(self) -> dict:
+        return {
+            "listening": self.listening,
+            "version": self.version,
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "coalesced": self.coalesced,
+        }
+
+
+broadcaster = Broadcaster.from_env()
+
+
+async def listen(database_url: str, on_version: Callable[[int], None]) -> None:
+    """Forward NOTIFYs on CHANNEL to ``on_version``, reconnecting as needed.
+
+    One connection per process, however many subscribers there are.
+    """
+    try:
+        import asyncpg
+    except ImportError:
+        logger.warning("asyncpg is not installed; live updates only cover this process's writes")
+        return
+
+    dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+    def on_notify(connection, pid, channel, payload):
+        on_version(int(payload))
+
+    while True:
+        closed = asyncio.Event()
+        connection = None
+        try:
+            connection = await asyncpg.connect(dsn)
+            connection.add_termination_listener(lambda _: closed.set())
+            await connection.add_listener(CHANNEL, on_notify)
+            broadcaster.listening = True
+            # Catch up on anything committed while we weren't listening.
+            on_version(await connection.fetchval("SELECT version FROM data_version WHERE id = 1") or 0)
+            await closed.wait()
+        except (OSError, asyncpg.PostgresError) as exc:
+            logger.warning("LISTEN %s failed: %s", CHANNEL, exc)
+        finally:
+            broadcaster.listening = False
+            if connection is not None and not connection.is_closed():
+                await connection.close()
+        await asyncio.sleep(1)
@@ -1,21 +1,99 @@
-from fastapi import FastAPI, HTTPException, Query, Response
+import asyncio
+import base64
+import csv
+import io
+import json
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import joinedload
-from sqlalchemy import func
-from typing import Optional, List, Iterable
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy import and_, insert, null, or_, select, tuple_, update
+from typing import AsyncIterator, Optional, List, Iterable, Iterator, Tuple
 
-from .db import get_db_session
-from .models import Client, Ticker, Currency, AuditLog
+from .audit import audit_writer
+from .cache import client_cache
+from .compression import CompressionMiddleware, compression
+from .config import env_str
+from .db import DB_ASYNC, DB_WARMUP, DB_WARMUP_CONNECTIONS, database, get_async_db_session, get_db_session, pool_stats, run_db
+from .filters import AuditFilter, ClientFilter
+from .export import ENCODERS
+from .facets import FACET_PROJECTION, facet_counts
+from .live import Subscription, broadcaster, listen
+from .matching import Issue, client_snapshot
+from .readmodel import client_book, record_dicts
+from .refdata import reference_data
+from .models import Client, ClientTicker, ClientCurrency, ClientTombstone, AuditLog, Currency, Ticker
+from .serialize import CLIENT_COLUMNS, FULL, Projection, client_dict, client_dicts, dumps
+from .search import fallback_index, index_client, search_plan, unindex_client
 from .schemas import (
+    BulkImportResponse,
+    BulkRowError,
+    BulkUpdateItem,
+    BulkUpdateResponse,
+    ClientPatch,
+    ClientChangesResponse,
+    ClientFacetsResponse,
     ClientListResponse,
     ClientOut,
     ClientUpdate,
     ClientCreate,
     AuditListResponse,
-    AuditItem,
+    MatchRequest,
+    MatchResponse,
+    TagCountsResponse,
 )
+from .timing import TimingMiddleware, request_metrics
+from .terms import SOURCE_FIELDS, apply_numeric_values, numeric_values, parse_spread, parse_tenor, spread_benchmark
+from .versioning import audit_version, data_version
+from .tags import (
+    get_or_create_currencies,
+    get_or_create_currency_map,
+    get_or_create_ticker_map,
+    get_or_create_tickers,
+    resolve_currency_ids,
+    resolve_ticker_ids,
+)
+
+MAX_PAGE_SIZE = 1000
+MAX_TAG_SUGGESTIONS = 100
+STREAM_BATCH_SIZE = 500
+EXPORT_BATCH_SIZE = 5000
+BULK_CHUNK_SIZE = 500
+AUDIT_PAGE_SIZE = 100
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    broadcaster.bind(asyncio.get_running_loop())
+    await run_in_threadpool(audit_writer.start)
+    if DB_WARMUP:
+        await database.warm_up(DB_WARMUP_CONNECTIONS)
+    if client_book.enabled:
+        await run_db(client_book.load)
+    if reference_data.enabled:
+        await run_db(reference_data.load)
+    if DB_WARMUP:
+        await run_db(_prime_queries)
+    engine = database.engine
+    listener = None
+    if engine.dialect.name == "postgresql":
+        # LISTEN needs a session-pooled connection; behind PgBouncer in
+        # transaction mode, point LIVE_DATABASE_URL straight at Postgres.
+        live_url = env_str("LIVE_DATABASE_URL") or engine.url.render_as_string(hide_password=False)
+        listener = asyncio.create_task(listen(live_url, data_version.observe))
+    yield
+    if listener is not None:
+        listener.cancel()
+    await run_in_threadpool(audit_writer.stop)
+    await database.dispose()
+
 
-app = FastAPI(title="Client Tool API")
+app = FastAPI(title="Client Tool API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,11 +102,50 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if compression.enabled:
+    app.add_middleware(CompressionMiddleware, compression=compression)
+if request_metrics.enabled:
+    app.add_middleware(TimingMiddleware, metrics=request_metrics)
 
 @app.get("/health")
 def health():
     return {"ok": True}
 
+@app.get("/cache/stats")
+def cache_stats():
+    return client_cache.stats()
+
+@app.get("/compression/stats")
+def compression_stats():
+    return compression.stats()
+
+@app.get("/reference/stats")
+def reference_stats():
+    return reference_data.stats()
+
+@app.get("/db/pool")
+def db_pool():
+    return pool_stats()
+
+@app.get("/live/stats")
+def live_stats():
+    return broadcaster.stats()
+
+@app.get("/audit/stats")
+def audit_stats():
+    return audit_writer.stats()
+
+@app.get("/metrics")
+def metrics():
+    pools = [("sync", database.pool_metrics)]
+    if database.async_pool_metrics is not None:
+        pools.append(("async", database.async_pool_metrics))
+    extra = [
+        ("db_pool_checkout_seconds", "Time to get a pooled connection", f'engine="{name}"', pool.checkout_ms, 0.001)
+        for name, pool in pools
+    ]
+    return Response(content=request_metrics.prometheus(extra), media_type="text/plain; version=0.0.4")
+
 def _normalize_list(values: Optional[Iterable[str]]) -> List[str]:
     if values is None:
         return []
@@ -45,257 +162,1033 @@ def _normalize_list(values: Optional[Iterable[str]]) -> List[str]:
     return cleaned
 
 
+def _encode_cursor(values: list) -> str:
+    raw = json.dumps([str(v) if isinstance(v, uuid.UUID) else v for v in values]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _cursor_values(cursor: str) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    values = json.loads(base64.urlsafe_b64decode(padded))
+    if not isinstance(values, list):
+        raise ValueError("cursor is not a list")
+    return values
+
+
+def _decode_cursor(cursor: str, ranked: bool) -> tuple:
+    try:
+        values = _cursor_values(cursor)
+        if ranked:
+            rank, client_name, client_id = values
+            return float(rank), str(client_name), uuid.UUID(client_id)
+        client_name, client_id = values
+        return str(client_name), uuid.UUID(client_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _row_cursor(row, ranked: bool) -> str:
+    values = [row.client_name, row.id]
+    return _encode_cursor([row.rank] + values if ranked else values)
+
+
+def _tag_values(value: Optional[str]) -> Tuple[str, ...]:
+    return tuple(sorted(set(_normalize_list(value))))
+
+
+def _parsed_param(name: str, value: Optional[str], parse) -> Optional[int]:
+    if value is None:
+        return None
+    parsed = parse(value)
+    if parsed is None:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}")
+    return parsed
+
+
+def client_filter_params(
+    ticker: Optional[str] = Query(None, description="Has all of these ticker symbol(s), comma-separated"),
+    ticker_any: Optional[str] = Query(None, description="Has any of these ticker symbol(s)"),
+    ticker_not: Optional[str] = Query(None, description="Has none of these ticker symbol(s)"),
+    currency: Optional[str] = Query(None, description="Has all of these currency code(s), comma-separated"),
+    currency_any: Optional[str] = Query(None, description="Has any of these currency code(s)"),
+    currency_not: Optional[str] = Query(None, description="Has none of these currency code(s)"),
+    region: Optional[str] = Query(None, description="In any of these region(s), comma-separated"),
+    frn_buyer: Optional[bool] = Query(None),
+    callable_buyer: Optional[bool] = Query(None),
+    esg_green: Optional[bool] = Query(None),
+    esg_social: Optional[bool] = Query(None),
+    esg_sustainable: Optional[bool] = Query(None),
+    tenor_covers: Optional[str] = Query(None, description="Tenor range includes this tenor, e.g. 7Y"),
+    ois_min: Optional[str] = Query(None, description="OIS target at least this many bp, e.g. 100"),
+    ois_max: Optional[str] = Query(None, description="OIS target at most this many bp"),
+) -> ClientFilter:
+    return ClientFilter(
+        tickers_all=_tag_values(ticker),
+        tickers_any=_tag_values(ticker_any),
+        tickers_none=_tag_values(ticker_not),
+        currencies_all=_tag_values(currency),
+        currencies_any=_tag_values(currency_any),
+        currencies_none=_tag_values(currency_not),
+        regions=_tag_values(region),
+        frn_buyer=frn_buyer,
+        callable_buyer=callable_buyer,
+        esg_green=esg_green,
+        esg_social=esg_social,
+        esg_sustainable=esg_sustainable,
+        tenor_covers=_parsed_param("tenor_covers", tenor_covers, parse_tenor),
+        ois_min=_parsed_param("ois_min", ois_min, parse_spread),
+        ois_max=_parsed_param("ois_max", ois_max, parse_spread),
+    )
+
+
+def _name_order(session):
+    """client_name compared by code point, the order the read model keeps.
+
+    Pinned to the C collation on Postgres so list order and keyset cursors
+    don't depend on the database's default collation; SQLite compares
+    bytes already.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        return Client.client_name.collate("C")
+    return Client.client_name
+
+
+def _client_list_statement(
+    session,
+    q: Optional[str],
+    filters: ClientFilter,
+    after: Optional[tuple] = None,
+    projection: Projection = FULL,
+):
+    """Rows are projection.columns plus rank; rank is None unless q is set."""
+    plan = search_plan(session, q) if q else None
+    rank = plan.rank if plan is not None else null()
+    name = _name_order(session)
+    stmt = select(*projection.columns, rank.label("rank"))
+
+    for clause in filters.clauses(session):
+        stmt = stmt.where(clause)
+
+    if plan is None:
+        if after is not None:
+            stmt = stmt.where(tuple_(name, Client.id) > tuple_(*after))
+        return stmt.order_by(name, Client.id)
+
+    stmt = stmt.where(plan.clause)
+    if after is not None:
+        after_rank, after_name, after_id = after
+        stmt = stmt.where(
+            or_(
+                rank < after_rank,
+                and_(rank == after_rank, tuple_(name, Client.id) > tuple_(after_name, after_id)),
+            )
+        )
+    return stmt.order_by(rank.desc(), name, Client.id)
+
+
+def _stream_clients(
+    q: Optional[str],
+    filters: ClientFilter,
+    after: Optional[tuple],
+    limit: Optional[int],
+    projection: Projection,
+) -> Iterator[bytes]:
+    with get_db_session() as session:
+        stmt = _client_list_statement(session, q, filters, after, projection).limit(limit)
+        rows = session.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+        for batch in rows.partitions():
+            yield b"".join(dumps(item) + b"\n" for item in projection.dicts(session, batch))
+
+
+async def _stream_clients_async(
+    q: Optional[str],
+    filters: ClientFilter,
+    after: Optional[tuple],
+    limit: Optional[int],
+    projection: Projection,
+) -> AsyncIterator[bytes]:
+    async with get_async_db_session() as session:
+        stmt = await session.run_sync(_client_list_statement, q, filters, after, projection)
+        rows = await session.stream(stmt.limit(limit).execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for batch in rows.partitions():
+            items = await session.run_sync(projection.dicts, batch)
+            yield b"".join(dumps(item) + b"\n" for item in items)
+
+
+def _list_clients_from_book(
+    session,
+    filters: ClientFilter,
+    after: Optional[tuple],
+    limit: Optional[int],
+    projection: Projection,
+) -> bytes:
+    client_book.refresh(session)
+    with client_book.lock:
+        records = client_book.page(filters, after, limit)
+        next_cursor = None
+        if limit is not None and len(records) > limit:
+            records = records[:limit]
+            next_cursor = _row_cursor(records[-1], ranked=False)
+        items = record_dicts(projection, records)
+    return dumps({"items": items, "next_cursor": next_cursor})
+
+
+def _list_clients_body(
+    session,
+    q: Optional[str],
+    filters: ClientFilter,
+    after: Optional[tuple],
+    limit: Optional[int],
+    projection: Projection,
+) -> bytes:
+    if client_book.enabled and not q:
+        return _list_clients_from_book(session, filters, after, limit, projection)
+    stmt = _client_list_statement(session, q, filters, after, projection)
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    rows = session.execute(stmt).all()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _row_cursor(rows[-1], ranked=bool(q))
+
+    return dumps({"items": projection.dicts(session, rows), "next_cursor": next_cursor})
+
+
+def _etag(version: str, encoding: Optional[str] = None) -> str:
+    # Strong validators must differ between representations that differ
+    # byte for byte (RFC 9110 8.8.1), so each content coding gets its own.
+    return f'"{version}-{encoding}"' if encoding else f'"{version}"'
+
+
+def _etag_matched(request: Request, version: str) -> Optional[str]:
+    """The If-None-Match entity tag naming ``version`` in any coding, if one does.
+
+    A 304 carries that tag back, so a cache refreshes the variant it holds.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    for value in (value.strip() for value in header.split(",")):
+        if value == "*":
+            return _etag(version)
+        # If-None-Match uses weak comparison, so W/"x" matches "x".
+        tag = value[2:] if value.startswith("W/") else value
+        if tag.strip('"').partition("-")[0] == version:
+            return tag
+    return None
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept-Encoding"})
+
+
+# Audit responses change with the client book (deleting a client deletes
+# its audit rows) and with audit rows written after their change commits.
+CLIENT_VERSIONS = (data_version,)
+AUDIT_VERSIONS = (data_version, audit_version)
+
+
+def _cached_version(versions) -> Optional[str]:
+    values = [counter.cached() for counter in versions]
+    return None if None in values else ".".join(map(str, values))
+
+
+def _load_versioned(session, versions, fn, *args) -> Tuple[str, bytes]:
+    # Read the version before the data: a write landing in between then
+    # only makes the ETag older than the body, never newer.
+    version = ".".join(str(counter.load(session)) for counter in versions)
+    return version, fn(session, *args)
+
+
+async def _conditional_json(
+    request: Request, cache_parts: tuple, fn, *args, versions=CLIENT_VERSIONS
+) -> Response:
+    encoding = compression.negotiate(request.headers.get("accept-encoding"))
+    version = _cached_version(versions)
+    cache_key = client_cache.key(*cache_parts)
+    if version is not None:
+        matched = _etag_matched(request, version)
+        if matched is not None:
+            return _not_modified(matched)
+        if encoding is not None:
+            compressed = client_cache.get(cache_key + (version, encoding))
+            if compressed is not None:
+                return _json_response(compressed, _etag(version, encoding), encoding)
+        body = client_cache.get(cache_key + (version,))
+        if body is not None:
+            return await _encoded_json(cache_key, version, body, encoding)
+
+    version, body = await run_db(_load_versioned, versions, fn, *args)
+    client_cache.put(cache_key + (version,), body)
+    matched = _etag_matched(request, version)
+    if matched is not None:
+        return _not_modified(matched)
+    return await _encoded_json(cache_key, version, body, encoding)
+
+
+async def _encoded_json(cache_key: tuple, version: str, body: bytes, encoding: Optional[str]) -> Response:
+    # Compressed variants sit next to the plain body in the response cache,
+    # keyed by version and encoding, so a hot list is compressed once (at
+    # the cached levels) per version rather than once per request.
+    if encoding is None or len(body) < compression.min_bytes:
+        return _json_response(body, _etag(version), None)
+    compressed = await compression.compress_async(body, encoding, cached=True)
+    client_cache.put(cache_key + (version, encoding), compressed)
+    return _json_response(compressed, _etag(version, encoding), encoding)
+
+
+def _json_response(body: bytes, etag: str, encoding: Optional[str]) -> Response:
+    headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _prime_queries(session) -> None:
+    """Run each common /clients statement shape once at startup.
+
+    SQLAlchemy caches compiled SQL per statement shape, not per parameter
+    value, so this moves compilation (and the first use of each pooled
+    connection) off the first real requests. Pages are fetched with LIMIT 0,
+    which Postgres answers without running the scan.
+    """
+    data_version.load(session)
+    nobody = uuid.UUID(int=0)
+    ticker = session.scalar(select(Ticker.symbol).limit(1))
+    currency = session.scalar(select(Currency.code).limit(1))
+    shapes = [(None, ClientFilter(), None), (None, ClientFilter(), ("", nobody)), ("~", ClientFilter(), None)]
+    if ticker is not None:
+        shapes += [(None, ClientFilter(tickers_all=(ticker,)), None), (None, ClientFilter(tickers_any=(ticker,)), None)]
+    if currency is not None:
+        shapes.append((None, ClientFilter(currencies_all=(currency,)), None))
+    for q, filters, after in shapes:
+        for projection in (FULL, Projection(("client_name",))):
+            session.execute(_client_list_statement(session, q, filters, after, projection).limit(0)).all()
+    # The tag lookups of a page, if the book has a client to look up.
+    FULL.dicts(session, session.execute(_client_list_statement(session, None, ClientFilter()).limit(1)).all())
+    session.execute(select(*CLIENT_COLUMNS).where(Client.id == nobody)).all()
+
+
 @app.get("/clients", response_model=ClientListResponse)
-def list_clients(
-    q: Optional[str] = Query(None, description="Search by client name"),
-    ticker: Optional[str] = Query(None, description="Filter by ticker symbol(s), comma-separated"),
-    currency: Optional[str] = Query(None, description="Filter by currency code(s), comma-separated"),
+async def list_clients(
+    request: Request,
+    q: Optional[str] = Query(None, description="Search name, notes, TOM's code and tickers; results are ranked"),
+    filters: ClientFilter = Depends(client_filter_params),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous next_cursor"),
+    stream: bool = Query(False, description="Stream rows as NDJSON instead of a single JSON body"),
+    fields: Optional[str] = Query(None, description="Comma-separated ClientOut fields to return; id is always included"),
 ):
+    q = q.strip() if q else None
+    after = _decode_cursor(cursor, ranked=bool(q)) if cursor else None
+    try:
+        projection = Projection.parse(fields)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    if stream:
+        rows = (_stream_clients_async if DB_ASYNC else _stream_clients)(q, filters, after, limit, projection)
+        return StreamingResponse(rows, media_type="application/x-ndjson")
+
+    return await _conditional_json(
+        request,
+        ("list", q, filters, limit, cursor, projection),
+        _list_clients_body,
+        q,
+        filters,
+        after,
+        limit,
+        projection,
+    )
+
+
+def _client_detail_body(session, client_id: uuid.UUID) -> bytes:
+    if client_book.enabled:
+        client_book.refresh(session)
+        with client_book.lock:
+            record = client_book.get(str(client_id))
+            item = record_dicts(FULL, [record])[0] if record is not None else None
+        if item is None:
+            raise HTTPException(status_code=404, detail="Client not found")
+        return dumps(item)
+    rows = session.execute(select(*CLIENT_COLUMNS).where(Client.id == client_id)).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Client not found")
+    return dumps(client_dicts(session, rows)[0])
+
+
+def _client_changes_body(session, since: int) -> bytes:
+    version = data_version.load(session)
+    stmt = select(*CLIENT_COLUMNS).order_by(_name_order(session), Client.id)
+    deleted = []
+    if since:
+        stmt = stmt.where(Client.row_version > since)
+        deleted = session.scalars(
+            select(ClientTombstone.client_id).where(ClientTombstone.version > since)
+        ).all()
+    return dumps(
+        {
+            "version": version,
+            "items": client_dicts(session, session.execute(stmt).all()),
+            "deleted": [str(client_id) for client_id in deleted],
+        }
+    )
+
+
+@app.get("/clients/changes", response_model=ClientChangesResponse)
+async def client_changes(
+    request: Request,
+    since: int = Query(0, ge=0, description="version from a previous response; 0 returns every client"),
+):
+    return await _conditional_json(request, ("changes", since), _client_changes_body, since)
+
+
+async def _client_event_stream(subscription: Subscription) -> AsyncIterator[bytes]:
+    try:
+        while True:
+            version = await subscription.next(broadcaster.heartbeat_seconds)
+            if version is None:
+                yield b": keep-alive\n\n"
+            else:
+                yield f'id: {version}\nevent: changes\ndata: {{"version": {version}}}\n\n'.encode()
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+@app.get("/clients/events")
+async def client_events(request: Request):
+    """Server-sent events carrying the latest data version after each change.
+
+    Fetch ``/clients/changes?since=`` on each event to get the actual rows.
+    """
+    version = data_version.cached()
+    if version is None:
+        version = await run_db(data_version.load)
+    subscription = broadcaster.subscribe(version)
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        subscription.sent = int(last_event_id)
+    return StreamingResponse(
+        _client_event_stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _export_clients(q: Optional[str], filters: ClientFilter, projection: Projection, encoder) -> Iterator[bytes]:
     with get_db_session() as session:
-        query = session.query(Client).options(
-            joinedload(Client.tickers),
-            joinedload(Client.currencies),
-        )
+        stmt = _client_list_statement(session, q, filters, None, projection)
+        rows = session.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for batch in rows.partitions():
+            chunk = encoder.write(projection.dicts(session, batch))
+            if chunk:
+                yield chunk
+    yield encoder.finish()
+
+
+async def _export_clients_async(
+    q: Optional[str], filters: ClientFilter, projection: Projection, encoder
+) -> AsyncIterator[bytes]:
+    async with get_async_db_session() as session:
+        stmt = await session.run_sync(_client_list_statement, q, filters, None, projection)
+        rows = await session.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for batch in rows.partitions():
+            items = await session.run_sync(projection.dicts, batch)
+            # Compression and Arrow conversion are CPU-bound; keep them off the loop.
+            chunk = await run_in_threadpool(encoder.write, items)
+            if chunk:
+                yield chunk
+    yield await run_in_threadpool(encoder.finish)
+
+
+@app.get("/clients/export")
+async def export_clients(
+    format: str = Query("csv", description="csv, parquet or xlsx"),
+    q: Optional[str] = Query(None, description="Search name, notes, TOM's code and tickers; results are ranked"),
+    filters: ClientFilter = Depends(client_filter_params),
+    fields: Optional[str] = Query(None, description="Comma-separated ClientOut fields to export; id is always included"),
+):
+    """The filtered book as a file, streamed from a server-side cursor in batches."""
+    q = q.strip() if q else None
+    if format not in ENCODERS:
+        raise HTTPException(status_code=400, detail=f"Unknown format {format!r}; expected csv, parquet or xlsx")
+    try:
+        projection = Projection.parse(fields)
+        encoder = ENCODERS[format](projection.fields)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    chunks = (_export_clients_async if DB_ASYNC else _export_clients)(q, filters, projection, encoder)
+    return StreamingResponse(
+        chunks,
+        media_type=encoder.media_type,
+        headers={"Content-Disposition": f'attachment; filename="clients.{encoder.extension}"'},
+    )
+
+
+def _client_facets_body(session, q: Optional[str], filters: ClientFilter) -> bytes:
+    if client_book.enabled and not q:
+        client_book.refresh(session)
+        with client_book.lock:
+            return dumps(client_book.facets(filters))
+    matched = _client_list_statement(session, q, filters, None, FACET_PROJECTION).order_by(None).cte("matched")
+    return dumps(facet_counts(session, matched))
+
+
+@app.get("/clients/facets", response_model=ClientFacetsResponse)
+async def client_facets(
+    request: Request,
+    q: Optional[str] = Query(None, description="Search name, notes, TOM's code and tickers"),
+    filters: ClientFilter = Depends(client_filter_params),
+):
+    """Counts per ticker, currency, region and flag over the clients GET /clients would return."""
+    q = q.strip() if q else None
+    return await _conditional_json(request, ("facets", q, filters), _client_facets_body, q, filters)
+
+
+def _tag_counts_body(session, name: str, prefix: str, limit: int) -> bytes:
+    values = reference_data.prefixed(session, name, prefix, limit)
+    if client_book.enabled:
+        client_book.refresh(session)
+        with client_book.lock:
+            counts = client_book.tag_counts(name, values)
+    else:
+        counts = reference_data.client_counts(session, name, values)
+    return dumps({"items": [{"value": value, "clients": counts.get(value, 0)} for value in values]})
+
+
+async def _tag_counts(request: Request, name: str, prefix: Optional[str], limit: int) -> Response:
+    # Tags are stored upper-cased (see _normalize_list), so match that.
+    prefix = prefix.strip().upper() if prefix else ""
+    return await _conditional_json(request, (name, prefix, limit), _tag_counts_body, name, prefix, limit)
+
+
+@app.get("/tickers", response_model=TagCountsResponse)
+async def list_tickers(
+    request: Request,
+    prefix: Optional[str] = Query(None, description="Case-insensitive symbol prefix"),
+    limit: int = Query(20, ge=1, le=MAX_TAG_SUGGESTIONS),
+):
+    """Ticker symbols starting with ``prefix`` in sorted order, with how many clients hold each."""
+    return await _tag_counts(request, "tickers", prefix, limit)
+
+
+@app.get("/currencies", response_model=TagCountsResponse)
+async def list_currencies(
+    request: Request,
+    prefix: Optional[str] = Query(None, description="Case-insensitive code prefix"),
+    limit: int = Query(20, ge=1, le=MAX_TAG_SUGGESTIONS),
+):
+    """Currency codes starting with ``prefix`` in sorted order, with how many clients hold each."""
+    return await _tag_counts(request, "currencies", prefix, limit)
+
+
+@app.get("/clients/{client_id}", response_model=ClientOut)
+async def get_client(client_id: str, request: Request):
+    parsed = _parse_client_id(client_id)
+    return await _conditional_json(request, ("detail", parsed), _client_detail_body, parsed)
+
+
+def _client_values(payload: ClientCreate) -> dict:
+    values = {
+        "client_name": payload.client_name,
+        "tenors_min": payload.tenors_min,
+        "tenors_max": payload.tenors_max,
+        "tenors_sweetspot": payload.tenors_sweetspot,
+        "frn_buyer": payload.frn_buyer or False,
+        "callable_buyer": payload.callable_buyer or False,
+        "private_placement_buyer": payload.private_placement_buyer,
+        "esg_green": payload.esg_green or False,
+        "esg_social": payload.esg_social or False,
+        "esg_sustainable": payload.esg_sustainable or False,
+        "target_spread_ois": payload.target_spread_ois,
+        "target_g_spread": payload.target_g_spread,
+        "toms_code": payload.toms_code,
+        "client_notes": payload.client_notes,
+        "region": payload.region,
+    }
+    values.update(numeric_values(values))
+    return values
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+def _parse_bulk_rows(content_type: str, body: bytes) -> Tuple[List[Tuple[int, dict]], List[BulkRowError]]:
+    rows: List[Tuple[int, dict]] = []
+    errors: List[BulkRowError] = []
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Body must be UTF-8")
+
+    if content_type == "text/csv":
+        reader = csv.DictReader(io.StringIO(text))
+        for index, record in enumerate(reader):
+            row = {key: (value if value != "" else None) for key, value in record.items() if key}
+            for field in ("tickers", "currencies"):
+                if row.get(field) is not None:
+                    row[field] = _normalize_list(row[field])
+            rows.append((index, row))
+    elif content_type in {"application/x-ndjson", "application/jsonl"}:
+        lines = [line for line in text.splitlines() if line.strip()]
+        for index, line in enumerate(lines):
+            try:
+                rows.append((index, json.loads(line)))
+            except ValueError as exc:
+                errors.append(BulkRowError(index=index, error=f"Invalid JSON: {exc}"))
+    else:
+        try:
+            data = json.loads(text)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {exc}")
+        if not isinstance(data, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of clients")
+        rows = list(enumerate(data))
+
+    return rows, errors
+
+
+def _insert_client_chunk(
+    session, chunk: List[Tuple[int, ClientCreate]], ticker_ids, currency_ids, version: int
+) -> List[str]:
+    client_rows = []
+    ticker_links = []
+    currency_links = []
+    for _, payload in chunk:
+        client_id = uuid.uuid4()
+        client_rows.append({"id": client_id, "row_version": version, **_client_values(payload)})
+        for symbol in dict.fromkeys(_normalize_list(payload.tickers)):
+            ticker_links.append({"client_id": client_id, "ticker_id": ticker_ids[symbol]})
+        for code in dict.fromkeys(_normalize_list(payload.currencies)):
+            currency_links.append({"client_id": client_id, "currency_id": currency_ids[code]})
+
+    with session.begin_nested():
+        session.execute(insert(Client), client_rows)
+        if ticker_links:
+            session.execute(insert(ClientTicker), ticker_links)
+        if currency_links:
+            session.execute(insert(ClientCurrency), currency_links)
+    return [str(row["id"]) for row in client_rows]
+
+
+def _import_clients(session, payloads: List[Tuple[int, ClientCreate]]) -> Tuple[List[str], List[BulkRowError]]:
+    ids: List[str] = []
+    errors: List[BulkRowError] = []
+    if not payloads:
+        return ids, errors
+
+    ticker_ids = resolve_ticker_ids(
+        session, [s for _, p in payloads for s in _normalize_list(p.tickers)]
+    )
+    currency_ids = resolve_currency_ids(
+        session, [c for _, p in payloads for c in _normalize_list(p.currencies)]
+    )
+    # Tags are resolved first: they may wait on other writers' inserts, which
+    # must not happen while this transaction holds the data_version lock.
+    version = data_version.bump(session)
+
+    for start in range(0, len(payloads), BULK_CHUNK_SIZE):
+        chunk = payloads[start:start + BULK_CHUNK_SIZE]
+        try:
+            ids.extend(_insert_client_chunk(session, chunk, ticker_ids, currency_ids, version))
+        except (SQLAlchemyError, ValueError):
+            # Retry row by row so one bad row doesn't sink its whole chunk.
+            for index, payload in chunk:
+                try:
+                    ids.extend(
+                        _insert_client_chunk(session, [(index, payload)], ticker_ids, currency_ids, version)
+                    )
+                except (SQLAlchemyError, ValueError) as exc:
+                    errors.append(BulkRowError(index=index, error=str(getattr(exc, "orig", None) or exc)))
+
+    if not ids:
+        # Nothing was imported, so take the version bump (and its NOTIFY)
+        # back with the rest rather than invalidate every cache for nothing.
+        session.rollback()
+        return ids, errors
+    session.commit()
+    data_version.observe(version)
+    fallback_index.reset()
+    return ids, errors
+
+
+@app.post("/clients/bulk", response_model=BulkImportResponse)
+async def bulk_create_clients(request: Request):
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip()
+    rows, errors = _parse_bulk_rows(content_type, await request.body())
+
+    payloads: List[Tuple[int, ClientCreate]] = []
+    for index, row in rows:
+        try:
+            payloads.append((index, ClientCreate.model_validate(row)))
+        except ValidationError as exc:
+            errors.append(BulkRowError(index=index, error=_format_validation_error(exc)))
+
+    ids, insert_errors = await run_db(_import_clients, payloads)
+    errors.extend(insert_errors)
+
+    return BulkImportResponse(
+        created=len(ids),
+        ids=ids,
+        errors=sorted(errors, key=lambda error: error.index),
+    )
+
+
+def _create_client(session, payload: ClientCreate) -> bytes:
+    client = Client(**_client_values(payload))
+    session.add(client)
+
+    if payload.tickers is not None:
+        client.tickers = get_or_create_tickers(session, _normalize_list(payload.tickers))
+
+    if payload.currencies is not None:
+        client.currencies = get_or_create_currencies(session, _normalize_list(payload.currencies))
+
+    client.row_version = data_version.bump(session)
+    session.commit()
+    data_version.observe(client.row_version)
+    session.refresh(client)
+    index_client(client)
+
+    return dumps(client_dict(client))
 
-        if ticker:
-            tickers = _normalize_list(ticker)
-            if tickers:
-                query = (
-                    query.join(Client.tickers)
-                    .filter(Ticker.symbol.in_(tickers))
-                    .group_by(Client.id)
-                    .having(func.count(func.distinct(Ticker.id)) >= len(tickers))
-                )
-        if currency:
-            currencies = _normalize_list(currency)
-            if currencies:
-                query = (
-                    query.join(Client.currencies)
-                    .filter(Currency.code.in_(currencies))
-                    .group_by(Client.id)
-                    .having(func.count(func.distinct(Currency.id)) >= len(currencies))
-                )
-        if q:
-            q_like = f"%{q}%"
-            query = query.filter(Client.client_name.ilike(q_like))
-
-        clients = query.distinct().all()
-
-        items = []
-        for client in clients:
-            items.append(
-                ClientOut(
-                    id=str(client.id),
-                    client_name=client.client_name,
-                    tickers=sorted([t.symbol for t in client.tickers]),
-                    currencies=sorted([c.code for c in client.currencies]),
-                    tenors_min=client.tenors_min,
-                    tenors_max=client.tenors_max,
-                    tenors_sweetspot=client.tenors_sweetspot,
-                    frn_buyer=client.frn_buyer,
-                    callable_buyer=client.callable_buyer,
-                    private_placement_buyer=client.private_placement_buyer,
-                    esg_green=client.esg_green,
-                    esg_social=client.esg_social,
-                    esg_sustainable=client.esg_sustainable,
-                    target_spread_ois=client.target_spread_ois,
-                    target_g_spread=client.target_g_spread,
-                    toms_code=client.toms_code,
-                    client_notes=client.client_notes,
-                    region=client.region,
-                )
-            )
-        return ClientListResponse(items=items)
 
 @app.post("/clients", response_model=ClientOut, status_code=201)
-def create_client(payload: ClientCreate):
-    with get_db_session() as session:
-        client = Client(
-            client_name=payload.client_name,
-            tenors_min=payload.tenors_min,
-            tenors_max=payload.tenors_max,
-            tenors_sweetspot=payload.tenors_sweetspot,
-            frn_buyer=payload.frn_buyer or False,
-            callable_buyer=payload.callable_buyer or False,
-            private_placement_buyer=payload.private_placement_buyer,
-            esg_green=payload.esg_green or False,
-            esg_social=payload.esg_social or False,
-            esg_sustainable=payload.esg_sustainable or False,
-            target_spread_ois=payload.target_spread_ois,
-            target_g_spread=payload.target_g_spread,
-            toms_code=payload.toms_code,
-            client_notes=payload.client_notes,
-            region=payload.region,
-        )
+async def create_client(payload: ClientCreate):
+    body = await run_db(_create_client, payload)
+    return Response(content=body, status_code=201, media_type="application/json")
+
+
+def _apply_update(client: Client, payload: ClientUpdate, tickers: dict, currencies: dict) -> list:
+    """Apply ``payload`` to ``client``; returns (field, old, new) for each change.
+
+    ``tickers`` / ``currencies`` map every normalized symbol/code in the
+    payload to its tag row.
+    """
+    changed_fields = []
+
+    # Scalar fields
+    for field_name, new_value in payload.model_dump(exclude_none=True).items():
+        if field_name in {"tickers", "currencies"}:
+            continue
+        old_value = getattr(client, field_name)
+        if new_value != old_value:
+            setattr(client, field_name, new_value)
+            changed_fields.append((field_name, old_value, new_value))
+    if any(field_name in SOURCE_FIELDS for field_name, _, _ in changed_fields):
+        apply_numeric_values(client)
+
+    # Tickers
+    if payload.tickers is not None:
+        new_tickers = _normalize_list(payload.tickers)
+        old_tickers = [t.symbol for t in client.tickers]
+        if sorted(new_tickers) != sorted(old_tickers):
+            client.tickers = [tickers[symbol] for symbol in new_tickers]
+            changed_fields.append(("tickers", ", ".join(old_tickers), ", ".join(new_tickers)))
+
+    # Currencies
+    if payload.currencies is not None:
+        new_currencies = _normalize_list(payload.currencies)
+        old_currencies = [c.code for c in client.currencies]
+        if sorted(new_currencies) != sorted(old_currencies):
+            client.currencies = [currencies[code] for code in new_currencies]
+            changed_fields.append(
+                ("currencies", ", ".join(old_currencies), ", ".join(new_currencies))
+            )
+
+    return changed_fields
+
+
+def _audit_rows(client_id, changed_fields) -> List[dict]:
+    return [
+        {
+            "id": uuid.uuid4(),
+            "client_id": client_id,
+            "user_id": None,
+            "field_name": field_name,
+            "old_value": None if old_value is None else str(old_value),
+            "new_value": None if new_value is None else str(new_value),
+        }
+        for field_name, old_value, new_value in changed_fields
+    ]
+
+
+def _update_client(session, client_id: uuid.UUID, payload: ClientUpdate) -> bytes:
+    client = (
+        session.query(Client)
+        .options(joinedload(Client.tickers), joinedload(Client.currencies))
+        .filter(Client.id == client_id)
+        .first()
+    )
+    if not client:
+        raise HTTPException(status_code=404, detail="Client not found")
+
+    changed_fields = _apply_update(
+        client,
+        payload,
+        get_or_create_ticker_map(session, _normalize_list(payload.tickers)),
+        get_or_create_currency_map(session, _normalize_list(payload.currencies)),
+    )
+    audit_rows = _audit_rows(client.id, changed_fields)
+    if changed_fields:
+        audit_writer.write(session, audit_rows)
+        client.row_version = data_version.bump(session)
+    session.commit()
+    if changed_fields:
+        data_version.observe(client.row_version)
+    session.refresh(client)
+    index_client(client)
+
+    return dumps(client_dict(client))
 
-        if payload.tickers is not None:
-            symbols = _normalize_list(payload.tickers)
-            ticker_models = []
-            for symbol in symbols:
-                existing = session.query(Ticker).filter(Ticker.symbol == symbol).first()
-                if not existing:
-                    existing = Ticker(symbol=symbol)
-                    session.add(existing)
-                ticker_models.append(existing)
-            client.tickers = ticker_models
-
-        if payload.currencies is not None:
-            codes = _normalize_list(payload.currencies)
-            currency_models = []
-            for code in codes:
-                existing = session.query(Currency).filter(Currency.code == code).first()
-                if not existing:
-                    existing = Currency(code=code)
-                    session.add(existing)
-                currency_models.append(existing)
-            client.currencies = currency_models
-
-        session.add(client)
-        session.commit()
-        session.refresh(client)
-
-        return ClientOut(
-            id=str(client.id),
-            client_name=client.client_name,
-            tickers=sorted([t.symbol for t in client.tickers]),
-            currencies=sorted([c.code for c in client.currencies]),
-            tenors_min=client.tenors_min,
-            tenors_max=client.tenors_max,
-            tenors_sweetspot=client.tenors_sweetspot,
-            frn_buyer=client.frn_buyer,
-            callable_buyer=client.callable_buyer,
-            private_placement_buyer=client.private_placement_buyer,
-            esg_green=client.esg_green,
-            esg_social=client.esg_social,
-            esg_sustainable=client.esg_sustainable,
-            target_spread_ois=client.target_spread_ois,
-            target_g_spread=client.target_g_spread,
-            toms_code=client.toms_code,
-            client_notes=client.client_notes,
-            region=client.region,
-        )
 
 @app.patch("/clients/{client_id}", response_model=ClientOut)
-def update_client(client_id: str, payload: ClientUpdate):
-    with get_db_session() as session:
-        client = (
-            session.query(Client)
-            .options(joinedload(Client.tickers), joinedload(Client.currencies))
-            .filter(Client.id == client_id)
-            .first()
+async def update_client(client_id: str, payload: ClientUpdate):
+    return Response(
+        content=await run_db(_update_client, _parse_client_id(client_id), payload), media_type="application/json"
+    )
+
+
+def _delete_client(session, client_id: uuid.UUID) -> None:
+    client = session.query(Client).filter(Client.id == client_id).first()
+    if not client:
+        raise HTTPException(status_code=404, detail="Client not found")
+    session.delete(client)
+    version = data_version.bump(session)
+    session.add(ClientTombstone(client_id=client.id, version=version))
+    session.commit()
+    data_version.observe(version)
+    unindex_client(client.id)
+
+
+def _bulk_update_clients(session, patches: List[ClientPatch]) -> BulkUpdateResponse:
+    results: List[BulkUpdateItem] = []
+    targets = {}
+    for patch in patches:
+        try:
+            client_id = uuid.UUID(patch.id)
+        except ValueError:
+            results.append(BulkUpdateItem(id=patch.id, status="invalid", error="Invalid id"))
+            continue
+        if client_id in targets:
+            results.append(BulkUpdateItem(id=patch.id, status="invalid", error="Duplicate id"))
+            continue
+        targets[client_id] = patch.changes
+        results.append(BulkUpdateItem(id=patch.id, status="not_found"))
+
+    # Resolve tags before locking anything: a tag insert may wait on
+    # another writer, which may in turn be waiting on one of our rows.
+    tickers = get_or_create_ticker_map(
+        session, [s for changes in targets.values() for s in _normalize_list(changes.tickers)]
+    )
+    currencies = get_or_create_currency_map(
+        session, [c for changes in targets.values() for c in _normalize_list(changes.currencies)]
+    )
+
+    # Lock rows in id order so concurrent bulk updates can't deadlock.
+    clients = {}
+    ids = sorted(targets)
+    for start in range(0, len(ids), BULK_CHUNK_SIZE):
+        chunk = session.scalars(
+            select(Client)
+            .options(selectinload(Client.tickers), selectinload(Client.currencies))
+            .where(Client.id.in_(ids[start:start + BULK_CHUNK_SIZE]))
+            .order_by(Client.id)
+            .with_for_update(of=Client)
         )
-        if not client:
-            raise HTTPException(status_code=404, detail="Client not found")
+        clients.update((client.id, client) for client in chunk)
 
-        changed_fields = []
-
-        # Scalar fields
-        for field_name, new_value in payload.model_dump(exclude_none=True).items():
-            if field_name in {"tickers", "currencies"}:
-                continue
-            old_value = getattr(client, field_name)
-            if new_value != old_value:
-                setattr(client, field_name, new_value)
-                changed_fields.append((field_name, old_value, new_value))
-
-        # Tickers
-        if payload.tickers is not None:
-            new_tickers = _normalize_list(payload.tickers)
-            old_tickers = [t.symbol for t in client.tickers]
-            if sorted(new_tickers) != sorted(old_tickers):
-                ticker_models = []
-                for symbol in new_tickers:
-                    existing = session.query(Ticker).filter(Ticker.symbol == symbol).first()
-                    if not existing:
-                        existing = Ticker(symbol=symbol)
-                        session.add(existing)
-                    ticker_models.append(existing)
-                client.tickers = ticker_models
-                changed_fields.append(("tickers", ", ".join(old_tickers), ", ".join(new_tickers)))
-
-        # Currencies
-        if payload.currencies is not None:
-            new_currencies = _normalize_list(payload.currencies)
-            old_currencies = [c.code for c in client.currencies]
-            if sorted(new_currencies) != sorted(old_currencies):
-                currency_models = []
-                for code in new_currencies:
-                    existing = session.query(Currency).filter(Currency.code == code).first()
-                    if not existing:
-                        existing = Currency(code=code)
-                        session.add(existing)
-                    currency_models.append(existing)
-                client.currencies = currency_models
-                changed_fields.append(
-                    ("currencies", ", ".join(old_currencies), ", ".join(new_currencies))
-                )
-
-        for field_name, old_value, new_value in changed_fields:
-            session.add(
-                AuditLog(
-                    client_id=client.id,
-                    user_id=None,
-                    field_name=field_name,
-                    old_value=None if old_value is None else str(old_value),
-                    new_value=None if new_value is None else str(new_value),
-                )
-            )
+    audit_rows = []
+    changed_ids = []
+    for result in results:
+        if result.status != "not_found":
+            continue
+        client = clients.get(uuid.UUID(result.id))
+        if client is None:
+            continue
+        changed_fields = _apply_update(client, targets[client.id], tickers, currencies)
+        result.status = "updated" if changed_fields else "unchanged"
+        result.changed = [field_name for field_name, _, _ in changed_fields]
+        if changed_fields:
+            audit_rows.extend(_audit_rows(client.id, changed_fields))
+            changed_ids.append(client.id)
 
-        session.commit()
-        session.refresh(client)
-
-        return ClientOut(
-            id=str(client.id),
-            client_name=client.client_name,
-            tickers=[t.symbol for t in client.tickers],
-            currencies=[c.code for c in client.currencies],
-            tenors_min=client.tenors_min,
-            tenors_max=client.tenors_max,
-            tenors_sweetspot=client.tenors_sweetspot,
-            frn_buyer=client.frn_buyer,
-            callable_buyer=client.callable_buyer,
-            private_placement_buyer=client.private_placement_buyer,
-            esg_green=client.esg_green,
-            esg_social=client.esg_social,
-            esg_sustainable=client.esg_sustainable,
-            target_spread_ois=client.target_spread_ois,
-            target_g_spread=client.target_g_spread,
-            toms_code=client.toms_code,
-            client_notes=client.client_notes,
-            region=client.region,
+    if changed_ids:
+        session.flush()
+        audit_writer.write(session, audit_rows)
+        version = data_version.bump(session)
+        session.execute(
+            update(Client)
+            .where(Client.id.in_(changed_ids))
+            .values(row_version=version)
+            .execution_options(synchronize_session=False)
         )
+    session.commit()
+    if changed_ids:
+        data_version.observe(version)
+        for client_id in changed_ids:
+            index_client(clients[client_id])
+
+    return BulkUpdateResponse(updated=len(changed_ids), items=results)
+
+
+@app.patch("/clients", response_model=BulkUpdateResponse)
+async def bulk_update_clients(patches: List[ClientPatch]):
+    return await run_db(_bulk_update_clients, patches)
 
 
 @app.delete("/clients/{client_id}", status_code=204)
-def delete_client(client_id: str):
-    with get_db_session() as session:
-        client = session.query(Client).filter(Client.id == client_id).first()
-        if not client:
-            raise HTTPException(status_code=404, detail="Client not found")
-        session.delete(client)
-        session.commit()
+async def delete_client(client_id: str):
+    await run_db(_delete_client, _parse_client_id(client_id))
     return Response(status_code=204)
 
+
+def _decode_audit_cursor(cursor: str) -> tuple:
+    try:
+        changed_at, audit_id = _cursor_values(cursor)
+        return datetime.fromisoformat(changed_at), uuid.UUID(audit_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _audit_fields(value: Optional[str]) -> Tuple[str, ...]:
+    if not value:
+        return ()
+    return tuple(sorted({name.strip() for name in value.split(",") if name.strip()}))
+
+
+def _audit_page_body(session, filters: AuditFilter, after: Optional[tuple], limit: int) -> bytes:
+    stmt = select(
+        AuditLog.id,
+        AuditLog.client_id,
+        AuditLog.user_id,
+        AuditLog.field_name,
+        AuditLog.old_value,
+        AuditLog.new_value,
+        AuditLog.changed_at,
+    )
+    for clause in filters.clauses():
+        stmt = stmt.where(clause)
+    if after is not None:
+        stmt = stmt.where(tuple_(AuditLog.changed_at, AuditLog.id) < tuple_(*after))
+    rows = session.execute(
+        stmt.order_by(AuditLog.changed_at.desc(), AuditLog.id.desc()).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor([rows[-1].changed_at.isoformat(), rows[-1].id])
+
+    return dumps(
+        {
+            "items": [
+                {
+                    "id": str(row.id),
+                    "client_id": str(row.client_id),
+                    "user_id": str(row.user_id) if row.user_id else None,
+                    "field_name": row.field_name,
+                    "old_value": row.old_value,
+                    "new_value": row.new_value,
+                    "changed_at": row.changed_at.isoformat(),
+                }
+                for row in rows
+            ],
+            "next_cursor": next_cursor,
+        }
+    )
+
+
+async def _audit_response(
+    request: Request,
+    filters: AuditFilter,
+    limit: int,
+    cursor: Optional[str],
+) -> Response:
+    after = _decode_audit_cursor(cursor) if cursor else None
+    return await _conditional_json(
+        request,
+        ("audit", filters, limit, cursor),
+        _audit_page_body,
+        filters,
+        after,
+        limit,
+        versions=AUDIT_VERSIONS,
+    )
+
+
+def _parse_client_id(client_id: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(client_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid client id")
+
+
 @app.get("/clients/{client_id}/audit", response_model=AuditListResponse)
-def client_audit(client_id: str):
-    with get_db_session() as session:
-        items = (
-            session.query(AuditLog)
-            .filter(AuditLog.client_id == client_id)
-            .order_by(AuditLog.changed_at.desc())
-            .all()
-        )
-        return AuditListResponse(
-            items=[
-                AuditItem(
-                    id=str(item.id),
-                    client_id=str(item.client_id),
-                    user_id=str(item.user_id) if item.user_id else None,
-                    field_name=item.field_name,
-                    old_value=item.old_value,
-                    new_value=item.new_value,
-                    changed_at=item.changed_at.isoformat(),
-                )
-                for item in items
-            ]
-        )
+async def client_audit(
+    client_id: str,
+    request: Request,
+    since: Optional[datetime] = Query(None, description="Changes at or after this time"),
+    until: Optional[datetime] = Query(None, description="Changes before this time"),
+    field_name: Optional[str] = Query(None, description="Only these field(s), comma-separated"),
+    limit: int = Query(AUDIT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous next_cursor"),
+):
+    filters = AuditFilter(
+        client_id=_parse_client_id(client_id),
+        since=since,
+        until=until,
+        field_names=_audit_fields(field_name),
+    )
+    return await _audit_response(request, filters, limit, cursor)
+
+
+@app.get("/audit", response_model=AuditListResponse)
+async def audit_feed(
+    request: Request,
+    client_id: Optional[str] = Query(None, description="Only this client"),
+    since: Optional[datetime] = Query(None, description="Changes at or after this time"),
+    until: Optional[datetime] = Query(None, description="Changes before this time"),
+    field_name: Optional[str] = Query(None, description="Only these field(s), comma-separated"),
+    limit: int = Query(AUDIT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous next_cursor"),
+):
+    """Audit entries across all clients, newest first."""
+    filters = AuditFilter(
+        client_id=_parse_client_id(client_id) if client_id else None,
+        since=since,
+        until=until,
+        field_names=_audit_fields(field_name),
+    )
+    return await _audit_response(request, filters, limit, cursor)
+
+
+def _match(session, request: MatchRequest) -> bytes:
+    issue = Issue(
+        ticker=request.ticker.strip().upper() if request.ticker else None,
+        currency=request.currency.strip().upper() if request.currency else None,
+        tenor_months=_parsed_param("tenor", request.tenor, parse_tenor),
+        frn=request.frn,
+        callable=request.callable,
+        private_placement=request.private_placement,
+        esg=request.esg,
+        spread_bp=_parsed_param("spread", request.spread, parse_spread),
+        spread_benchmark=spread_benchmark(request.spread),
+    )
+    client_snapshot.refresh(session)
+    with client_snapshot.lock:
+        version = client_snapshot.version
+        items = client_snapshot.top(issue, request.limit)
+    return dumps({"version": version, "items": items})
+
+
+@app.post("/match", response_model=MatchResponse)
+async def match_clients(request: MatchRequest):
+    """Clients most likely to want a new issue, best first."""
+    return Response(content=await run_db(_match, request), media_type="application/json")
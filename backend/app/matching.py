@@ -0,0 +1,286 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from .models import Client, ClientTombstone
+from .readmodel import CURRENCIES, TICKERS, tag_map, text_id
+from .versioning import data_version
+
+# Relative weight of each score component. Components the issue says
+# nothing about are left out, and the total is divided by the weights that
+# were used, so scores stay within 0..1.
+WEIGHTS = {
+    "ticker": 3.0,
+    "currency": 2.0,
+    "tenor": 2.0,
+    "sweetspot": 1.0,
+    "structure": 1.0,
+    "esg": 1.0,
+    "spread": 2.0,
+}
+# Distance at which a partial match has fallen to zero.
+TENOR_FALLOFF_MONTHS = 24
+SWEETSPOT_FALLOFF_MONTHS = 36
+SPREAD_FALLOFF_BP = 50
+PRIVATE_PLACEMENT_SCORES = {"YES": 1.0, "MAYBE": 0.5}
+ESG_LABELS = {"green": "esg_green", "social": "esg_social", "sustainable": "esg_sustainable"}
+
+NUMERIC_COLUMNS = (
+    "tenors_min_months",
+    "tenors_max_months",
+    "tenors_sweetspot_months",
+    "target_spread_ois_bp",
+    "target_g_spread_bp",
+)
+FLAG_COLUMNS = ("frn_buyer", "callable_buyer", "esg_green", "esg_social", "esg_sustainable")
+# Ids as text, like app.readmodel.RECORD_COLUMNS.
+SNAPSHOT_COLUMNS = (
+    (text_id(Client.id), Client.client_name, Client.private_placement_buyer)
+    + tuple(getattr(Client, name) for name in NUMERIC_COLUMNS)
+    + tuple(getattr(Client, name) for name in FLAG_COLUMNS)
+)
+# Deleted rows are only masked out; rebuild once they are this share of all rows.
+COMPACT_RATIO = 0.25
+INITIAL_CAPACITY = 1024
+
+
+@dataclass(frozen=True)
+class Issue:
+    """A new issue in the snapshot's units: months, basis points, flags."""
+
+    ticker: Optional[str] = None
+    currency: Optional[str] = None
+    tenor_months: Optional[int] = None
+    frn: bool = False
+    callable: bool = False
+    private_placement: bool = False
+    esg: Optional[str] = None
+    spread_bp: Optional[int] = None
+    spread_benchmark: str = "ois"
+
+
+class ClientSnapshot:
+    """Columnar copy of the fields the matcher scores, one row per client.
+
+    Numbers live in float32 arrays (NaN where the text did not parse) and
+    flags in bool arrays, indexed by row; tags are kept as posting lists
+    from value to rows. ``refresh`` brings it up to the current data
+    version by reading only the clients and tombstones written since the
+    last refresh, so writes from every worker are picked up.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.version: Optional[int] = None
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.dead = 0
+        self._numbers = np.full((len(NUMERIC_COLUMNS), 0), np.nan, dtype=np.float32)
+        self._flags = np.zeros((len(FLAG_COLUMNS), 0), dtype=bool)
+        self._private_placement = np.zeros(0, dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._tags: List[Tuple[Tuple[str, ...], Tuple[str, ...]]] = []
+        self._tickers: Dict[str, Set[int]] = {}
+        self._currencies: Dict[str, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def refresh(self, session) -> int:
+        """Bring the snapshot up to the current data version and return it.
+
+        The queries run without ``lock``: under DB_ASYNC the session runs on
+        the event loop and yields while it waits on the database, so a
+        thread lock held across a query would block the loop for every
+        other request. Only applying what was read takes the lock, and a
+        result older than one another request already applied is dropped.
+        """
+        current = self.version
+        if current is not None and data_version.cached() == current:
+            return current
+        # Read the version before the rows: anything committed after it is
+        # picked up again next time, and applying a row twice is harmless.
+        version = data_version.load(session)
+        rebuild = current is None or self.dead > COMPACT_RATIO * max(len(self.ids), 1)
+        if not rebuild and version == current:
+            return current
+        changes = self._fetch(session, None if rebuild else current)
+        with self.lock:
+            if self.version is None or version > self.version or (rebuild and version == self.version):
+                self._apply(changes)
+                self.version = version
+            return self.version
+
+    def _fetch(self, session, since: Optional[int]) -> tuple:
+        """Rows, tags and deleted ids written after ``since``; everything if None."""
+        stmt = select(*SNAPSHOT_COLUMNS)
+        if since is None:
+            rows = session.execute(stmt).all()
+            return since, rows, tag_map(session, TICKERS), tag_map(session, CURRENCIES), []
+        rows = session.execute(stmt.where(Client.row_version > since)).all()
+        ids = [row[0] for row in rows]
+        deleted = session.scalars(
+            select(text_id(ClientTombstone.client_id)).where(ClientTombstone.version > since)
+        ).all()
+        return since, rows, tag_map(session, TICKERS, ids), tag_map(session, CURRENCIES, ids), deleted
+
+    def _apply(self, changes: tuple) -> None:
+        since, rows, tickers, currencies, deleted = changes
+        if since is None:
+            self._rebuild(rows, tickers, currencies)
+            return
+        for row in rows:
+            self._put(row, tickers.get(row[0], ()), currencies.get(row[0], ()))
+        for client_id in deleted:
+            self._remove(client_id)
+
+    def _rebuild(self, rows, tickers, currencies) -> None:
+        self._reset()
+        if not rows:
+            return
+        # Whole columns at once; numpy turns None into NaN / False.
+        columns = list(zip(*rows))
+        self.ids = list(columns[0])
+        self.names = list(columns[1])
+        self.rows = {client_id: index for index, client_id in enumerate(self.ids)}
+        flags_start = 3 + len(NUMERIC_COLUMNS)
+        self._numbers = np.array(columns[3:flags_start], dtype=np.float32)
+        self._flags = np.array(columns[flags_start:], dtype=bool)
+        self._private_placement = np.array(
+            [PRIVATE_PLACEMENT_SCORES.get((value or "").upper(), 0.0) for value in columns[2]], dtype=np.float32
+        )
+        self._alive = np.ones(len(rows), dtype=bool)
+        for index, client_id in enumerate(self.ids):
+            self._tags.append(((), ()))
+            self._set_tags(index, tuple(tickers.get(client_id, ())), tuple(currencies.get(client_id, ())))
+
+    def _put(self, row, tickers: Sequence[str], currencies: Sequence[str]) -> None:
+        client_id = row[0]
+        index = self.rows.get(client_id)
+        if index is None:
+            index = len(self.ids)
+            self._grow(index + 1)
+            self.rows[client_id] = index
+            self.ids.append(client_id)
+            self.names.append(row.client_name)
+            self._tags.append(((), ()))
+        else:
+            self.names[index] = row.client_name
+        self._numbers[:, index] = [np.nan if row[3 + i] is None else row[3 + i] for i in range(len(NUMERIC_COLUMNS))]
+        self._flags[:, index] = [bool(row[3 + len(NUMERIC_COLUMNS) + i]) for i in range(len(FLAG_COLUMNS))]
+        self._private_placement[index] = PRIVATE_PLACEMENT_SCORES.get((row.private_placement_buyer or "").upper(), 0.0)
+        self._alive[index] = True
+        self._set_tags(index, tuple(tickers), tuple(currencies))
+
+    def _remove(self, client_id: str) -> None:
+        index = self.rows.pop(client_id, None)
+        if index is None:
+            return
+        self._set_tags(index, (), ())
+        self._alive[index] = False
+        self.dead += 1
+
+    def _set_tags(self, index: int, tickers: Tuple[str, ...], currencies: Tuple[str, ...]) -> None:
+        old_tickers, old_currencies = self._tags[index]
+        for postings, old, new in ((self._tickers, old_tickers, tickers), (self._currencies, old_currencies, currencies)):
+            for value in set(old) - set(new):
+                postings[value].discard(index)
+            for value in set(new) - set(old):
+                postings.setdefault(value, set()).add(index)
+        self._tags[index] = (tickers, currencies)
+
+    def _grow(self, size: int) -> None:
+        capacity = self._alive.shape[0]
+        if size <= capacity:
+            return
+        capacity = max(INITIAL_CAPACITY, capacity * 2, size)
+        numbers = np.full((len(NUMERIC_COLUMNS), capacity), np.nan, dtype=np.float32)
+        numbers[:, :self._numbers.shape[1]] = self._numbers
+        flags = np.zeros((len(FLAG_COLUMNS), capacity), dtype=bool)
+        flags[:, :self._flags.shape[1]] = self._flags
+        self._numbers = numbers
+        self._flags = flags
+        extra = capacity - self._alive.shape[0]
+        self._private_placement = np.concatenate([self._private_placement, np.zeros(extra, dtype=np.float32)])
+        self._alive = np.concatenate([self._alive, np.zeros(extra, dtype=bool)])
+
+    def _number(self, name: str) -> np.ndarray:
+        return self._numbers[NUMERIC_COLUMNS.index(name), :len(self.ids)]
+
+    def _flag(self, name: str) -> np.ndarray:
+        return self._flags[FLAG_COLUMNS.index(name), :len(self.ids)]
+
+    def _has_tag(self, postings: Dict[str, Set[int]], value: str) -> np.ndarray:
+        result = np.zeros(len(self.ids), dtype=np.float32)
+        rows = postings.get(value)
+        if rows:
+            result[np.fromiter(rows, dtype=np.int64, count=len(rows))] = 1.0
+        return result
+
+    def components(self, issue: Issue) -> Dict[str, np.ndarray]:
+        """Per-client score in 0..1 for each component the issue specifies."""
+        result = {}
+        if issue.ticker:
+            result["ticker"] = self._has_tag(self._tickers, issue.ticker)
+        if issue.currency:
+            result["currency"] = self._has_tag(self._currencies, issue.currency)
+        if issue.tenor_months is not None:
+            tenor = np.float32(issue.tenor_months)
+            low = self._number("tenors_min_months")
+            high = self._number("tenors_max_months")
+            # Open-ended on a missing bound; months outside the range count against.
+            outside = np.fmax(np.fmax(low - tenor, tenor - high), 0)
+            outside = np.where(np.isnan(low) & np.isnan(high), np.inf, np.nan_to_num(outside))
+            result["tenor"] = np.clip(1 - outside / TENOR_FALLOFF_MONTHS, 0, 1)
+            sweetspot = self._number("tenors_sweetspot_months")
+            distance = np.nan_to_num(np.abs(sweetspot - tenor), nan=np.inf)
+            result["sweetspot"] = np.clip(1 - distance / SWEETSPOT_FALLOFF_MONTHS, 0, 1)
+        required = []
+        if issue.frn:
+            required.append(self._flag("frn_buyer").astype(np.float32))
+        if issue.callable:
+            required.append(self._flag("callable_buyer").astype(np.float32))
+        if issue.private_placement:
+            required.append(self._private_placement[:len(self.ids)])
+        if required:
+            result["structure"] = np.mean(required, axis=0)
+        if issue.esg:
+            result["esg"] = self._flag(ESG_LABELS[issue.esg]).astype(np.float32)
+        if issue.spread_bp is not None:
+            column = "target_g_spread_bp" if issue.spread_benchmark == "g" else "target_spread_ois_bp"
+            # Paying at or above the client's target scores 1.
+            shortfall = np.nan_to_num(self._number(column) - np.float32(issue.spread_bp), nan=np.inf)
+            result["spread"] = np.clip(1 - shortfall / SPREAD_FALLOFF_BP, 0, 1)
+        return result
+
+    def top(self, issue: Issue, limit: int) -> List[dict]:
+        """The ``limit`` best-scoring live clients, best first; scores > 0 only."""
+        components = self.components(issue)
+        if not components or not self.rows:
+            return []
+        weight = sum(WEIGHTS[name] for name in components)
+        total = sum(WEIGHTS[name] * values for name, values in components.items()) / weight
+        total = np.where(self._alive[:len(self.ids)], total, -np.inf)
+        limit = min(limit, len(self.rows))
+        best = np.argpartition(-total, limit - 1)[:limit]
+        best = best[np.argsort(-total[best], kind="stable")]
+        return [
+            {
+                "id": self.ids[index],
+                "client_name": self.names[index],
+                "score": round(float(total[index]), 4),
+                "components": {name: round(float(values[index]), 4) for name, values in components.items()},
+            }
+            for index in best
+            if total[index] > 0
+        ]
+
+
+client_snapshot = ClientSnapshot()
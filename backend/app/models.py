@@ -1,9 +1,11 @@
 import uuid
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     DateTime,
     ForeignKey,
+    Integer,
     Text,
     func,
 )
@@ -34,6 +36,13 @@ class Client(Base):
     region = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    row_version = Column(BigInteger, nullable=False, server_default="0")
+    # Parsed from the text fields above by app.terms; see schema.sql.
+    tenors_min_months = Column(Integer)
+    tenors_max_months = Column(Integer)
+    tenors_sweetspot_months = Column(Integer)
+    target_spread_ois_bp = Column(Integer)
+    target_g_spread_bp = Column(Integer)
 
     tickers = relationship("Ticker", secondary="client_tickers", back_populates="clients")
     currencies = relationship("Currency", secondary="client_currencies", back_populates="clients")
@@ -81,3 +90,18 @@ class AuditLog(Base):
     old_value = Column(Text)
     new_value = Column(Text)
     changed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ClientTombstone(Base):
+    __tablename__ = "client_tombstones"
+
+    client_id = Column(UUID(as_uuid=True), primary_key=True)
+    version = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class DataVersion(Base):
+    __tablename__ = "data_version"
+
+    id = Column(Integer, primary_key=True, default=1)
+    version = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,137 @@
+import threading
+import time
+import uuid
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from .config import env_bool, env_int, env_str
+from .metrics import Histogram
+
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolMetrics:
+    """Counters for one engine's pool.
+
+    ``checkout_ms`` covers everything between asking the pool for a
+    connection and getting one back: waiting for a free slot, opening a new
+    connection and the pre-ping round trip if enabled.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """Start from zero, e.g. in a forked worker with a fresh pool."""
+        self.checked_out = 0
+        self.checkouts = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.checkout_ms = Histogram(WAIT_BUCKETS_MS)
+        self._lock = threading.Lock()
+
+    def record_connect(self, elapsed_ms: float, overflowed: bool, timed_out: bool) -> None:
+        self.checkout_ms.observe(elapsed_ms)
+        with self._lock:
+            self.overflow_events += int(overflowed)
+            self.timeouts += int(timed_out)
+
+    def on_checkout(self, dbapi_connection, record, proxy) -> None:
+        with self._lock:
+            self.checked_out += 1
+            self.checkouts += 1
+
+    def on_checkin(self, dbapi_connection, record) -> None:
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            stats = {
+                "pool_class": type(pool).base_name,
+                "checked_out": self.checked_out,
+                "checkouts": self.checkouts,
+                "overflow_events": self.overflow_events,
+                "timeouts": self.timeouts,
+            }
+        if isinstance(pool, QueuePool):
+            stats.update(size=pool.size(), idle=pool.checkedin(), overflow=max(pool.overflow(), 0))
+        stats["checkout_ms"] = self.checkout_ms.snapshot()
+        return stats
+
+
+class _InstrumentedPool:
+    metrics: PoolMetrics
+    base_name: str
+
+    def connect(self):
+        overflow_before = self._current_overflow()
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            overflow_after = self._current_overflow()
+            self.metrics.record_connect(
+                (time.perf_counter() - started) * 1000,
+                overflowed=overflow_after > 0 and overflow_after > overflow_before,
+                timed_out=timed_out,
+            )
+
+    def _current_overflow(self) -> int:
+        return self.overflow() if isinstance(self, QueuePool) else 0
+
+
+def _instrumented(base, metrics: PoolMetrics):
+    attrs = {"metrics": metrics, "base_name": base.__name__}
+    return type(f"Instrumented{base.__name__}", (_InstrumentedPool, base), attrs)
+
+
+def pool_options(metrics: PoolMetrics, *, asyncio: bool = False) -> dict:
+    """create_engine keyword arguments for the DB_POOL_* / DB_PGBOUNCER settings."""
+    pgbouncer = env_bool("DB_PGBOUNCER")
+    pool_class = (env_str("DB_POOL_CLASS") or ("null" if pgbouncer else "queue")).lower()
+    options = {
+        "pool_pre_ping": env_bool("DB_POOL_PRE_PING", True),
+        "pool_recycle": env_int("DB_POOL_RECYCLE", -1),
+    }
+    if pool_class == "null":
+        options["poolclass"] = _instrumented(NullPool, metrics)
+    elif pool_class == "queue":
+        base = AsyncAdaptedQueuePool if asyncio else QueuePool
+        options.update(
+            poolclass=_instrumented(base, metrics),
+            pool_size=env_int("DB_POOL_SIZE", 5),
+            max_overflow=env_int("DB_MAX_OVERFLOW", 10),
+            pool_timeout=env_int("DB_POOL_TIMEOUT", 30),
+            pool_use_lifo=env_bool("DB_POOL_LIFO"),
+        )
+    else:
+        raise RuntimeError(f"Unknown DB_POOL_CLASS {pool_class!r}; expected 'queue' or 'null'")
+    return options
+
+
+def pgbouncer_connect_args(drivername: str) -> dict:
+    # Transaction pooling hands each transaction to whichever server
+    # connection is free, so statements prepared on one are unknown on the
+    # next. Turn off every driver-side prepared statement cache.
+    if not env_bool("DB_PGBOUNCER"):
+        return {}
+    if drivername.endswith("+asyncpg"):
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    if drivername.endswith("+psycopg"):
+        return {"prepare_threshold": None}
+    return {}
+
+
+def instrument_engine(engine, metrics: PoolMetrics) -> None:
+    event.listen(engine, "checkout", metrics.on_checkout)
+    event.listen(engine, "checkin", metrics.on_checkin)
@@ -0,0 +1,380 @@
+import bisect
+import threading
+import uuid
+from collections import Counter, defaultdict
+from operator import attrgetter
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import Uuid, select, type_coerce
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from .config import env_bool
+from .facets import facet_body
+from .filters import FLAG_FIELDS, ClientFilter
+from .models import Client, ClientCurrency, ClientTicker, ClientTombstone, Currency, Ticker
+from .serialize import SCALAR_FIELDS, TAG_BATCH_SIZE, Projection
+from .versioning import data_version
+
+# (link client_id, link tag_id, tag model, tag value column)
+TICKERS = (ClientTicker.client_id, ClientTicker.ticker_id, Ticker, Ticker.symbol)
+CURRENCIES = (ClientCurrency.client_id, ClientCurrency.currency_id, Currency, Currency.code)
+
+# Packed into one int per client, one bit each in this order.
+RECORD_FLAGS = FLAG_FIELDS
+# Short, heavily repeated values ("5Y", "OIS+110", "EU") share one string.
+INTERNED_FIELDS = (
+    "tenors_min",
+    "tenors_max",
+    "tenors_sweetspot",
+    "private_placement_buyer",
+    "target_spread_ois",
+    "target_g_spread",
+    "region",
+)
+# A paged list with tag filters scans in order unless they match fewer
+# than one client in this many.
+SCAN_RATIO = 16
+TEXT_FIELDS = tuple(name for name in SCALAR_FIELDS if name not in RECORD_FLAGS)
+
+
+class text_id(FunctionElement):
+    """A uuid column read as its dashed text form, on every backend.
+
+    Postgres casts it in SQL, which also keeps psycopg2 from building a
+    uuid.UUID per value. Elsewhere that cast gives undashed hex, so the
+    column is selected as is and SQLAlchemy formats it.
+    """
+
+    type = Uuid(as_uuid=False)
+    name = "text_id"
+    inherit_cache = True
+
+
+@compiles(text_id)
+def _compile_text_id(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(text_id, "postgresql")
+def _compile_text_id_postgresql(element, compiler, **kw):
+    return f"CAST({compiler.process(element.clauses, **kw)} AS TEXT)"
+
+
+# Ids are read as text: building a uuid.UUID per row and per tag link is
+# most of the cost of loading a large book.
+RECORD_COLUMNS = (
+    (text_id(Client.id), Client.client_name)
+    + tuple(getattr(Client, name) for name in TEXT_FIELDS)
+    + tuple(getattr(Client, name) for name in RECORD_FLAGS)
+    + (Client.tenors_min_months, Client.tenors_max_months, Client.target_spread_ois_bp)
+)
+
+
+def tag_map(session, dimension, ids: Optional[Sequence[str]] = None) -> Dict[str, List[str]]:
+    """Tag values per client id (as text), for ``ids`` or (None) every client."""
+    link_client_id, link_tag_id, tag_model, tag_column = dimension
+    base = select(text_id(link_client_id), tag_column).join(tag_model, tag_model.id == link_tag_id)
+    if ids is None:
+        statements = [base]
+    else:
+        # Compared as the column itself, so Postgres can use the link index.
+        link_client_id = type_coerce(link_client_id, Uuid(as_uuid=False))
+        statements = [
+            base.where(link_client_id.in_(ids[start:start + TAG_BATCH_SIZE]))
+            for start in range(0, len(ids), TAG_BATCH_SIZE)
+        ]
+    result: Dict[str, List[str]] = defaultdict(list)
+    for stmt in statements:
+        for client_id, value in session.execute(stmt):
+            result[client_id].append(value)
+    return result
+
+
+def _flag_property(bit: int):
+    return property(lambda record: bool(record.flags & bit))
+
+
+class ClientRecord:
+    """One client, laid out for memory rather than for the ORM.
+
+    Flags are bits of one small int, tags are sorted tuples of shared
+    strings, and there is no per-instance ``__dict__``. Attribute names
+    match ClientOut, so a Projection reads it like a row.
+    """
+
+    __slots__ = (
+        ("id", "client_name", "tickers", "currencies", "flags")
+        + TEXT_FIELDS
+        + ("tenors_min_months", "tenors_max_months", "target_spread_ois_bp")
+    )
+
+    frn_buyer = _flag_property(1 << RECORD_FLAGS.index("frn_buyer"))
+    callable_buyer = _flag_property(1 << RECORD_FLAGS.index("callable_buyer"))
+    esg_green = _flag_property(1 << RECORD_FLAGS.index("esg_green"))
+    esg_social = _flag_property(1 << RECORD_FLAGS.index("esg_social"))
+    esg_sustainable = _flag_property(1 << RECORD_FLAGS.index("esg_sustainable"))
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.client_name, self.id
+
+
+class ClientBook:
+    """The whole client book in memory, kept in (client_name, id) order.
+
+    ``refresh`` brings it up to the current data version by reading only
+    the clients and tombstones written since the last refresh. Writes bump
+    the version, so a worker's own writes are applied on its next read and
+    other workers' within DATA_VERSION_TTL_SECONDS. Ordering compares
+    Python strings by code point, which is the order the SQL paths use
+    (client_name COLLATE "C").
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self._reset()
+
+    @classmethod
+    def from_env(cls) -> "ClientBook":
+        return cls(enabled=env_bool("READ_MODEL"))
+
+    def _reset(self) -> None:
+        self.version: Optional[int] = None
+        self._records: Dict[str, ClientRecord] = {}
+        self._order: List[Tuple[str, str]] = []
+        self._strings: Dict[str, str] = {}
+        # Tag value -> ids of the clients holding it, per tag attribute.
+        self._postings: Dict[str, Dict[str, Set[str]]] = {"tickers": {}, "currencies": {}}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def refresh(self, session) -> int:
+        """Apply writes since the last refresh and return the version reached.
+
+        Call without ``lock`` held: the queries run outside it, so a session
+        that yields while waiting on the database (run_sync under DB_ASYNC)
+        never holds it. Only applying what was read takes the lock, and a
+        result older than one another request already applied is dropped.
+        """
+        current = self.version
+        if current is not None and data_version.cached() == current:
+            return current
+        # Read the version before the rows: anything committed after it is
+        # picked up again next time, and applying a row twice is harmless.
+        version = data_version.load(session)
+        if version == current:
+            return current
+        changes = self._fetch(session, current)
+        with self.lock:
+            if self.version is None or version > self.version:
+                self._apply(changes)
+                self.version = version
+            return self.version
+
+    def load(self, session) -> None:
+        self.refresh(session)
+
+    def _fetch(self, session, since: Optional[int]) -> tuple:
+        """Rows, tags and deleted ids written after ``since``; everything if None."""
+        if since is None:
+            rows = session.execute(select(*RECORD_COLUMNS)).all()
+            return since, rows, tag_map(session, TICKERS), tag_map(session, CURRENCIES), []
+        rows = session.execute(select(*RECORD_COLUMNS).where(Client.row_version > since)).all()
+        ids = [row[0] for row in rows]
+        deleted = session.scalars(
+            select(text_id(ClientTombstone.client_id)).where(ClientTombstone.version > since)
+        ).all()
+        return since, rows, tag_map(session, TICKERS, ids), tag_map(session, CURRENCIES, ids), deleted
+
+    def _apply(self, changes: tuple) -> None:
+        since, rows, tickers, currencies, deleted = changes
+        if since is None:
+            self._reset()
+            for row in rows:
+                record = self._record(row, tickers.get(row[0], ()), currencies.get(row[0], ()))
+                self._records[record.id] = record
+                self._post(record, add=True)
+            self._order = sorted(record.key for record in self._records.values())
+            return
+        for row in rows:
+            self._put(self._record(row, tickers.get(row[0], ()), currencies.get(row[0], ())))
+        for client_id in deleted:
+            self._remove(client_id)
+
+    def _intern(self, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return None
+        return self._strings.setdefault(value, value)
+
+    def _record(self, row, tickers: Sequence[str], currencies: Sequence[str]) -> ClientRecord:
+        record = ClientRecord()
+        record.id = row[0]
+        record.client_name = row[1]
+        record.tickers = tuple(sorted(self._intern(value) for value in tickers))
+        record.currencies = tuple(sorted(self._intern(value) for value in currencies))
+        position = 2
+        for name in TEXT_FIELDS:
+            value = row[position]
+            setattr(record, name, self._intern(value) if name in INTERNED_FIELDS else value)
+            position += 1
+        flags = 0
+        for bit in range(len(RECORD_FLAGS)):
+            if row[position]:
+                flags |= 1 << bit
+            position += 1
+        record.flags = flags
+        record.tenors_min_months, record.tenors_max_months, record.target_spread_ois_bp = row[position:]
+        return record
+
+    def _post(self, record: ClientRecord, add: bool) -> None:
+        for attribute, postings in self._postings.items():
+            for value in getattr(record, attribute):
+                if add:
+                    postings.setdefault(value, set()).add(record.id)
+                else:
+                    postings[value].discard(record.id)
+
+    def _put(self, record: ClientRecord) -> None:
+        old = self._records.get(record.id)
+        if old is not None:
+            self._post(old, add=False)
+        self._post(record, add=True)
+        if old is not None and old.key != record.key:
+            del self._order[bisect.bisect_left(self._order, old.key)]
+            old = None
+        if old is None:
+            bisect.insort(self._order, record.key)
+        self._records[record.id] = record
+
+    def _remove(self, client_id: str) -> None:
+        record = self._records.pop(client_id, None)
+        if record is not None:
+            self._post(record, add=False)
+            del self._order[bisect.bisect_left(self._order, record.key)]
+
+    def get(self, client_id: str) -> Optional[ClientRecord]:
+        try:
+            client_id = str(uuid.UUID(client_id))
+        except ValueError:
+            return None
+        return self._records.get(client_id)
+
+    def page(
+        self, filters: ClientFilter, after: Optional[Tuple[str, uuid.UUID]], limit: Optional[int]
+    ) -> List[ClientRecord]:
+        """Matching records after ``after`` in list order; up to ``limit`` + 1."""
+        matches = _predicate(filters)
+        order = self._order
+        candidates = self._candidates(filters)
+        # Tag filters narrow the book to their posting lists. Sorting those
+        # beats scanning in order unless a page fills up early anyway.
+        if candidates is not None and (limit is None or len(candidates) * SCAN_RATIO < len(self._records)):
+            order = sorted(self._records[client_id].key for client_id in candidates)
+        start = 0
+        if after is not None:
+            start = bisect.bisect_right(order, (after[0], str(after[1])))
+        result = []
+        for index in range(start, len(order)):
+            record = self._records[order[index][1]]
+            if matches(record):
+                result.append(record)
+                if limit is not None and len(result) > limit:
+                    break
+        return result
+
+    def facets(self, filters: ClientFilter) -> dict:
+        """Facet counts over the matching records, as facet_counts returns from SQL."""
+        matches = _predicate(filters)
+        candidates = self._candidates(filters)
+        records = self._records.values() if candidates is None else (self._records[i] for i in candidates)
+        tickers: Counter = Counter()
+        currencies: Counter = Counter()
+        regions: Counter = Counter()
+        flag_sets: Counter = Counter()
+        total = 0
+        for record in records:
+            if matches(record):
+                total += 1
+                tickers.update(record.tickers)
+                currencies.update(record.currencies)
+                regions[record.region.upper() if record.region is not None else None] += 1
+                flag_sets[record.flags] += 1
+        # Count each distinct flag combination once, then split it into bits.
+        flags = {
+            name: sum(count for bits, count in flag_sets.items() if bits & (1 << bit))
+            for bit, name in enumerate(RECORD_FLAGS)
+        }
+        return facet_body(total, tickers, currencies, regions, flags)
+
+    def tag_counts(self, attribute: str, values: Sequence[str]) -> Dict[str, int]:
+        """Clients holding each of ``values`` of a tag attribute ("tickers" or "currencies")."""
+        postings = self._postings[attribute]
+        return {value: len(postings.get(value, ())) for value in values}
+
+    def _candidates(self, filters: ClientFilter) -> Optional[Set[str]]:
+        """Ids that can pass the has-all/has-any tag filters; None if unfiltered."""
+        sets = []
+        for attribute, all_of, any_of in (
+            ("tickers", filters.tickers_all, filters.tickers_any),
+            ("currencies", filters.currencies_all, filters.currencies_any),
+        ):
+            postings = self._postings[attribute]
+            sets.extend(postings.get(value, set()) for value in all_of)
+            if any_of:
+                sets.append(set().union(*(postings.get(value, set()) for value in any_of)))
+        if not sets:
+            return None
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+
+def record_dicts(projection: Projection, records: Sequence[ClientRecord]) -> List[dict]:
+    """ClientOut-shaped dicts, as Projection.dicts returns for database rows."""
+    row = attrgetter("id", "client_name", *projection.scalars)
+    return [projection.row_dict(row(record), list(record.tickers), list(record.currencies)) for record in records]
+
+
+def _predicate(filters: ClientFilter) -> Callable[[ClientRecord], bool]:
+    """ClientFilter.clauses evaluated in Python, with the same semantics."""
+    checks: List[Callable[[ClientRecord], bool]] = []
+    for attribute, all_of, any_of, none_of in (
+        ("tickers", filters.tickers_all, filters.tickers_any, filters.tickers_none),
+        ("currencies", filters.currencies_all, filters.currencies_any, filters.currencies_none),
+    ):
+        values = attrgetter(attribute)
+        if all_of:
+            checks.append(lambda record, v=values, w=all_of: all(value in v(record) for value in w))
+        if any_of:
+            checks.append(lambda record, v=values, w=frozenset(any_of): not w.isdisjoint(v(record)))
+        if none_of:
+            checks.append(lambda record, v=values, w=frozenset(none_of): w.isdisjoint(v(record)))
+    if filters.regions:
+        regions = frozenset(filters.regions)
+        checks.append(lambda record: record.region is not None and record.region.upper() in regions)
+    for name in FLAG_FIELDS:
+        wanted = getattr(filters, name)
+        if wanted is not None:
+            checks.append(lambda record, flag=attrgetter(name), wanted=wanted: flag(record) is wanted)
+    if filters.tenor_covers is not None:
+        months = filters.tenor_covers
+
+        def covers(record: ClientRecord) -> bool:
+            low, high = record.tenors_min_months, record.tenors_max_months
+            if low is None and high is None:
+                return False
+            return (low is None or low <= months) and (high is None or high >= months)
+
+        checks.append(covers)
+    if filters.ois_min is not None or filters.ois_max is not None:
+        low = float("-inf") if filters.ois_min is None else filters.ois_min
+        high = float("inf") if filters.ois_max is None else filters.ois_max
+        checks.append(
+            lambda record: record.target_spread_ois_bp is not None and low <= record.target_spread_ois_bp <= high
+        )
+    return lambda record: all(check(record) for check in checks)
+
+
+client_book = ClientBook.from_env()
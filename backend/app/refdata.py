@@ -0,0 +1,191 @@
+import bisect
+import threading
+import uuid
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from .config import env_bool
+from .models import ClientCurrency, ClientTicker, Currency, Ticker
+from .versioning import data_version
+
+# Session.info key for tags inserted by a transaction that hasn't committed yet.
+PENDING_KEY = "reference_data_pending"
+
+
+class TagIndex:
+    """One tag table in memory: value -> id, and the values in sorted order.
+
+    Tag rows are only ever inserted, never renamed or deleted, so an id
+    once seen stays valid. Values missing here may still exist (inserted
+    by another worker); callers fall back to the database for those.
+    """
+
+    def __init__(self, name: str, model, column, link_tag_id):
+        self.name = name
+        self.model = model
+        self.column = column
+        self.link_tag_id = link_tag_id
+        self.version: Optional[int] = None
+        self._ids: Dict[str, uuid.UUID] = {}
+        self._values: List[str] = []
+
+    @property
+    def loaded(self) -> bool:
+        return self.version is not None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def merge(self, version: int, ids: Mapping[str, uuid.UUID]) -> None:
+        """Add a fresh read of the table, keeping tags cached since it was taken."""
+        merged = dict(self._ids)
+        merged.update(ids)
+        self._ids = merged
+        self._values = sorted(merged)
+        self.version = version if self.version is None else max(self.version, version)
+
+    def lookup(self, values: Iterable[str]) -> Dict[str, uuid.UUID]:
+        ids = self._ids
+        return {value: ids[value] for value in values if value in ids}
+
+    def add(self, pairs: Mapping[str, uuid.UUID]) -> None:
+        for value, tag_id in pairs.items():
+            if value not in self._ids:
+                self._ids[value] = tag_id
+                bisect.insort(self._values, value)
+
+    def prefixed(self, prefix: str, limit: int) -> List[str]:
+        """Up to ``limit`` values starting with ``prefix``, in sorted order."""
+        values = self._values
+        start = bisect.bisect_left(values, prefix)
+        result = []
+        for index in range(start, min(start + limit, len(values))):
+            if not values[index].startswith(prefix):
+                break
+            result.append(values[index])
+        return result
+
+
+class ReferenceData:
+    """The tickers and currencies tables, cached per process.
+
+    Resolving known tags needs no query. Tags a transaction inserts are
+    added once it commits, so a rollback can't leave an id behind that
+    doesn't exist.
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.indexes = {
+            "tickers": TagIndex("tickers", Ticker, Ticker.symbol, ClientTicker.ticker_id),
+            "currencies": TagIndex("currencies", Currency, Currency.code, ClientCurrency.currency_id),
+        }
+        self._by_model = {index.model: index for index in self.indexes.values()}
+
+    @classmethod
+    def from_env(cls) -> "ReferenceData":
+        return cls(enabled=env_bool("REFERENCE_CACHE", True))
+
+    def load(self, session) -> None:
+        for index in self.indexes.values():
+            self._load(session, index)
+
+    def lookup(self, session, model, values: Iterable[str]) -> Dict[str, uuid.UUID]:
+        """Cached ids for ``values``; an empty dict when the cache is off."""
+        if not self.enabled:
+            return {}
+        index = self._by_model[model]
+        if not index.loaded:
+            self._load(session, index)
+        with self.lock:
+            return index.lookup(values)
+
+    def found(self, model, pairs: Mapping[str, uuid.UUID]) -> None:
+        """Record committed tags read from the database."""
+        if self.enabled and pairs:
+            with self.lock:
+                self._by_model[model].add(pairs)
+
+    def inserted(self, session, model, pairs: Mapping[str, uuid.UUID]) -> None:
+        """Record tags ``session`` inserted; they are cached when it commits."""
+        if self.enabled and pairs:
+            session.info.setdefault(PENDING_KEY, []).append((model, dict(pairs)))
+
+    def prefixed(self, session, name: str, prefix: str, limit: int) -> List[str]:
+        index = self.indexes[name]
+        if not self.enabled:
+            column = index.column
+            # Escaped, so % and _ in a typed prefix match themselves, as in the cached path.
+            stmt = select(column).where(column.startswith(prefix, autoescape=True)).order_by(column).limit(limit)
+            return list(session.scalars(stmt))
+        self._sync(session, index)
+        with self.lock:
+            return index.prefixed(prefix, limit)
+
+    # Queries run without ``lock``, which is only taken to read or update an
+    # index: under DB_ASYNC the session runs on the event loop and yields
+    # while it waits on the database, so a thread lock held across a query
+    # would block the loop for every other request.
+
+    def _load(self, session, index: TagIndex) -> None:
+        version = data_version.load(session)
+        ids = dict(session.execute(select(index.column, index.model.id)).all())
+        with self.lock:
+            index.merge(version, ids)
+
+    def _sync(self, session, index: TagIndex) -> None:
+        """Pick up tags other workers inserted, if the book changed since the last sync."""
+        current = index.version
+        if current is None:
+            self._load(session, index)
+            return
+        if data_version.cached() == current:
+            return
+        version = data_version.load(session)
+        if version == current:
+            return
+        count = session.scalar(select(func.count()).select_from(index.model))
+        if count != len(index):
+            self._load(session, index)
+            return
+        with self.lock:
+            index.version = max(index.version, version)
+
+    def client_counts(self, session, name: str, values: Sequence[str]) -> Dict[str, int]:
+        """Clients holding each of ``values``, counted in the database."""
+        if not values:
+            return {}
+        index = self.indexes[name]
+        stmt = (
+            select(index.column, func.count(index.link_tag_id))
+            .outerjoin(index.link_tag_id.table, index.link_tag_id == index.model.id)
+            .where(index.column.in_(values))
+            .group_by(index.column)
+        )
+        return dict(session.execute(stmt).all())
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "enabled": self.enabled,
+                **{name: {"loaded": index.loaded, "values": len(index)} for name, index in self.indexes.items()},
+            }
+
+
+reference_data = ReferenceData.from_env()
+
+
+@event.listens_for(Session, "after_commit")
+def _cache_inserted_tags(session) -> None:
+    for model, pairs in session.info.pop(PENDING_KEY, ()):
+        reference_data.found(model, pairs)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_inserted_tags(session, transaction) -> None:
+    # Runs after after_commit, so anything left was rolled back or closed.
+    if transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
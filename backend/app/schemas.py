@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -25,6 +25,30 @@ class ClientOut(BaseModel):
 
 class ClientListResponse(BaseModel):
     items: List[ClientOut]
+    next_cursor: Optional[str] = None
+
+
+class ClientFacetsResponse(BaseModel):
+    total: int
+    tickers: Dict[str, int]
+    currencies: Dict[str, int]
+    regions: Dict[str, int]
+    flags: Dict[str, int] = Field(description="Clients with each flag set")
+
+
+class TagCount(BaseModel):
+    value: str
+    clients: int = Field(description="Clients holding this tag")
+
+
+class TagCountsResponse(BaseModel):
+    items: List[TagCount]
+
+
+class ClientChangesResponse(BaseModel):
+    version: int
+    items: List[ClientOut]
+    deleted: List[str] = []
 
 
 class ClientUpdate(BaseModel):
@@ -67,6 +91,34 @@ class ClientCreate(BaseModel):
     region: Optional[str] = None
 
 
+class ClientPatch(BaseModel):
+    id: str
+    changes: ClientUpdate
+
+
+class BulkUpdateItem(BaseModel):
+    id: str
+    status: str = Field(description="updated, unchanged, not_found or invalid")
+    changed: List[str] = []
+    error: Optional[str] = None
+
+
+class BulkUpdateResponse(BaseModel):
+    updated: int
+    items: List[BulkUpdateItem]
+
+
+class BulkRowError(BaseModel):
+    index: int
+    error: str
+
+
+class BulkImportResponse(BaseModel):
+    created: int
+    ids: List[str] = []
+    errors: List[BulkRowError] = []
+
+
 class AuditItem(BaseModel):
     id: str
     client_id: str
@@ -79,3 +131,28 @@ class AuditItem(BaseModel):
 
 class AuditListResponse(BaseModel):
     items: List[AuditItem]
+    next_cursor: Optional[str] = None
+
+
+class MatchRequest(BaseModel):
+    ticker: Optional[str] = None
+    currency: Optional[str] = None
+    tenor: Optional[str] = Field(default=None, description="e.g. 7Y")
+    frn: bool = False
+    callable: bool = False
+    private_placement: bool = False
+    esg: Optional[Literal["green", "social", "sustainable"]] = None
+    spread: Optional[str] = Field(default=None, description="e.g. OIS+120 or G+150; a bare number is OIS")
+    limit: int = Field(default=20, ge=1, le=1000)
+
+
+class MatchItem(BaseModel):
+    id: str
+    client_name: str
+    score: float
+    components: Dict[str, float]
+
+
+class MatchResponse(BaseModel):
+    version: int
+    items: List[MatchItem]
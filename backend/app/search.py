@@ -0,0 +1,223 @@
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Hashable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import (
+    Column,
+    Float,
+    MetaData,
+    Numeric,
+    Table,
+    case,
+    cast,
+    delete,
+    false,
+    func,
+    insert,
+    literal,
+    literal_column,
+    or_,
+    select,
+    text,
+)
+from sqlalchemy.orm import selectinload
+
+from .models import Client, ClientTicker, Ticker
+
+# Must match idx_client_search in schema.sql exactly, or Postgres won't use it.
+SEARCH_DOCUMENT = literal_column(
+    "to_tsvector('simple', coalesce(clients.client_name, '') || ' ' || "
+    "coalesce(clients.toms_code, '') || ' ' || coalesce(clients.client_notes, ''))"
+)
+SIMILARITY_THRESHOLD = 0.3
+RANK_DECIMALS = 4
+
+_has_trgm: Optional[bool] = None
+
+# Fallback hits are staged here rather than bound inline: a broad query can
+# match more clients than SQLite allows bound parameters in one statement.
+# Temporary tables belong to the connection, so concurrent searches don't mix.
+_fallback_hits = Table(
+    "search_hits",
+    MetaData(),
+    Column("client_id", Client.id.type, primary_key=True),
+    Column("score", Float, nullable=False),
+    prefixes=["TEMPORARY"],
+)
+
+
+class SearchPlan(NamedTuple):
+    clause: object
+    rank: object
+
+
+def _like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _trigrams(value: str) -> Set[str]:
+    grams = set()
+    for word in re.findall(r"\w+", value.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class NgramIndex:
+    """Pure-Python trigram index used when Postgres' pg_trgm isn't available.
+
+    Scores are the share of the query's trigrams found in a document, which
+    tolerates typos the same way pg_trgm's word_similarity does.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._texts: Dict[Hashable, str] = {}
+        self._grams: Dict[Hashable, Set[str]] = {}
+        self._postings: Dict[str, Set[Hashable]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def add(self, key: Hashable, document: str) -> None:
+        with self._lock:
+            self._discard(key)
+            grams = _trigrams(document)
+            self._texts[key] = document.lower()
+            self._grams[key] = grams
+            for gram in grams:
+                self._postings[gram].add(key)
+
+    def remove(self, key: Hashable) -> None:
+        with self._lock:
+            self._discard(key)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.loaded = False
+            self._texts.clear()
+            self._grams.clear()
+            self._postings.clear()
+
+    def search(self, query: str, threshold: float = SIMILARITY_THRESHOLD) -> List[Tuple[Hashable, float]]:
+        needle = query.strip().lower()
+        query_grams = _trigrams(needle)
+        if not needle:
+            return []
+        with self._lock:
+            overlap: Counter = Counter()
+            for gram in query_grams:
+                overlap.update(self._postings.get(gram, ()))
+            candidates = set(overlap)
+            if len(needle) < 3:
+                # Too short for trigrams to be selective; fall back to substring.
+                candidates.update(key for key, body in self._texts.items() if needle in body)
+            results = []
+            for key in candidates:
+                score = overlap[key] / len(query_grams) if query_grams else 0.0
+                if needle in self._texts[key]:
+                    score += 1.0
+                if score >= threshold:
+                    results.append((key, round(score, RANK_DECIMALS)))
+        results.sort(key=lambda item: -item[1])
+        return results
+
+    def _discard(self, key: Hashable) -> None:
+        for gram in self._grams.pop(key, ()):
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+        self._texts.pop(key, None)
+
+
+fallback_index = NgramIndex()
+
+
+def _document(client: Client) -> str:
+    parts = [client.client_name, client.toms_code, client.client_notes]
+    parts.extend(t.symbol for t in client.tickers)
+    return " ".join(part for part in parts if part)
+
+
+def _ensure_fallback_loaded(session) -> None:
+    if fallback_index.loaded:
+        return
+    clients = session.query(Client).options(selectinload(Client.tickers)).yield_per(1000)
+    for client in clients:
+        fallback_index.add(client.id, _document(client))
+    fallback_index.loaded = True
+
+
+def index_client(client: Client) -> None:
+    if fallback_index.loaded:
+        fallback_index.add(client.id, _document(client))
+
+
+def unindex_client(client_id) -> None:
+    if fallback_index.loaded:
+        fallback_index.remove(client_id)
+
+
+def _uses_postgres(session) -> bool:
+    return session.get_bind().dialect.name == "postgresql"
+
+
+def _trgm_available(session) -> bool:
+    global _has_trgm
+    if _has_trgm is None:
+        _has_trgm = bool(
+            session.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first()
+        )
+    return _has_trgm
+
+
+def _postgres_plan(session, q: str) -> SearchPlan:
+    needle = _like_escape(q.strip())
+    ts_query = func.plainto_tsquery("simple", q)
+    ticker_ids = (
+        select(ClientTicker.client_id)
+        .join(Ticker, Ticker.id == ClientTicker.ticker_id)
+        .where(Ticker.symbol.like(f"{needle.upper()}%", escape="\\"))
+    )
+    matches = [
+        Client.client_name.ilike(f"%{needle}%", escape="\\"),
+        Client.toms_code.ilike(f"%{needle}%", escape="\\"),
+        SEARCH_DOCUMENT.op("@@")(ts_query),
+        Client.id.in_(ticker_ids),
+    ]
+    score = case(
+        (Client.client_name.ilike(needle, escape="\\"), 3),
+        (Client.client_name.ilike(f"{needle}%", escape="\\"), 2),
+        (Client.client_name.ilike(f"%{needle}%", escape="\\"), 1),
+        else_=0,
+    ) + func.ts_rank(SEARCH_DOCUMENT, ts_query)
+
+    if _trgm_available(session):
+        # "<%" is word_similarity above pg_trgm.word_similarity_threshold,
+        # answered from the trigram index; it is what makes typos match.
+        matches.append(literal(q).op("<%")(Client.client_name))
+        score = score + func.word_similarity(q, Client.client_name)
+
+    rank = cast(func.round(cast(score, Numeric), RANK_DECIMALS), Float)
+    return SearchPlan(clause=or_(*matches), rank=rank)
+
+
+def _fallback_plan(session, q: str) -> SearchPlan:
+    _ensure_fallback_loaded(session)
+    hits = fallback_index.search(q)
+    if not hits:
+        return SearchPlan(clause=false(), rank=literal(0.0, Float))
+    connection = session.connection()
+    _fallback_hits.create(connection, checkfirst=True)
+    # Pooled connections keep the table, and the previous search's hits in it.
+    connection.execute(delete(_fallback_hits))
+    connection.execute(insert(_fallback_hits), [{"client_id": key, "score": score} for key, score in hits])
+    rank = select(_fallback_hits.c.score).where(_fallback_hits.c.client_id == Client.id).scalar_subquery()
+    return SearchPlan(clause=Client.id.in_(select(_fallback_hits.c.client_id)), rank=rank)
+
+
+def search_plan(session, q: str) -> SearchPlan:
+    if _uses_postgres(session):
+        return _postgres_plan(session, q)
+    return _fallback_plan(session, q)
@@ -0,0 +1,154 @@
+import json
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import select
+
+from .filters import FLAG_FIELDS
+from .models import Client, ClientCurrency, ClientTicker, Currency, Ticker
+from .timing import current_stats
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+TAG_BATCH_SIZE = 500
+
+# Field order of ClientOut after id, client_name, tickers and currencies.
+SCALAR_FIELDS = (
+    "tenors_min",
+    "tenors_max",
+    "tenors_sweetspot",
+    "frn_buyer",
+    "callable_buyer",
+    "private_placement_buyer",
+    "esg_green",
+    "esg_social",
+    "esg_sustainable",
+    "target_spread_ois",
+    "target_g_spread",
+    "toms_code",
+    "client_notes",
+    "region",
+)
+CLIENT_FIELDS = ("id", "client_name", "tickers", "currencies") + SCALAR_FIELDS
+
+
+def _encode(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, default=str, separators=(",", ":")).encode()
+
+
+def dumps(value) -> bytes:
+    stats = current_stats()
+    if stats is None:
+        return _encode(value)
+    started = time.perf_counter()
+    try:
+        return _encode(value)
+    finally:
+        stats.serialize_ms += (time.perf_counter() - started) * 1000
+
+
+def _tag_lists(session, link_client_id, link_tag_id, tag_model, tag_column, ids) -> Dict[uuid.UUID, List[str]]:
+    result: Dict[uuid.UUID, List[str]] = defaultdict(list)
+    for start in range(0, len(ids), TAG_BATCH_SIZE):
+        stmt = (
+            select(link_client_id, tag_column)
+            .join(tag_model, tag_model.id == link_tag_id)
+            .where(link_client_id.in_(ids[start:start + TAG_BATCH_SIZE]))
+        )
+        for client_id, value in session.execute(stmt):
+            result[client_id].append(value)
+    for values in result.values():
+        values.sort()
+    return result
+
+
+class Projection:
+    """The ClientOut fields a response carries and the columns that feed them.
+
+    Rows are ``columns`` followed by anything the caller appends (e.g. the
+    search rank). ``id`` and ``client_name`` are always selected, since
+    ordering and cursors need them, but only emitted when requested.
+    """
+
+    def __init__(self, fields: Iterable[str] = CLIENT_FIELDS):
+        wanted = set(fields)
+        unknown = wanted - set(CLIENT_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+        wanted.add("id")
+        self.fields = tuple(name for name in CLIENT_FIELDS if name in wanted)
+        self.scalars = tuple(name for name in SCALAR_FIELDS if name in wanted)
+        self.columns = (Client.id, Client.client_name) + tuple(getattr(Client, name) for name in self.scalars)
+        self._with_name = "client_name" in wanted
+        self._with_tickers = "tickers" in wanted
+        self._with_currencies = "currencies" in wanted
+        self._flag_positions = tuple(i for i, name in enumerate(self.scalars) if name in FLAG_FIELDS)
+
+    @classmethod
+    def parse(cls, value: Optional[str]) -> "Projection":
+        if not value:
+            return FULL
+        return cls(name.strip() for name in value.split(",") if name.strip())
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Projection) and self.fields == other.fields
+
+    def __hash__(self) -> int:
+        return hash(self.fields)
+
+    def row_dict(self, row: Sequence, tickers: List[str], currencies: List[str]) -> dict:
+        item = {"id": str(row[0])}
+        if self._with_name:
+            item["client_name"] = row[1]
+        if self._with_tickers:
+            item["tickers"] = tickers
+        if self._with_currencies:
+            item["currencies"] = currencies
+        scalars = list(row[2:2 + len(self.scalars)])
+        for position in self._flag_positions:
+            scalars[position] = bool(scalars[position])
+        item.update(zip(self.scalars, scalars))
+        return item
+
+    def dicts(self, session, rows: Sequence[Sequence]) -> List[dict]:
+        """ClientOut-shaped dicts for ``rows``.
+
+        Reads plain column tuples instead of ORM objects, and fetches the
+        tags of the whole batch with one query per requested tag table.
+        Output is trusted, so it skips Pydantic and goes straight to
+        ``dumps``.
+        """
+        ids = [row[0] for row in rows]
+        tickers = currencies = {}
+        if self._with_tickers:
+            tickers = _tag_lists(session, ClientTicker.client_id, ClientTicker.ticker_id, Ticker, Ticker.symbol, ids)
+        if self._with_currencies:
+            currencies = _tag_lists(
+                session, ClientCurrency.client_id, ClientCurrency.currency_id, Currency, Currency.code, ids
+            )
+        return [self.row_dict(row, tickers.get(row[0], []), currencies.get(row[0], [])) for row in rows]
+
+
+FULL = Projection()
+CLIENT_COLUMNS = FULL.columns
+
+
+def client_dicts(session, rows: Sequence[Sequence]) -> List[dict]:
+    return FULL.dicts(session, rows)
+
+
+def client_dict(client: Client) -> dict:
+    """ClientOut-shaped dict for a loaded ORM client."""
+    row = tuple(getattr(client, column.key) for column in CLIENT_COLUMNS)
+    return FULL.row_dict(
+        row,
+        sorted(t.symbol for t in client.tickers),
+        sorted(c.code for c in client.currencies),
+    )
@@ -0,0 +1,81 @@
+import uuid
+from typing import Dict, Iterable, List
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import make_transient_to_detached
+
+from .models import Currency, Ticker
+from .refdata import reference_data
+
+
+def _resolve_ids(session, model, column, values: Iterable[str]) -> Dict[str, uuid.UUID]:
+    wanted = list(dict.fromkeys(values))
+    if not wanted:
+        return {}
+
+    found = reference_data.lookup(session, model, wanted)
+    wanted = [value for value in wanted if value not in found]
+    if not wanted:
+        return found
+
+    existing = dict(session.execute(select(column, model.id).where(column.in_(wanted))).all())
+    missing = [value for value in wanted if value not in existing]
+    if missing:
+        stmt = (
+            insert(model)
+            .values([{"id": uuid.uuid4(), column.key: value} for value in missing])
+            .on_conflict_do_nothing(index_elements=[column.key])
+            .returning(column, model.id)
+        )
+        inserted = dict(session.execute(stmt).all())
+        reference_data.inserted(session, model, inserted)
+        found.update(inserted)
+        # Rows inserted concurrently by another transaction are skipped by
+        # ON CONFLICT and not returned, so pick them up with one more read.
+        raced = [value for value in missing if value not in inserted]
+        if raced:
+            existing.update(session.execute(select(column, model.id).where(column.in_(raced))).all())
+    reference_data.found(model, existing)
+    found.update(existing)
+    return found
+
+
+def resolve_ticker_ids(session, symbols: Iterable[str]) -> Dict[str, uuid.UUID]:
+    return _resolve_ids(session, Ticker, Ticker.symbol, symbols)
+
+
+def resolve_currency_ids(session, codes: Iterable[str]) -> Dict[str, uuid.UUID]:
+    return _resolve_ids(session, Currency, Currency.code, codes)
+
+
+def _get_or_create_map(session, model, column, values: Iterable[str]) -> Dict[str, object]:
+    # Tags are immutable, so with their ids known the objects are attached
+    # straight to the session rather than loaded with another query.
+    tags = {}
+    for value, tag_id in _resolve_ids(session, model, column, values).items():
+        tag = session.identity_map.get(session.identity_key(model, tag_id))
+        if tag is None:
+            tag = model(id=tag_id, **{column.key: value})
+            make_transient_to_detached(tag)
+            session.add(tag)
+        tags[value] = tag
+    return tags
+
+
+def get_or_create_ticker_map(session, symbols: Iterable[str]) -> Dict[str, Ticker]:
+    return _get_or_create_map(session, Ticker, Ticker.symbol, symbols)
+
+
+def get_or_create_currency_map(session, codes: Iterable[str]) -> Dict[str, Currency]:
+    return _get_or_create_map(session, Currency, Currency.code, codes)
+
+
+def get_or_create_tickers(session, symbols: List[str]) -> List[Ticker]:
+    tickers = get_or_create_ticker_map(session, symbols)
+    return [tickers[symbol] for symbol in dict.fromkeys(symbols)]
+
+
+def get_or_create_currencies(session, codes: List[str]) -> List[Currency]:
+    currencies = get_or_create_currency_map(session, codes)
+    return [currencies[code] for code in dict.fromkeys(codes)]
@@ -0,0 +1,71 @@
+import re
+from typing import Mapping, Optional
+
+# Free-text tenor and spread fields, and the numeric columns that shadow
+# them so range filters can run in SQL.
+TENOR_FIELDS = {
+    "tenors_min": "tenors_min_months",
+    "tenors_max": "tenors_max_months",
+    "tenors_sweetspot": "tenors_sweetspot_months",
+}
+SPREAD_FIELDS = {
+    "target_spread_ois": "target_spread_ois_bp",
+    "target_g_spread": "target_g_spread_bp",
+}
+SOURCE_FIELDS = tuple(TENOR_FIELDS) + tuple(SPREAD_FIELDS)
+
+_TENOR = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(D|DAYS?|W|WKS?|WEEKS?|M|MOS?|MONTHS?|Y|YRS?|YEARS?)\s*$", re.IGNORECASE)
+_TENOR_UNIT_MONTHS = {"D": 1 / 30, "W": 7 / 30, "M": 1, "Y": 12}
+# An optional benchmark name ("OIS", "G", "MS", ...), then a signed number
+# of basis points, or a percentage.
+_SPREAD = re.compile(r"^\s*(?:[A-Z]+\s*)?([+-]?)\s*(\d+(?:\.\d+)?)\s*(BPS?|%)?\s*$", re.IGNORECASE)
+
+
+def parse_tenor(value: Optional[str]) -> Optional[int]:
+    """Months in a tenor such as "5Y", "18M" or "1.5Y"; None if unparseable."""
+    if not value:
+        return None
+    match = _TENOR.match(value)
+    if not match:
+        return None
+    number, unit = match.groups()
+    return round(float(number) * _TENOR_UNIT_MONTHS[unit[0].upper()])
+
+
+def parse_spread(value: Optional[str]) -> Optional[int]:
+    """Basis points in a spread such as "OIS+110", "G+140" or "1.1%"."""
+    if not value:
+        return None
+    match = _SPREAD.match(value)
+    if not match:
+        return None
+    sign, number, unit = match.groups()
+    bp = float(number) * (100 if unit == "%" else 1)
+    return round(-bp if sign == "-" else bp)
+
+
+def spread_benchmark(value: Optional[str]) -> str:
+    """Benchmark a spread is quoted over: "g" for govvies ("G+140"), else "ois"."""
+    if value and value.strip().upper().startswith("G"):
+        return "g"
+    return "ois"
+
+
+def numeric_values(values: Mapping[str, Optional[str]]) -> dict:
+    """Shadow column values for the tenor and spread text in ``values``.
+
+    ``values`` must carry every field in SOURCE_FIELDS. A minimum above the
+    maximum is taken as the two being swapped, which keeps the tenor range
+    valid for ``int4range``.
+    """
+    result = {column: parse_tenor(values[field]) for field, column in TENOR_FIELDS.items()}
+    result.update({column: parse_spread(values[field]) for field, column in SPREAD_FIELDS.items()})
+    low, high = result["tenors_min_months"], result["tenors_max_months"]
+    if low is not None and high is not None and low > high:
+        result["tenors_min_months"], result["tenors_max_months"] = high, low
+    return result
+
+
+def apply_numeric_values(client) -> None:
+    for column, value in numeric_values({field: getattr(client, field) for field in SOURCE_FIELDS}).items():
+        setattr(client, column, value)
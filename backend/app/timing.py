@@ -0,0 +1,280 @@
+import contextvars
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+
+from .config import env_bool, env_float, env_int
+from .metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+ROW_BUCKETS = (1, 10, 100, 1000, 10000, 100000)
+# Routes Starlette didn't match (404s, probes) share one label, so random
+# paths can't grow the label set.
+UNMATCHED_ROUTE = "unmatched"
+EXPLAIN_QUEUE_SIZE = 100
+
+
+class RequestStats:
+    """What one request spent in the database and in serialization."""
+
+    __slots__ = ("started", "statements", "db_ms", "rows", "serialize_ms")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_ms = 0.0
+        self.rows = 0
+        self.serialize_ms = 0.0
+
+    def server_timing(self) -> str:
+        total_ms = (time.perf_counter() - self.started) * 1000
+        return (
+            f'db;dur={self.db_ms:.2f};desc="{self.statements} statements, {self.rows} rows", '
+            f"serialize;dur={self.serialize_ms:.2f}, total;dur={total_ms:.2f}"
+        )
+
+
+_current: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.duration_ms = Histogram()
+        self.db_ms = Histogram()
+        self.serialize_ms = Histogram()
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.rows = Histogram(ROW_BUCKETS)
+
+    def observe(self, stats: RequestStats) -> None:
+        self.duration_ms.observe((time.perf_counter() - stats.started) * 1000)
+        self.db_ms.observe(stats.db_ms)
+        self.serialize_ms.observe(stats.serialize_ms)
+        self.statements.observe(stats.statements)
+        self.rows.observe(stats.rows)
+
+
+class RequestMetrics:
+    """Per-route request histograms, plus the Prometheus text rendering.
+
+    Statements are counted through cursor events on the engines, so SQL
+    issued anywhere under a request (handlers, tag resolution, the read
+    model's refresh) is attributed to it. Nothing is attached unless
+    REQUEST_METRICS is set.
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.slow_queries = 0
+        self._routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RequestMetrics":
+        return cls(enabled=env_bool("REQUEST_METRICS"))
+
+    def route(self, method: str, path: str) -> RouteMetrics:
+        key = (method, path)
+        metrics = self._routes.get(key)
+        if metrics is None:
+            with self._lock:
+                metrics = self._routes.setdefault(key, RouteMetrics())
+        return metrics
+
+    def prometheus(self, extra=()) -> str:
+        """Text exposition format. ``extra`` is (name, help, labels, histogram, scale) tuples."""
+        series = {
+            "http_request_duration_seconds": ("Request latency", "duration_ms", 0.001),
+            "http_request_db_seconds": ("Time spent executing SQL per request", "db_ms", 0.001),
+            "http_request_serialize_seconds": ("Time spent encoding response bodies", "serialize_ms", 0.001),
+            "http_request_db_statements": ("SQL statements executed per request", "statements", 1),
+            "http_request_db_rows": ("Rows returned by SQL per request", "rows", 1),
+        }
+        with self._lock:
+            routes = sorted(self._routes.items())
+        lines = []
+        for name, (help_text, attribute, scale) in series.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (method, path), metrics in routes:
+                labels = f'method="{method}",route="{path}"'
+                lines += _histogram_lines(name, labels, getattr(metrics, attribute), scale)
+        for name, help_text, labels, histogram, scale in extra:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            lines += _histogram_lines(name, labels, histogram, scale)
+        lines += [
+            "# HELP db_slow_queries_total Statements slower than SLOW_QUERY_MS",
+            "# TYPE db_slow_queries_total counter",
+            f"db_slow_queries_total {self.slow_queries}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(name: str, labels: str, histogram: Histogram, scale: float):
+    snapshot = histogram.snapshot()
+    prefix = f"{labels}," if labels else ""
+    for bound, count in snapshot["buckets"].items():
+        le = bound if bound == "+Inf" else repr(float(bound) * scale)
+        yield f'{name}_bucket{{{prefix}le="{le}"}} {count}'
+    suffix = f"{{{labels}}}" if labels else ""
+    yield f"{name}_sum{suffix} {snapshot['sum'] * scale:.6f}"
+    yield f"{name}_count{suffix} {snapshot['count']}"
+
+
+class TimingMiddleware:
+    """Pure ASGI middleware: records each HTTP request and adds Server-Timing.
+
+    The header is written when the response starts, so for streamed bodies
+    it covers the work done before the first chunk; the histograms are
+    recorded once the body is complete.
+    """
+
+    def __init__(self, app, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.append((b"server-timing", stats.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED_ROUTE)
+            self.metrics.route(scope["method"], path).observe(stats)
+
+
+class SlowQueryLog:
+    """Logs statements slower than SLOW_QUERY_MS, with their plan.
+
+    EXPLAIN (without ANALYZE, so nothing runs twice) is issued from a
+    background thread on a connection of its own, off the request path and
+    outside the caller's transaction. The same statement text is explained
+    at most once per SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS; others are logged
+    without a plan.
+    """
+
+    def __init__(self, threshold_ms: float, explain_interval: float, metrics: RequestMetrics):
+        self.threshold_ms = threshold_ms
+        self.explain_interval = explain_interval
+        self.metrics = metrics
+        self._explained: Dict[str, float] = {}
+        self._queue: "queue.Queue" = queue.Queue(EXPLAIN_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, metrics: RequestMetrics) -> "SlowQueryLog":
+        return cls(
+            threshold_ms=env_float("SLOW_QUERY_MS", 0),
+            explain_interval=env_int("SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS", 300),
+            metrics=metrics,
+        )
+
+    def record(self, engine, statement: str, parameters, elapsed_ms: float, executemany: bool) -> None:
+        """Log a slow statement; ``engine`` runs its EXPLAIN, or None for no plan."""
+        with self._lock:
+            self.metrics.slow_queries += 1
+        if engine is None or executemany or not self._due(statement):
+            logger.warning("Slow query (%.1f ms): %s", elapsed_ms, statement)
+            return
+        try:
+            self._queue.put_nowait((engine, statement, parameters, elapsed_ms))
+        except queue.Full:
+            logger.warning("Slow query (%.1f ms): %s", elapsed_ms, statement)
+            return
+        self._ensure_thread()
+
+    def _due(self, statement: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained.get(statement)
+            if last is not None and now - last < self.explain_interval:
+                return False
+            self._explained[statement] = now
+            return True
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slow-query-explain", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            engine, statement, parameters, elapsed_ms = self._queue.get()
+            try:
+                plan = _explain(engine, statement, parameters)
+            except Exception as exc:
+                plan = f"(EXPLAIN failed: {exc})"
+            logger.warning("Slow query (%.1f ms): %s\n%s", elapsed_ms, statement, plan)
+
+
+def _explain(engine, statement: str, parameters) -> str:
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join(" ".join(str(value) for value in row) for row in cursor.fetchall())
+    finally:
+        connection.rollback()
+        connection.close()
+
+
+def instrument_statements(engine, metrics: RequestMetrics, slow_log: SlowQueryLog, explain_engine=None) -> None:
+    """Time every statement on ``engine`` when request metrics or the slow log are on.
+
+    ``explain_engine`` runs the slow log's EXPLAINs; pass None to log slow
+    statements without a plan (the async engine's statement text uses
+    asyncpg placeholders, which the sync driver can't execute).
+    """
+    if not metrics.enabled and slow_log.threshold_ms <= 0:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.timing_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "timing_started", None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stats = _current.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_ms += elapsed_ms
+            # Only result-returning statements count as rows; drivers that
+            # don't know the count up front (SQLite, server-side cursors)
+            # report -1.
+            if cursor.description is not None and cursor.rowcount > 0:
+                stats.rows += cursor.rowcount
+        if 0 < slow_log.threshold_ms <= elapsed_ms:
+            slow_log.record(explain_engine, statement, parameters, elapsed_ms, executemany)
+
+
+request_metrics = RequestMetrics.from_env()
+slow_query_log = SlowQueryLog.from_env(request_metrics)
@@ -0,0 +1,89 @@
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import Text, cast, func, insert, select, update
+
+from .cache import client_cache
+from .config import env_float
+from .live import CHANNEL, broadcaster
+from .models import DataVersion as DataVersionRow
+
+
+# Rows of the data_version table.
+CLIENT_BOOK = 1
+AUDIT_LOG = 2
+
+
+class DataVersion:
+    """Process-local view of one ``data_version`` counter.
+
+    Every write bumps the counter in its own transaction, so the value is a
+    monotonically increasing version of what the row covers across all
+    workers: the whole client book, or the audit log. Readers trust the
+    last value they saw for ``ttl_seconds``, which is what lets a
+    conditional GET be answered without touching the database.
+
+    Only the client book's counter is published: a new version of it
+    clears the response cache and goes out to SSE subscribers.
+    """
+
+    def __init__(self, ttl_seconds: float, row_id: int = CLIENT_BOOK, publish: bool = True):
+        self.ttl_seconds = ttl_seconds
+        self.row_id = row_id
+        self.publish = publish
+        self.value: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "DataVersion":
+        return cls(ttl_seconds=env_float("DATA_VERSION_TTL_SECONDS", 1.0), **kwargs)
+
+    def cached(self) -> Optional[int]:
+        with self._lock:
+            if self.value is None or time.monotonic() - self._checked_at > self.ttl_seconds:
+                return None
+            return self.value
+
+    def load(self, session) -> int:
+        version = session.execute(select(DataVersionRow.version).where(DataVersionRow.id == self.row_id)).scalar()
+        version = version or 0
+        self.observe(version)
+        return version
+
+    def bump(self, session) -> int:
+        # Takes a row lock held until commit, so keep this as the last
+        # statement before committing.
+        returning = [DataVersionRow.version]
+        if self.publish and session.get_bind().dialect.name == "postgresql":
+            # NOTIFY is transactional: listeners hear about the new version
+            # only once it commits.
+            returning.append(func.pg_notify(CHANNEL, cast(DataVersionRow.version, Text)))
+        version = session.execute(
+            update(DataVersionRow)
+            .where(DataVersionRow.id == self.row_id)
+            .values(version=DataVersionRow.version + 1)
+            .returning(*returning)
+        ).scalar()
+        if version is None:
+            session.execute(insert(DataVersionRow).values(id=self.row_id, version=1))
+            version = 1
+        return version
+
+    def observe(self, version: int) -> None:
+        with self._lock:
+            advanced = self.value is None or version > self.value
+            if advanced:
+                self.value = version
+            self._checked_at = time.monotonic()
+        if advanced and self.publish:
+            # Also catches writes made by other workers.
+            client_cache.invalidate()
+            broadcaster.publish_threadsafe(version)
+
+
+data_version = DataVersion.from_env()
+# Bumped by audit rows written outside the change's own transaction (the
+# async audit writer) and by archival, neither of which changes the book.
+audit_version = DataVersion.from_env(row_id=AUDIT_LOG, publish=False)
@@ -0,0 +1,104 @@
+import argparse
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from pathlib import Path
+from typing import List
+
+from sqlalchemy import delete, select
+
+from app.db import get_db_session
+from app.models import AuditLog
+from app.versioning import audit_version
+
+COLUMNS = (
+    AuditLog.id,
+    AuditLog.client_id,
+    AuditLog.user_id,
+    AuditLog.field_name,
+    AuditLog.old_value,
+    AuditLog.new_value,
+    AuditLog.changed_at,
+)
+DELETE_CHUNK_SIZE = 1000
+
+
+def _write_month(directory: Path, month: str, rows: List) -> Path:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [
+            ("id", pa.string()),
+            ("client_id", pa.string()),
+            ("user_id", pa.string()),
+            ("field_name", pa.string()),
+            ("old_value", pa.string()),
+            ("new_value", pa.string()),
+            ("changed_at", pa.timestamp("us", tz="UTC")),
+        ]
+    )
+    table = pa.table(
+        {
+            "id": [str(row.id) for row in rows],
+            "client_id": [str(row.client_id) for row in rows],
+            "user_id": [str(row.user_id) if row.user_id else None for row in rows],
+            "field_name": [row.field_name for row in rows],
+            "old_value": [row.old_value for row in rows],
+            "new_value": [row.new_value for row in rows],
+            "changed_at": [row.changed_at for row in rows],
+        },
+        schema=schema,
+    )
+    target = directory / f"month={month}"
+    target.mkdir(parents=True, exist_ok=True)
+    path = target / f"audit-{uuid.uuid4().hex}.parquet"
+    tmp = path.with_suffix(".tmp")
+    pq.write_table(table, tmp, compression="zstd")
+    with open(tmp, "rb") as handle:
+        os.fsync(handle.fileno())
+    tmp.rename(path)
+    return path
+
+
+def archive_audit(cutoff: datetime, directory: Path, batch_size: int) -> int:
+    """Move audit rows older than ``cutoff`` into monthly Parquet files.
+
+    Each batch is written and fsynced before its rows are deleted, so a
+    crash can leave a row both archived and in the table, never in neither.
+    """
+    archived = 0
+    with get_db_session() as session:
+        while True:
+            rows = session.execute(
+                select(*COLUMNS)
+                .where(AuditLog.changed_at < cutoff)
+                .order_by(AuditLog.changed_at, AuditLog.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            for month, group in groupby(rows, key=lambda row: row.changed_at.strftime("%Y-%m")):
+                _write_month(directory, month, list(group))
+            ids = [row.id for row in rows]
+            for start in range(0, len(ids), DELETE_CHUNK_SIZE):
+                session.execute(delete(AuditLog).where(AuditLog.id.in_(ids[start:start + DELETE_CHUNK_SIZE])))
+            # Audit responses change, so their ETags must too.
+            audit_version.bump(session)
+            session.commit()
+            archived += len(rows)
+    return archived
+
+
+if __name__ == "__main__":
+    if not os.getenv("DATABASE_URL"):
+        raise SystemExit("DATABASE_URL is not set")
+    parser = argparse.ArgumentParser(description="Move old audit_log rows to Parquet files (needs pyarrow).")
+    parser.add_argument("--older-than-days", type=int, default=365)
+    parser.add_argument("--dir", default="audit-archive", help="Archive directory")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+    cutoff = datetime.now(timezone.utc) - timedelta(days=args.older_than_days)
+    count = archive_audit(cutoff, Path(args.dir), args.batch_size)
+    print(f"Archived {count} audit rows older than {cutoff.isoformat()}.")
@@ -0,0 +1,51 @@
+import argparse
+import os
+
+from sqlalchemy import bindparam, select, update
+
+from app.db import get_db_session
+from app.models import Client
+from app.terms import SOURCE_FIELDS, numeric_values
+
+
+def backfill_terms(batch_size: int) -> int:
+    """Recompute the numeric tenor/spread columns of every client.
+
+    Does not bump the data version: the API never returns these columns, so
+    no cached response changes.
+    """
+    columns = [getattr(Client, field) for field in SOURCE_FIELDS]
+    stmt = (
+        update(Client)
+        .where(Client.id == bindparam("client_id"))
+        # Not an edit, so leave updated_at alone.
+        .values(updated_at=Client.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    updated = 0
+    after = None
+    with get_db_session() as session:
+        while True:
+            query = select(Client.id, *columns).order_by(Client.id).limit(batch_size)
+            if after is not None:
+                query = query.where(Client.id > after)
+            rows = session.execute(query).all()
+            if not rows:
+                break
+            values = [
+                {"client_id": row.id, **numeric_values(dict(zip(SOURCE_FIELDS, row[1:])))} for row in rows
+            ]
+            session.connection().execute(stmt, values)
+            session.commit()
+            updated += len(rows)
+            after = rows[-1].id
+    return updated
+
+
+if __name__ == "__main__":
+    if not os.getenv("DATABASE_URL"):
+        raise SystemExit("DATABASE_URL is not set")
+    parser = argparse.ArgumentParser(description="Fill the numeric tenor/spread columns from their text.")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    print(f"Backfilled {backfill_terms(args.batch_size)} clients.")
@@ -0,0 +1,50 @@
+"""Compare two bench.load results, e.g. from before and after a change:
+
+    python -m bench.compare before.json after.json
+
+Prints each operation's throughput and latency percentiles side by side
+with the relative change; latency going up or throughput going down by
+more than --threshold percent is flagged.
+"""
+import argparse
+import json
+
+METRICS = ("requests_per_sec", "p50_ms", "p95_ms", "p99_ms")
+
+
+def _change(before: float, after: float) -> float:
+    if not before:
+        return 0.0
+    return (after - before) / before * 100
+
+
+def compare(before: dict, after: dict, threshold: float) -> list:
+    lines = [f"{before.get('commit', '?')} -> {after.get('commit', '?')}"]
+    sections = [("overall", before["overall"], after["overall"])]
+    for operation, stats in after["operations"].items():
+        if operation in before["operations"]:
+            sections.append((operation, before["operations"][operation], stats))
+    for name, old, new in sections:
+        for metric in METRICS:
+            change = _change(old[metric], new[metric])
+            worse = -change if metric == "requests_per_sec" else change
+            flag = "  <-- regression" if worse > threshold else ""
+            lines.append(f"{name:8} {metric:17} {old[metric]:>10} {new[metric]:>10} {change:+7.1f}%{flag}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent")
+    args = parser.parse_args()
+    with open(args.before) as handle:
+        before = json.load(handle)
+    with open(args.after) as handle:
+        after = json.load(handle)
+    print("\n".join(compare(before, after, args.threshold)))
+
+
+if __name__ == "__main__":
+    main()
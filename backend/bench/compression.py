@@ -0,0 +1,96 @@
+"""Bytes on the wire and CPU per request for each Content-Encoding.
+
+Runs the app in-process against DATABASE_URL (lifespan included, so the
+read model and data version are live) and, for each path and encoding,
+times three cases:
+
+    identity   the cached plain body, no compression
+    cached     the precompressed body from the response cache
+    cold       the response cache emptied before every request, so each
+               one queries and compresses at the cached levels
+
+plus, for streamed responses (NDJSON, CSV export), the per-chunk
+compression the middleware does:
+
+    DATABASE_URL=... python -m bench.compression --requests 50
+
+CPU is process time, which includes the in-process client's share; that
+share is the same in every case, so the differences are the server's.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from app.cache import client_cache
+from app.compression import compression
+from app.main import app
+
+DEFAULT_PATHS = ("/clients?limit=500", "/clients/facets", "/clients?limit=50&fields=client_name,tickers")
+STREAM_PATHS = ("/clients?stream=true", "/clients/export?format=csv")
+
+
+async def _fetch(client: httpx.AsyncClient, path: str, encoding: str) -> int:
+    async with client.stream("GET", path, headers={"Accept-Encoding": encoding}) as response:
+        response.raise_for_status()
+        served = response.headers.get("content-encoding", "identity")
+        if served != encoding:
+            raise SystemExit(f"{path}: asked for {encoding}, got {served}")
+        return sum([len(chunk) async for chunk in response.aiter_raw()])
+
+
+async def _measure(client: httpx.AsyncClient, path: str, encoding: str, requests: int, cold: bool) -> dict:
+    await _fetch(client, path, encoding)
+    wire = 0
+    cpu = wall = 0.0
+    for _ in range(requests):
+        if cold:
+            client_cache.invalidate()
+        cpu_started, wall_started = time.process_time(), time.perf_counter()
+        wire = await _fetch(client, path, encoding)
+        cpu += time.process_time() - cpu_started
+        wall += time.perf_counter() - wall_started
+    return {
+        "wire_bytes": wire,
+        "cpu_ms_per_request": round(cpu * 1000 / requests, 3),
+        "wall_ms_per_request": round(wall * 1000 / requests, 3),
+    }
+
+
+async def run(paths, stream_paths, requests: int, stream_requests: int) -> dict:
+    encodings = ("identity",) + compression.encodings
+    report = {"encodings": list(compression.encodings), "paths": {}, "streams": {}}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+            for path in paths:
+                report["paths"][path] = {
+                    encoding: {
+                        case: await _measure(client, path, encoding, requests, cold=case == "cold")
+                        for case in (("cached",) if encoding == "identity" else ("cached", "cold"))
+                    }
+                    for encoding in encodings
+                }
+            for path in stream_paths:
+                report["streams"][path] = {
+                    encoding: await _measure(client, path, encoding, stream_requests, cold=False)
+                    for encoding in encodings
+                }
+    report["compression_stats"] = compression.stats()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paths", nargs="*", default=list(DEFAULT_PATHS))
+    parser.add_argument("--stream-paths", nargs="*", default=list(STREAM_PATHS))
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--stream-requests", type=int, default=1)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.paths, args.stream_paths, args.requests, args.stream_requests)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
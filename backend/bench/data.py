@@ -0,0 +1,97 @@
+import argparse
+import json
+import random
+from typing import Dict, List
+
+from sqlalchemy import text
+
+from app.db import get_db_session
+
+CURRENCIES = ["USD", "EUR", "GBP", "CAD", "JPY", "AUD", "CHF", "SEK", "NOK", "SGD"]
+CURRENCY_WEIGHTS = [30, 25, 12, 10, 6, 5, 4, 3, 3, 2]
+REGIONS = ["NA", "US", "EU", "UK", "APAC", "LATAM"]
+TENORS = ["1Y", "2Y", "3Y", "5Y", "7Y", "10Y", "12Y", "15Y", "20Y", "30Y"]
+
+
+def ticker_universe(n_clients: int) -> List[str]:
+    # The issuer universe grows with the book, roughly one ticker per 20 clients.
+    size = max(50, n_clients // 20)
+    return [f"T{i:05d}" for i in range(size)]
+
+
+def generate_clients(n: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    tickers = ticker_universe(n)
+    # Zipf-like popularity: a few large issuers, a long tail of small ones.
+    ticker_weights = [1.0 / (rank + 1) for rank in range(len(tickers))]
+    rows = []
+    for i in range(n):
+        lo = rng.randrange(0, 6)
+        hi = rng.randrange(lo + 1, len(TENORS))
+        rows.append(
+            {
+                "client_name": f"Client {i:06d}",
+                "tickers": sorted(set(rng.choices(tickers, ticker_weights, k=rng.randint(1, 6)))),
+                "currencies": sorted(set(rng.choices(CURRENCIES, CURRENCY_WEIGHTS, k=rng.randint(1, 3)))),
+                "tenors_min": TENORS[lo],
+                "tenors_max": TENORS[hi],
+                "tenors_sweetspot": TENORS[rng.randint(lo, hi)],
+                "frn_buyer": rng.random() < 0.3,
+                "callable_buyer": rng.random() < 0.25,
+                "private_placement_buyer": rng.choice(["Yes", "No", "Maybe"]),
+                "esg_green": rng.random() < 0.2,
+                "esg_social": rng.random() < 0.1,
+                "esg_sustainable": rng.random() < 0.15,
+                "target_spread_ois": f"OIS+{rng.randrange(40, 250, 5)}",
+                "target_g_spread": f"G+{rng.randrange(60, 300, 5)}",
+                "toms_code": f"TC-{i:06d}",
+                "client_notes": rng.choice(
+                    [
+                        "Prefers high quality issuers.",
+                        "Likes callable structures.",
+                        "Sensitive to spread volatility.",
+                        "Real money account, buy and hold.",
+                        "Fast money, trades the new issue concession.",
+                    ]
+                ),
+                "region": rng.choice(REGIONS),
+            }
+        )
+    return rows
+
+
+def reset_book() -> None:
+    with get_db_session() as session:
+        session.execute(text("TRUNCATE clients, tickers, currencies, audit_log CASCADE"))
+        session.commit()
+
+
+def load_book(n: int, seed: int = 0) -> None:
+    from app.main import _import_clients
+    from app.schemas import ClientCreate
+
+    payloads = [(i, ClientCreate(**row)) for i, row in enumerate(generate_clients(n, seed))]
+    with get_db_session() as session:
+        _, errors = _import_clients(session, payloads)
+    if errors:
+        raise RuntimeError(f"{len(errors)} rows failed to load, first: {errors[0].error}")
+    with get_db_session() as session:
+        session.execute(text("ANALYZE"))
+        session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load a synthetic client book, e.g. before bench.load")
+    parser.add_argument("--clients", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--truncate", action="store_true", help="Confirm the book may be wiped")
+    args = parser.parse_args()
+    if not args.truncate:
+        raise SystemExit("Refusing to run without --truncate: this wipes the clients table.")
+    reset_book()
+    load_book(args.clients, args.seed)
+    print(json.dumps({"clients": args.clients, "seed": args.seed}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Filter cost at growing book sizes.
+
+Run against a scratch database; the book is truncated and regenerated:
+
+    DATABASE_URL=... python -m bench.filters --truncate --sizes 1000,10000,100000
+"""
+import argparse
+import json
+import statistics
+import time
+
+from sqlalchemy import func, select
+
+from app.db import get_db_session
+from app.filters import ClientFilter
+from app.main import _client_list_statement
+
+from .data import load_book, reset_book, ticker_universe
+
+REPEATS = 20
+
+
+def _scenarios(n: int):
+    tickers = ticker_universe(n)
+    tail = tickers[len(tickers) // 2]
+    return {
+        "ticker_all_head": ClientFilter(tickers_all=(tickers[0], tickers[1])),
+        "ticker_any_tail": ClientFilter(tickers_any=(tail,)),
+        "ticker_and_currency": ClientFilter(tickers_all=(tickers[0],), currencies_all=("EUR", "USD")),
+        "tail_not_usd_green": ClientFilter(
+            tickers_any=(tail,), currencies_none=("USD",), esg_green=True
+        ),
+        "tenor_covers_7y_ois_100_plus": ClientFilter(tenor_covers=84, ois_min=100),
+    }
+
+
+def _time(fn) -> float:
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run(sizes, page_size: int):
+    results = []
+    for n in sizes:
+        reset_book()
+        load_book(n)
+        for name, filters in _scenarios(n).items():
+            with get_db_session() as session:
+                stmt = _client_list_statement(session, None, filters)
+                matches = session.execute(select(func.count()).select_from(stmt.subquery())).scalar()
+                page_ms = _time(lambda: session.execute(stmt.limit(page_size)).all())
+                results.append(
+                    {"clients": n, "scenario": name, "matches": matches, "page_ms": round(page_ms, 3)}
+                )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--truncate", action="store_true", help="Confirm the book may be wiped")
+    args = parser.parse_args()
+    if not args.truncate:
+        raise SystemExit("Refusing to run without --truncate: this wipes the clients table.")
+    sizes = [int(size) for size in args.sizes.split(",")]
+    print(json.dumps(run(sizes, args.page_size), indent=2))
+
+
+if __name__ == "__main__":
+    main()
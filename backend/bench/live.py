@@ -0,0 +1,92 @@
+"""Live update fan-out against a running API server backed by Postgres.
+
+Opens many SSE subscribers on /clients/events, fires bursts of PATCHes
+through the API and reports how many messages each subscriber saw (bursts
+should coalesce) and the delay from a write's response to its event:
+
+    uvicorn app.main:app --port 8000
+    python -m bench.live --url http://127.0.0.1:8000 --subscribers 200
+
+Writes go to the first client in the book, which must exist.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+from .readers import _percentile
+
+
+async def _subscriber(client: httpx.AsyncClient, ready: asyncio.Event, received: list) -> None:
+    async with client.stream("GET", "/clients/events") as response:
+        ready.set()
+        async for line in response.aiter_lines():
+            if line.startswith("data: "):
+                received.append((time.perf_counter(), json.loads(line[6:])["version"]))
+
+
+async def run(url: str, subscribers: int, bursts: int, burst_size: int, pause: float) -> dict:
+    limits = httpx.Limits(max_connections=subscribers + 10)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=None) as client:
+        client_id = (await client.get("/clients?limit=1")).json()["items"][0]["id"]
+        streams = []
+        inboxes = []
+        for _ in range(subscribers):
+            ready = asyncio.Event()
+            inbox: list = []
+            streams.append(asyncio.create_task(_subscriber(client, ready, inbox)))
+            inboxes.append(inbox)
+            await ready.wait()
+        await asyncio.sleep(pause)
+
+        writes = []
+        for burst in range(bursts):
+            for i in range(burst_size):
+                response = await client.patch(
+                    f"/clients/{client_id}", json={"client_notes": f"live bench {time.time()} {burst}.{i}"}
+                )
+                writes.append(time.perf_counter())
+                response.raise_for_status()
+            await asyncio.sleep(pause)
+
+        for task in streams:
+            task.cancel()
+        await asyncio.gather(*streams, return_exceptions=True)
+        stats = (await client.get("/live/stats")).json()
+
+    # Delay from the last write of each burst to the first event after it.
+    delays = []
+    burst_ends = writes[burst_size - 1::burst_size]
+    for inbox in inboxes:
+        for written_at in burst_ends:
+            after = [received_at for received_at, _ in inbox if received_at >= written_at]
+            if after:
+                delays.append((after[0] - written_at) * 1000)
+    messages = [len(inbox) - 1 for inbox in inboxes]  # minus the initial version
+    return {
+        "subscribers": subscribers,
+        "writes": len(writes),
+        "messages_per_subscriber": round(statistics.mean(messages), 1) if messages else 0,
+        "delay_p50_ms": round(statistics.median(delays), 2) if delays else None,
+        "delay_p99_ms": round(_percentile(delays, 99), 2),
+        "server": stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--subscribers", type=int, default=200)
+    parser.add_argument("--bursts", type=int, default=5)
+    parser.add_argument("--burst-size", type=int, default=10)
+    parser.add_argument("--pause", type=float, default=1.0, help="Seconds between bursts")
+    args = parser.parse_args()
+    result = asyncio.run(run(args.url, args.subscribers, args.bursts, args.burst_size, args.pause))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Scripted mixed load against a running API server.
+
+Each worker picks list, filter, search and patch requests at the weights
+given by --mix, from a seeded random stream, so the same arguments replay
+the same request sequence. The result (overall and per operation
+throughput, p50/p95/p99 latency and errors, plus the git commit) is JSON,
+so runs can be compared across commits with bench.compare:
+
+    python -m bench.data --clients 10000 --truncate
+    uvicorn app.main:app --port 8000
+    python -m bench.load --url http://127.0.0.1:8000 --output before.json
+
+Works against a server on Postgres or SQLite; only the server needs the
+database.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import httpx
+
+from .readers import _percentile
+
+DEFAULT_MIX = "list=40,filter=30,search=15,patch=15"
+FLAG_FILTERS = ["frn_buyer", "callable_buyer", "esg_green", "esg_social", "esg_sustainable"]
+
+
+class Book:
+    """Ids, tickers and currencies sampled from the server before the run."""
+
+    def __init__(self, ids: List[str], tickers: List[str], currencies: List[str], names: List[str]):
+        self.ids = ids
+        self.tickers = tickers
+        self.currencies = currencies
+        self.names = names
+
+
+async def _sample(client: httpx.AsyncClient, size: int) -> Book:
+    response = await client.get(f"/clients?limit={size}&fields=client_name,tickers,currencies")
+    response.raise_for_status()
+    items = response.json()["items"]
+    if not items:
+        raise SystemExit("The server has no clients; load some with python -m bench.data first.")
+    return Book(
+        ids=[item["id"] for item in items],
+        tickers=sorted({t for item in items for t in item["tickers"]}),
+        currencies=sorted({c for item in items for c in item["currencies"]}),
+        names=[item["client_name"] for item in items],
+    )
+
+
+def _request(operation: str, rng: random.Random, book: Book, page_size: int):
+    if operation == "list":
+        return "GET", f"/clients?limit={page_size}", None
+    if operation == "filter":
+        params = [f"limit={page_size}"]
+        if book.tickers and rng.random() < 0.7:
+            params.append(f"ticker_any={rng.choice(book.tickers)}")
+        if book.currencies and rng.random() < 0.5:
+            params.append(f"currency={rng.choice(book.currencies)}")
+        if rng.random() < 0.3:
+            params.append(f"{rng.choice(FLAG_FILTERS)}=true")
+        return "GET", "/clients?" + "&".join(params), None
+    if operation == "search":
+        term = rng.choice(book.tickers) if book.tickers and rng.random() < 0.5 else rng.choice(book.names)
+        return "GET", f"/clients?limit={page_size}&q={term}", None
+    if operation == "patch":
+        body = {"client_notes": f"load {rng.random():.6f}"}
+        return "PATCH", f"/clients/{rng.choice(book.ids)}", body
+    raise ValueError(f"Unknown operation {operation}")
+
+
+async def _worker(
+    client: httpx.AsyncClient,
+    rng: random.Random,
+    book: Book,
+    mix: Dict[str, int],
+    page_size: int,
+    deadline: float,
+    latencies: Dict[str, List[float]],
+    errors: Dict[str, int],
+) -> None:
+    operations = list(mix)
+    weights = list(mix.values())
+    while time.perf_counter() < deadline:
+        operation = rng.choices(operations, weights)[0]
+        method, path, body = _request(operation, rng, book, page_size)
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=body)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            latencies[operation].append((time.perf_counter() - start) * 1000)
+        else:
+            errors[operation] += 1
+
+
+def _summary(latencies: List[float], errors: int, elapsed: float) -> dict:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2) if latencies else 0.0,
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = int(weight)
+    unknown = set(mix) - {"list", "filter", "search", "patch"}
+    if unknown:
+        raise SystemExit(f"Unknown operation(s) in --mix: {', '.join(sorted(unknown))}")
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+async def run(url: str, concurrency: int, duration: float, mix: Dict[str, int], page_size: int, seed: int) -> dict:
+    latencies: Dict[str, List[float]] = {operation: [] for operation in mix}
+    errors: Dict[str, int] = {operation: 0 for operation in mix}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        book = await _sample(client, 1000)
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                _worker(client, random.Random(seed + i), book, mix, page_size, deadline, latencies, errors)
+                for i in range(concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - started
+
+    every = [sample for samples in latencies.values() for sample in samples]
+    return {
+        "commit": _git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "url": url,
+        "concurrency": concurrency,
+        "duration_s": duration,
+        "mix": mix,
+        "seed": seed,
+        "overall": _summary(every, sum(errors.values()), elapsed),
+        "operations": {
+            operation: _summary(latencies[operation], errors[operation], elapsed) for operation in mix
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Operation weights")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the JSON result to this file")
+    args = parser.parse_args()
+    result = asyncio.run(
+        run(args.url, args.concurrency, args.duration, parse_mix(args.mix), args.page_size, args.seed)
+    )
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Matching cost at growing book sizes.
+
+Times building the in-memory snapshot, refreshing it after one write and
+ranking the whole book for a few issues. Run against a scratch database;
+the book is truncated and regenerated:
+
+    DATABASE_URL=... python -m bench.match --truncate --sizes 1000,10000,100000
+"""
+import argparse
+import json
+import time
+import uuid
+
+from app.db import get_db_session
+from app.main import _update_client
+from app.matching import ClientSnapshot, Issue
+from app.schemas import ClientUpdate
+
+from .data import load_book, reset_book, ticker_universe
+from .filters import _time
+
+
+def _issues(n: int):
+    tickers = ticker_universe(n)
+    return {
+        "ticker_only": Issue(ticker=tickers[0]),
+        "full_profile": Issue(
+            ticker=tickers[len(tickers) // 2],
+            currency="EUR",
+            tenor_months=84,
+            frn=True,
+            esg="green",
+            spread_bp=120,
+        ),
+        "no_ticker": Issue(currency="USD", tenor_months=60, callable=True, spread_bp=90),
+    }
+
+
+def run(sizes, limit: int):
+    results = []
+    for n in sizes:
+        reset_book()
+        load_book(n)
+        snapshot = ClientSnapshot()
+        with get_db_session() as session:
+            started = time.perf_counter()
+            snapshot.refresh(session)
+            build_ms = (time.perf_counter() - started) * 1000
+            client_id = snapshot.ids[0]
+        with get_db_session() as session:
+            _update_client(session, uuid.UUID(client_id), ClientUpdate(client_notes=f"bench {time.time()}"))
+        with get_db_session() as session:
+            started = time.perf_counter()
+            snapshot.refresh(session)
+            refresh_ms = (time.perf_counter() - started) * 1000
+        row = {"clients": n, "build_ms": round(build_ms, 1), "refresh_after_write_ms": round(refresh_ms, 2)}
+        for name, issue in _issues(n).items():
+            row[f"{name}_ms"] = round(_time(lambda: snapshot.top(issue, limit)), 3)
+        results.append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--truncate", action="store_true", help="Confirm the book may be wiped")
+    args = parser.parse_args()
+    if not args.truncate:
+        raise SystemExit("Refusing to run without --truncate: this wipes the clients table.")
+    sizes = [int(size) for size in args.sizes.split(",")]
+    print(json.dumps(run(sizes, args.limit), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""pytest-benchmark microbenchmarks for hot helpers in the API.
+
+Not collected by a plain ``pytest`` run; name the file explicitly:
+
+    DATABASE_URL=... pytest bench/micro.py --benchmark-json micro.json
+    pytest-benchmark compare micro.json other.json
+
+Query-building benchmarks open a session on DATABASE_URL (Postgres, with
+tables from schema.sql) and are skipped when it can't be reached; the
+rest need no database.
+"""
+import uuid
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import OperationalError
+
+from app.db import get_db_session
+from app.filters import ClientFilter
+from app.main import _client_list_statement, _normalize_list
+from app.models import ClientTicker, Ticker
+from app.refdata import TagIndex
+from app.serialize import FULL, Projection, dumps
+
+from .data import generate_clients, ticker_universe
+
+RAW_TAGS = [" aapl", "MSFT ", "", None, "goog", "Amzn", "  ", "nvda", "tsla", "meta"] * 5
+PAGE = 500
+
+
+@pytest.fixture(scope="module")
+def rows():
+    payloads = generate_clients(PAGE, seed=11)
+    result = []
+    for payload in payloads:
+        row = (uuid.uuid4(), payload["client_name"]) + tuple(payload[name] for name in FULL.scalars)
+        result.append((row, payload["tickers"], payload["currencies"]))
+    return result
+
+
+@pytest.fixture(scope="module")
+def session():
+    with get_db_session() as session:
+        try:
+            session.connection()
+        except OperationalError as exc:
+            pytest.skip(f"database unavailable: {exc}")
+        yield session
+
+
+def test_normalize_list(benchmark):
+    result = benchmark(_normalize_list, RAW_TAGS)
+    assert result[0] == "AAPL"
+
+
+def test_normalize_list_comma_separated(benchmark):
+    value = ",".join(tag for tag in RAW_TAGS if tag)
+    result = benchmark(_normalize_list, value)
+    assert "MSFT" in result
+
+
+@pytest.fixture(scope="module")
+def ticker_index():
+    index = TagIndex("tickers", Ticker, Ticker.symbol, ClientTicker.ticker_id)
+    index.add({symbol: uuid.uuid4() for symbol in ticker_universe(100_000)})
+    return index
+
+
+def test_ticker_prefix_lookup(benchmark, ticker_index):
+    assert len(benchmark(ticker_index.prefixed, "T001", 20)) == 20
+
+
+def test_ticker_id_resolution(benchmark, ticker_index):
+    symbols = ticker_index.prefixed("T002", 10)
+    assert len(benchmark(ticker_index.lookup, symbols)) == 10
+
+
+def test_serialize_page_full(benchmark, rows):
+    def encode():
+        return dumps({"items": [FULL.row_dict(row, t, c) for row, t, c in rows], "next_cursor": None})
+
+    assert benchmark(encode).startswith(b'{"items":')
+
+
+def test_serialize_page_sparse(benchmark, rows):
+    projection = Projection.parse("client_name,tickers,region")
+    sparse = [((row[0], row[1]) + tuple(row[2 + FULL.scalars.index(name)] for name in projection.scalars), t, c)
+              for row, t, c in rows]
+
+    def encode():
+        return dumps({"items": [projection.row_dict(row, t, c) for row, t, c in sparse], "next_cursor": None})
+
+    assert benchmark(encode).startswith(b'{"items":')
+
+
+def _compiled(session, filters: ClientFilter, q=None) -> str:
+    stmt = _client_list_statement(session, q, filters).limit(51)
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_build_list_query_unfiltered(benchmark, session):
+    assert "ORDER BY" in benchmark(_compiled, session, ClientFilter())
+
+
+def test_build_list_query_flags_and_ranges(benchmark, session):
+    filters = ClientFilter(regions=("EU", "UK"), esg_green=True, frn_buyer=False, tenor_covers=84, ois_min=100)
+    assert "int4range" in benchmark(_compiled, session, filters)
+
+
+def test_build_list_query_tags(benchmark, session):
+    # Includes the tag id lookup, which is part of building a tag filter.
+    filters = ClientFilter(tickers_all=("T00000",), currencies_any=("EUR", "USD"), currencies_none=("JPY",))
+    assert "WHERE" in benchmark(_compiled, session, filters)
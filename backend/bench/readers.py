@@ -0,0 +1,84 @@
+"""Concurrent read load against a running API server.
+
+Start the server twice, once per database path, and compare:
+
+    CLIENT_CACHE_MAX_ENTRIES=0 DB_ASYNC=0 uvicorn app.main:app --port 8000
+    python -m bench.readers --url http://127.0.0.1:8000 --concurrency 200
+
+    CLIENT_CACHE_MAX_ENTRIES=0 DB_ASYNC=1 uvicorn app.main:app --port 8000
+    python -m bench.readers --url http://127.0.0.1:8000 --concurrency 200
+
+The response cache is disabled so every request reaches the database.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+DEFAULT_PATHS = ["/clients?limit=50", "/clients?limit=50&currency=USD", "/clients?limit=50&q=client"]
+
+
+def _percentile(samples, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _reader(client: httpx.AsyncClient, paths, deadline: float, latencies, errors) -> None:
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as exc:
+            errors.append(type(exc).__name__)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run(url: str, concurrency: int, duration: float, paths) -> dict:
+    latencies = []
+    errors = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(_reader(client, paths, deadline, latencies, errors) for _ in range(concurrency))
+        )
+        elapsed = time.perf_counter() - started
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2) if latencies else 0.0,
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds")
+    parser.add_argument("--path", action="append", help="Request path; repeat to mix")
+    args = parser.parse_args()
+    result = asyncio.run(run(args.url, args.concurrency, args.duration, args.path or DEFAULT_PATHS))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
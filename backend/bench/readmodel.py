@@ -0,0 +1,98 @@
+"""Memory and latency of the in-memory read model against the ORM and SQL.
+
+Loads a synthetic book, then reports bytes per client for ORM ``Client``
+instances (with tickers and currencies loaded) and for the read model, and
+times list pages served by SQL and by the read model. Run against a scratch
+database; the book is truncated and regenerated:
+
+    DATABASE_URL=... python -m bench.readmodel --truncate --sizes 1000,10000,100000
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+
+from sqlalchemy.orm import selectinload
+
+from app.db import get_db_session
+from app.filters import ClientFilter
+from app.main import _list_clients_body
+from app.models import Client
+from app.readmodel import ClientBook, client_book
+from app.serialize import FULL
+
+from .data import load_book, reset_book, ticker_universe
+from .filters import _time
+
+
+def _bytes_per_client(build, n: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return size / n
+
+
+def _orm_book():
+    with get_db_session() as session:
+        clients = session.query(Client).options(selectinload(Client.tickers), selectinload(Client.currencies)).all()
+        # Keep the session (and its identity map) alive, as a cache would.
+        return session, clients
+
+
+def _read_model():
+    book = ClientBook(enabled=True)
+    with get_db_session() as session:
+        book.load(session)
+    return book
+
+
+def _scenarios(n: int):
+    tickers = ticker_universe(n)
+    return {
+        "first_page": ClientFilter(),
+        "ticker_head": ClientFilter(tickers_all=(tickers[0],)),
+        "tail_not_usd_green": ClientFilter(
+            tickers_any=(tickers[len(tickers) // 2],), currencies_none=("USD",), esg_green=True
+        ),
+        "tenor_7y_ois_100_150": ClientFilter(tenor_covers=84, ois_min=100, ois_max=150),
+    }
+
+
+def run(sizes, page_size: int):
+    results = []
+    for n in sizes:
+        reset_book()
+        load_book(n)
+        row = {
+            "clients": n,
+            "orm_bytes_per_client": round(_bytes_per_client(_orm_book, n)),
+            "read_model_bytes_per_client": round(_bytes_per_client(_read_model, n)),
+        }
+        with get_db_session() as session:
+            client_book.load(session)
+            for name, filters in _scenarios(n).items():
+                for enabled in (False, True):
+                    client_book.enabled = enabled
+                    page_ms = _time(lambda: _list_clients_body(session, None, filters, None, page_size, FULL))
+                    row[f"{name}_{'book' if enabled else 'sql'}_ms"] = round(page_ms, 3)
+        results.append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--truncate", action="store_true", help="Confirm the book may be wiped")
+    args = parser.parse_args()
+    if not args.truncate:
+        raise SystemExit("Refusing to run without --truncate: this wipes the clients table.")
+    sizes = [int(size) for size in args.sizes.split(",")]
+    print(json.dumps(run(sizes, args.page_size), indent=2))
+
+
+if __name__ == "__main__":
+    main()
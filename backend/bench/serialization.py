@@ -0,0 +1,109 @@
+"""Serialization cost of a client list response, without the database.
+
+Compares the old path (ORM objects -> ClientOut per row -> response_model
+validation -> stdlib json) against the current one (column rows -> dicts ->
+orjson) on synthetic clients:
+
+    python -m bench.serialization --clients 10000
+"""
+import argparse
+import json
+import time
+import uuid
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models import Client, Currency, Ticker
+from app.schemas import ClientListResponse, ClientOut
+from app.serialize import CLIENT_COLUMNS, FULL, dumps
+
+from .data import generate_clients
+
+
+def _orm_clients(payloads):
+    tickers = {}
+    currencies = {}
+    clients = []
+    for payload in payloads:
+        client = Client(id=uuid.uuid4(), **{k: v for k, v in payload.items() if k not in {"tickers", "currencies"}})
+        client.tickers = [tickers.setdefault(s, Ticker(symbol=s)) for s in payload["tickers"]]
+        client.currencies = [currencies.setdefault(c, Currency(code=c)) for c in payload["currencies"]]
+        clients.append(client)
+    return clients
+
+
+def _legacy(clients) -> bytes:
+    response = ClientListResponse(
+        items=[
+            ClientOut(
+                id=str(client.id),
+                client_name=client.client_name,
+                tickers=sorted([t.symbol for t in client.tickers]),
+                currencies=sorted([c.code for c in client.currencies]),
+                tenors_min=client.tenors_min,
+                tenors_max=client.tenors_max,
+                tenors_sweetspot=client.tenors_sweetspot,
+                frn_buyer=client.frn_buyer,
+                callable_buyer=client.callable_buyer,
+                private_placement_buyer=client.private_placement_buyer,
+                esg_green=client.esg_green,
+                esg_social=client.esg_social,
+                esg_sustainable=client.esg_sustainable,
+                target_spread_ois=client.target_spread_ois,
+                target_g_spread=client.target_g_spread,
+                toms_code=client.toms_code,
+                client_notes=client.client_notes,
+                region=client.region,
+            )
+            for client in clients
+        ]
+    )
+    # What FastAPI does with a returned model and response_model set.
+    validated = ClientListResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def _current(rows, tags) -> bytes:
+    items = [FULL.row_dict(row, sorted(tickers), sorted(currencies)) for row, (tickers, currencies) in zip(rows, tags)]
+    return dumps({"items": items, "next_cursor": None})
+
+
+def _best_ms(fn, *args, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = generate_clients(args.clients, seed=7)
+    clients = _orm_clients(payloads)
+    rows = [tuple(getattr(client, column.key) for column in CLIENT_COLUMNS) for client in clients]
+    tags = [([t.symbol for t in c.tickers], [c.code for c in c.currencies]) for c in clients]
+
+    legacy_ms = _best_ms(_legacy, clients, repeat=args.repeat)
+    current_ms = _best_ms(_current, rows, tags, repeat=args.repeat)
+    print(
+        json.dumps(
+            {
+                "clients": args.clients,
+                "legacy_ms": round(legacy_ms, 2),
+                "current_ms": round(current_ms, 2),
+                "speedup": round(legacy_ms / current_ms, 1),
+                "legacy_bytes": len(_legacy(clients)),
+                "current_bytes": len(_current(rows, tags)),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Import time and first-request latency, with budgets that fail the run.
+
+Import time is measured in fresh interpreters with DATABASE_URL unset, so
+it also checks that importing the app needs no database. First-request
+latency starts a uvicorn server on DATABASE_URL with and without the
+startup warm-up (DB_WARMUP) and times the first few requests after it
+reports healthy:
+
+    DATABASE_URL=... python -m bench.startup --max-import-ms 1500 --max-first-request-ms 250
+
+Exits non-zero when the import fails, an import builds an engine, or a
+measured median is over its budget, so it can gate CI.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import app.main; "
+    "elapsed = (time.perf_counter() - started) * 1000; "
+    "from app.db import database; "
+    "assert database._engine is None, 'importing app.main built an engine'; "
+    "print(elapsed)"
+)
+# The second request of each pair changes the limit: same statement shape,
+# but not a response cache hit.
+FIRST_REQUESTS = ("/clients?ticker_any=T00001", "/clients?ticker=T00002", "/clients?currency=EUR")
+
+
+def _import_ms(runs: int) -> list:
+    env = {key: value for key, value in os.environ.items() if key != "DATABASE_URL"}
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET], env=env, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise SystemExit(f"Importing app.main failed:\n{result.stderr}")
+        samples.append(float(result.stdout))
+    return samples
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _first_requests(warm_up: bool, timeout: float) -> dict:
+    port = _free_port()
+    env = dict(os.environ, DB_WARMUP="1" if warm_up else "0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        started = time.perf_counter()
+        with httpx.Client(base_url=base, timeout=30) as client:
+            while True:
+                try:
+                    client.get("/health")
+                    break
+                except httpx.TransportError:
+                    if time.perf_counter() - started > timeout:
+                        raise SystemExit("Server did not come up")
+                    time.sleep(0.05)
+            ready_ms = (time.perf_counter() - started) * 1000
+            result = {"ready_ms": round(ready_ms, 1)}
+            for path in FIRST_REQUESTS:
+                timings = []
+                for limit in (50, 49):
+                    request_started = time.perf_counter()
+                    client.get(path, params={"limit": limit}).raise_for_status()
+                    timings.append((time.perf_counter() - request_started) * 1000)
+                result[path] = {"first_ms": round(timings[0], 2), "second_ms": round(timings[1], 2)}
+        return result
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--import-runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, help="Fail if the median import takes longer")
+    parser.add_argument("--max-first-request-ms", type=float, help="Fail if a warmed first request takes longer")
+    parser.add_argument("--startup-timeout", type=float, default=120.0, help="Seconds")
+    args = parser.parse_args()
+
+    samples = _import_ms(args.import_runs)
+    report = {
+        "import_ms": {"median": round(statistics.median(samples), 1), "samples": [round(s, 1) for s in samples]},
+        "cold": _first_requests(False, args.startup_timeout),
+        "warm": _first_requests(True, args.startup_timeout),
+    }
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if args.max_import_ms is not None and report["import_ms"]["median"] > args.max_import_ms:
+        failures.append(f"import took {report['import_ms']['median']} ms (budget {args.max_import_ms} ms)")
+    if args.max_first_request_ms is not None:
+        for path in FIRST_REQUESTS:
+            first = report["warm"][path]["first_ms"]
+            if first > args.max_first_request_ms:
+                failures.append(f"first {path} took {first} ms (budget {args.max_first_request_ms} ms)")
+    if failures:
+        raise SystemExit("Over budget: " + "; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
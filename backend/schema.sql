@@ -17,7 +17,15 @@ CREATE TABLE clients (
   client_notes TEXT,
   region TEXT,
   created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  row_version BIGINT NOT NULL DEFAULT 0,
+  -- Numeric shadows of the tenor/spread text, maintained by app/terms.py.
+  tenors_min_months INTEGER,
+  tenors_max_months INTEGER,
+  tenors_sweetspot_months INTEGER,
+  target_spread_ois_bp INTEGER,
+  target_g_spread_bp INTEGER,
+  CHECK (tenors_min_months <= tenors_max_months)
 );
 
 CREATE TABLE tickers (
@@ -54,7 +62,44 @@ CREATE TABLE audit_log (
   changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
-CREATE INDEX idx_client_name ON clients (client_name);
+-- Version counters used for ETags. Row 1 is bumped by every write to the
+-- client book, row 2 by audit rows written after their change commits.
+CREATE TABLE data_version (
+  id INTEGER PRIMARY KEY CHECK (id IN (1, 2)),
+  version BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO data_version (id, version) VALUES (1, 0), (2, 0);
+
+-- Deleted client ids, so GET /clients/changes can report deletes.
+CREATE TABLE client_tombstones (
+  client_id UUID PRIMARY KEY,
+  version BIGINT NOT NULL,
+  deleted_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- List order and keyset cursors compare names under the C collation
+-- (code point order, as the in-memory read model sorts); see _name_order
+-- in app/main.py.
+CREATE INDEX idx_client_name ON clients (client_name COLLATE "C", id);
 CREATE INDEX idx_ticker_symbol ON tickers (symbol);
 CREATE INDEX idx_currency_code ON currencies (code);
-CREATE INDEX idx_audit_client ON audit_log (client_id, changed_at);
+CREATE INDEX idx_audit_client ON audit_log (client_id, changed_at, id);
+CREATE INDEX idx_audit_changed ON audit_log (changed_at, id);
+CREATE INDEX idx_client_row_version ON clients (row_version);
+CREATE INDEX idx_client_tombstones_version ON client_tombstones (version);
+-- Must match the tenor_covers clause in app/filters.py exactly.
+CREATE INDEX idx_client_tenor_range ON clients USING gist (
+  int4range(tenors_min_months, tenors_max_months, '[]')
+) WHERE tenors_min_months IS NOT NULL OR tenors_max_months IS NOT NULL;
+CREATE INDEX idx_client_ois_bp ON clients (target_spread_ois_bp);
+CREATE INDEX idx_client_tickers_ticker ON client_tickers (ticker_id, client_id);
+CREATE INDEX idx_client_currencies_currency ON client_currencies (currency_id, client_id);
+
+-- Search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX idx_client_name_trgm ON clients USING gin (client_name gin_trgm_ops);
+CREATE INDEX idx_client_toms_trgm ON clients USING gin (toms_code gin_trgm_ops);
+-- Must match SEARCH_DOCUMENT in app/search.py exactly.
+CREATE INDEX idx_client_search ON clients USING gin (
+  to_tsvector('simple', coalesce(client_name, '') || ' ' || coalesce(toms_code, '') || ' ' || coalesce(client_notes, ''))
+);
@@ -2,7 +2,10 @@ import os
 from typing import List
 
 from app.db import get_db_session
-from app.models import Client, Ticker, Currency
+from app.models import Client
+from app.tags import get_or_create_currencies, get_or_create_tickers
+from app.terms import numeric_values
+from app.versioning import data_version
 
 
 def _normalize(values: List[str]) -> List[str]:
@@ -19,28 +22,6 @@ def _normalize(values: List[str]) -> List[str]:
     return cleaned
 
 
-def _get_or_create_tickers(session, symbols: List[str]) -> List[Ticker]:
-    tickers = []
-    for symbol in _normalize(symbols):
-        existing = session.query(Ticker).filter(Ticker.symbol == symbol).first()
-        if not existing:
-            existing = Ticker(symbol=symbol)
-            session.add(existing)
-        tickers.append(existing)
-    return tickers
-
-
-def _get_or_create_currencies(session, codes: List[str]) -> List[Currency]:
-    currencies = []
-    for code in _normalize(codes):
-        existing = session.query(Currency).filter(Currency.code == code).first()
-        if not existing:
-            existing = Currency(code=code)
-            session.add(existing)
-        currencies.append(existing)
-    return currencies
-
-
 def seed():
     sample_clients = [
         {
@@ -103,6 +84,7 @@ def seed():
     ]
 
     with get_db_session() as session:
+        created = []
         for data in sample_clients:
             existing = (
                 session.query(Client)
@@ -128,12 +110,17 @@ def seed():
                 toms_code=data["toms_code"],
                 client_notes=data["client_notes"],
                 region=data["region"],
+                **numeric_values(data),
             )
 
-            client.tickers = _get_or_create_tickers(session, data["tickers"])
-            client.currencies = _get_or_create_currencies(session, data["currencies"])
             session.add(client)
+            created.append(client)
+            client.tickers = get_or_create_tickers(session, _normalize(data["tickers"]))
+            client.currencies = get_or_create_currencies(session, _normalize(data["currencies"]))
 
+        version = data_version.bump(session)
+        for client in created:
+            client.row_version = version
         session.commit()
 
 
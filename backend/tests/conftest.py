@@ -0,0 +1,22 @@
+import os
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+
+@pytest.fixture
+def session():
+    """A session on DATABASE_URL whose changes are rolled back afterwards."""
+    if not os.getenv("DATABASE_URL"):
+        pytest.skip("DATABASE_URL is not set")
+    from app.db import get_db_session
+
+    with get_db_session() as session:
+        try:
+            session.connection()
+        except OperationalError as exc:
+            pytest.skip(f"database unavailable: {exc}")
+        try:
+            yield session
+        finally:
+            session.rollback()
@@ -0,0 +1,111 @@
+"""The async audit writer: spooling before commit, replay after a crash, versioning.
+
+Apart from the configuration check, needs DATABASE_URL pointing at a
+Postgres database with clients in it; skipped otherwise. Inserted audit
+rows are deleted afterwards.
+"""
+import time
+import uuid
+
+import pytest
+from sqlalchemy import delete, select
+
+from app import audit
+from app.audit import AuditWriter
+from app.db import get_db_session
+from app.models import AuditLog, Client
+from app.versioning import audit_version, data_version
+
+FIELD = "test_audit"
+
+
+@pytest.fixture
+def writers(session, monkeypatch):
+    """Swaps in async writers (the commit hooks use the module's writer) and cleans up."""
+    created = []
+
+    def install(writer: AuditWriter) -> AuditWriter:
+        monkeypatch.setattr(audit, "audit_writer", writer)
+        created.append(writer)
+        return writer
+
+    yield install
+    for writer in created:
+        writer.stop()
+    with get_db_session() as cleanup:
+        cleanup.execute(delete(AuditLog).where(AuditLog.field_name == FIELD))
+        cleanup.commit()
+
+
+def _change(writer: AuditWriter, commit: bool, before_commit=None) -> uuid.UUID:
+    with get_db_session() as session:
+        row = {
+            "id": uuid.uuid4(),
+            "client_id": session.scalar(select(Client.id).limit(1)),
+            "user_id": None,
+            "field_name": FIELD,
+            "old_value": "old",
+            "new_value": "new",
+        }
+        writer.write(session, [row])
+        if before_commit is not None:
+            before_commit(row["id"])
+        if commit:
+            session.commit()
+        else:
+            session.rollback()
+    return row["id"]
+
+
+def _stored(ids) -> set:
+    with get_db_session() as session:
+        return set(session.scalars(select(AuditLog.id).where(AuditLog.id.in_(list(ids)))))
+
+
+def test_rows_are_spooled_before_commit_and_bump_only_the_audit_version(tmp_path, writers, session):
+    writer = writers(AuditWriter(mode="async", flush_interval=0.05, spool_dir=str(tmp_path)))
+    writer.start()
+    client_version = data_version.load(session)
+    version = audit_version.load(session)
+    session.rollback()
+
+    def spooled(row_id):
+        assert str(row_id).encode() in writer._spool_path.read_bytes()
+
+    row_id = _change(writer, commit=True, before_commit=spooled)
+    deadline = time.monotonic() + 10
+    while not _stored([row_id]) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert _stored([row_id]) == {row_id}
+    assert audit_version.load(session) > version
+    assert data_version.load(session) == client_version
+
+
+def test_replay_keeps_committed_rows_and_drops_rolled_back_ones(tmp_path, writers):
+    # A writer whose thread never runs: rows are spooled and queued, never flushed.
+    crashed = writers(AuditWriter(mode="async", spool_dir=str(tmp_path)))
+    crashed._spool_path = tmp_path / "audit-0-crashed.jsonl"
+    crashed._open_spool()
+    committed = _change(crashed, commit=True)
+    rolled_back = _change(crashed, commit=False)
+    crashed._spool.close()
+    crashed._spool = None
+    assert _stored([committed, rolled_back]) == set()
+
+    AuditWriter(mode="async", spool_dir=str(tmp_path))._recover()
+    assert _stored([committed, rolled_back]) == {committed}
+    assert not list(tmp_path.glob("audit-*"))
+
+
+def test_async_mode_is_refused_on_other_databases(tmp_path, monkeypatch):
+    with pytest.raises(ValueError, match="needs a Postgres database, not sqlite"):
+        AuditWriter(mode="async", spool_dir=str(tmp_path), dialect="sqlite")
+    monkeypatch.setenv("AUDIT_MODE", "async")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'audit.db'}")
+    with pytest.raises(ValueError, match="needs a Postgres database"):
+        AuditWriter.from_env()
+    monkeypatch.setenv("DATABASE_URL", "postgresql+psycopg2://postgres@/postgres")
+    assert AuditWriter.from_env().is_async
+    monkeypatch.setenv("AUDIT_MODE", "sync")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'audit.db'}")
+    assert not AuditWriter.from_env().is_async
@@ -0,0 +1,42 @@
+"""POST /clients/bulk: parsing bodies, which needs no database, and importing rows."""
+import pytest
+from fastapi import HTTPException
+
+from app.main import _import_clients, _parse_bulk_rows
+from app.schemas import ClientCreate
+from app.versioning import data_version
+
+
+@pytest.mark.parametrize("content_type", ["text/csv", "application/x-ndjson", "application/json"])
+def test_non_utf8_body_is_a_client_error(content_type):
+    with pytest.raises(HTTPException) as excinfo:
+        _parse_bulk_rows(content_type, b"\xff\xfe\x00bad")
+    assert excinfo.value.status_code == 400
+    assert excinfo.value.detail == "Body must be UTF-8"
+
+
+def test_csv_with_byte_order_mark():
+    rows, errors = _parse_bulk_rows("text/csv", "\ufeffclient_name,tickers\nAcme,\"aapl, msft\"\n".encode())
+    assert rows == [(0, {"client_name": "Acme", "tickers": ["AAPL", "MSFT"]})]
+    assert errors == []
+
+
+def test_csv_cells_starting_with_a_quote_are_kept():
+    body = "client_name,client_notes\n'=Acme,'+1 call\n'Quoted,plain\n".encode()
+    rows, errors = _parse_bulk_rows("text/csv", body)
+    assert [row for _, row in rows] == [
+        {"client_name": "'=Acme", "client_notes": "'+1 call"},
+        {"client_name": "'Quoted", "client_notes": "plain"},
+    ]
+    assert errors == []
+
+
+def test_import_with_no_rows_inserted_keeps_the_data_version(session):
+    if session.get_bind().dialect.name != "postgresql":
+        pytest.skip("needs Postgres, which rejects NUL in text")
+    before = data_version.load(session)
+    session.rollback()
+    ids, errors = _import_clients(session, [(0, ClientCreate(client_name="bad\x00name"))])
+    assert ids == []
+    assert [error.index for error in errors] == [0]
+    assert data_version.load(session) == before
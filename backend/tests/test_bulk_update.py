@@ -0,0 +1,72 @@
+"""PATCH /clients: one version bump per batch, which clears the response cache; on SQLite."""
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app import main
+from app.cache import client_cache
+from app.main import _bulk_update_clients
+from app.models import AuditLog, Base, Client, DataVersion
+from app.schemas import ClientPatch, ClientUpdate
+from app.versioning import DataVersion as Version
+
+
+@pytest.fixture
+def sqlite_session(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    # A version of its own, so whether it advances doesn't depend on other tests.
+    monkeypatch.setattr(main, "data_version", Version(ttl_seconds=60))
+    with Session(engine) as session:
+        session.add(DataVersion(id=1, version=1))
+        session.add_all(Client(client_name=name, region="EU", row_version=1) for name in ("Acme", "Beta", "Cora"))
+        session.commit()
+        main.data_version.load(session)
+        yield session
+
+
+def _patch(client: Client, **changes) -> ClientPatch:
+    return ClientPatch(id=str(client.id), changes=ClientUpdate(**changes))
+
+
+def _cached_page() -> tuple:
+    key = client_cache.key("list", "test_bulk_update")
+    client_cache.put(key, b"[]")
+    assert client_cache.get(key) == b"[]"
+    return key
+
+
+def test_batch_bumps_the_version_once_and_clears_the_cache(sqlite_session):
+    acme, beta, cora = sqlite_session.scalars(select(Client).order_by(Client.client_name)).all()
+    key = _cached_page()
+
+    response = _bulk_update_clients(
+        sqlite_session,
+        [
+            _patch(acme, client_notes="renewed"),
+            _patch(beta, region="US"),
+            _patch(cora, region="EU"),
+            ClientPatch(id=str(uuid.uuid4()), changes=ClientUpdate(region="US")),
+            ClientPatch(id="not-a-uuid", changes=ClientUpdate(region="US")),
+        ],
+    )
+    assert response.updated == 2
+    assert [item.status for item in response.items] == ["updated", "updated", "unchanged", "not_found", "invalid"]
+    assert sqlite_session.get(DataVersion, 1).version == 2
+    assert main.data_version.cached() == 2
+    assert client_cache.get(key) is None
+    sqlite_session.expire_all()
+    assert [client.row_version for client in (acme, beta, cora)] == [2, 2, 1]
+    assert sorted(sqlite_session.scalars(select(AuditLog.field_name))) == ["client_notes", "region"]
+
+
+def test_batch_without_changes_leaves_the_version_and_cache(sqlite_session):
+    acme, beta, _ = sqlite_session.scalars(select(Client).order_by(Client.client_name)).all()
+    key = _cached_page()
+
+    response = _bulk_update_clients(sqlite_session, [_patch(acme, region="EU"), _patch(beta, client_name="Beta")])
+    assert response.updated == 0
+    assert sqlite_session.get(DataVersion, 1).version == 1
+    assert client_cache.get(key) == b"[]"
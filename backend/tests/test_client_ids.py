@@ -0,0 +1,61 @@
+"""Malformed and unknown ids on GET, PATCH and DELETE /clients/{id}.
+
+Runs the app in a fresh process (the engine is bound to DATABASE_URL on
+first use) against a throwaway SQLite database, and against DATABASE_URL
+too when it is set. Nothing is written: every id is invalid or unknown.
+"""
+import json
+import os
+import subprocess
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+SCRIPT = """
+import asyncio, json, sys
+import httpx
+from app.main import app
+
+async def main(requests):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        responses = [await client.request(method, path, json=body) for method, path, body in requests]
+    print(json.dumps([response.status_code for response in responses]))
+
+asyncio.run(main(json.loads(sys.argv[1])))
+"""
+
+CREATE_TABLES = "from sqlalchemy import create_engine; from app.models import Base; import sys; Base.metadata.create_all(create_engine(sys.argv[1]))"
+
+
+DATABASES = [
+    pytest.param("sqlite", id="sqlite"),
+    pytest.param(
+        os.getenv("DATABASE_URL"),
+        id="database_url",
+        marks=pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="DATABASE_URL is not set"),
+    ),
+]
+
+
+@pytest.mark.parametrize("database_url", DATABASES)
+def test_bad_id_is_400_and_unknown_id_is_404(database_url, tmp_path):
+    env = dict(os.environ, DB_ASYNC="0")
+    if database_url == "sqlite":
+        database_url = f"sqlite:///{tmp_path / 'clients.db'}"
+        subprocess.run([sys.executable, "-c", CREATE_TABLES, database_url], cwd=BACKEND, env=env, check=True)
+    env["DATABASE_URL"] = database_url
+    unknown = str(uuid.uuid4())
+    requests = [
+        (method, f"/clients/{client_id}", {"client_notes": "x"} if method == "PATCH" else None)
+        for client_id in ("not-a-uuid", unknown)
+        for method in ("GET", "PATCH", "DELETE")
+    ]
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT, json.dumps(requests)], cwd=BACKEND, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout.splitlines()[-1]) == [400, 400, 400, 404, 404, 404]
@@ -0,0 +1,81 @@
+"""Content-Encoding negotiation, the compression middleware and per-coding ETags."""
+import asyncio
+import os
+
+import httpx
+import pytest
+from fastapi import FastAPI, Response
+
+from app.compression import Compression, CompressionMiddleware
+
+BODY = b'{"items": [' + b",".join(b'{"client_name": "Client %d"}' % i for i in range(200)) + b"]}"
+
+
+def _get(app, path: str, **headers) -> httpx.Response:
+    async def get():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get(path, headers=headers)
+
+    return asyncio.run(get())
+
+
+def _middleware_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, compression=Compression(True, 1024, ("gzip",)))
+
+    @app.get("/big")
+    def big():
+        return Response(BODY, media_type="application/json", headers={"ETag": '"5"'})
+
+    @app.get("/small")
+    def small():
+        return Response(b"{}", media_type="application/json", headers={"ETag": '"5"'})
+
+    return app
+
+
+def test_negotiate_prefers_client_weights_then_server_order():
+    compression = Compression(True, 1024, ("zstd", "br", "gzip"))
+    assert compression.negotiate("gzip;q=1, br;q=0.5") == "gzip"
+    assert compression.negotiate("gzip, br") == "br"
+    assert compression.negotiate("identity") is None
+    assert compression.negotiate("*;q=0") is None
+
+
+def test_middleware_gives_compressed_bodies_their_own_etag():
+    response = _get(_middleware_app(), "/big", **{"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == '"5-gzip"'
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.content == BODY
+
+
+def test_middleware_leaves_small_bodies_alone():
+    response = _get(_middleware_app(), "/small", **{"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"5"'
+
+
+@pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="DATABASE_URL is not set")
+def test_conditional_json_etag_per_coding(monkeypatch):
+    from app.main import app, compression
+
+    # Compress every body, so the test doesn't depend on how big the book is.
+    monkeypatch.setattr(compression, "min_bytes", 0)
+    plain = _get(app, "/clients?limit=5", **{"Accept-Encoding": "identity"})
+    compressed = _get(app, "/clients?limit=5", **{"Accept-Encoding": "gzip"})
+    assert plain.status_code == compressed.status_code == 200
+    assert "content-encoding" not in plain.headers
+    assert compressed.headers["content-encoding"] == "gzip"
+    version = plain.headers["etag"].strip('"')
+    assert compressed.headers["etag"] == f'"{version}-gzip"'
+    # httpx decodes the body, so this checks the gzip bytes decompress to the plain body.
+    assert compressed.content == plain.content
+
+    # Either form names the same version; the 304 echoes the client's tag.
+    for tag in (f'"{version}"', f'"{version}-gzip"', f'W/"{version}-gzip"'):
+        response = _get(app, "/clients?limit=5", **{"Accept-Encoding": "gzip", "If-None-Match": tag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == tag.removeprefix("W/")
+    stale = _get(app, "/clients?limit=5", **{"If-None-Match": f'"{int(version) - 1}-gzip"'})
+    assert stale.status_code == 200
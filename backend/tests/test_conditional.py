@@ -0,0 +1,75 @@
+"""Conditional GET: If-None-Match against the data version, and 304 Not Modified.
+
+The request-level test needs DATABASE_URL, and bumps its data version.
+"""
+import asyncio
+import os
+
+import httpx
+import pytest
+from starlette.requests import Request
+
+from app.main import _etag_matched
+
+
+def _request(if_none_match: str) -> Request:
+    return Request({"type": "http", "headers": [(b"if-none-match", if_none_match.encode())]})
+
+
+@pytest.mark.parametrize(
+    "header, version, matched",
+    [
+        ('"17"', "17", '"17"'),
+        ('"17-gzip"', "17", '"17-gzip"'),
+        ('W/"17-br"', "17", '"17-br"'),
+        ('"15", "16" , "17-zstd"', "17", '"17-zstd"'),
+        ("*", "17", '"17"'),
+        ('"17.4"', "17.4", '"17.4"'),
+        ('"16"', "17", None),
+        ('"170"', "17", None),
+        ('"1"', "17", None),
+        ('"17"', "17.4", None),
+        ('"17.3"', "17.4", None),
+        ("", "17", None),
+    ],
+)
+def test_etag_matched(header, version, matched):
+    assert _etag_matched(_request(header), version) == matched
+
+
+def _get(app, path: str, **headers) -> httpx.Response:
+    async def get():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get(path, headers=headers)
+
+    return asyncio.run(get())
+
+
+@pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="DATABASE_URL is not set")
+def test_matching_if_none_match_is_304_until_the_next_write(session):
+    from app.main import app
+    from app.versioning import data_version
+
+    listed = _get(app, "/clients?limit=1", **{"Accept-Encoding": "identity"})
+    assert listed.status_code == 200
+    items = listed.json()["items"]
+    paths = ["/clients?limit=1"] + [f"/clients/{item['id']}" for item in items]
+    for path in paths:
+        first = _get(app, path, **{"Accept-Encoding": "identity"})
+        etag = first.headers["etag"]
+        again = _get(app, path, **{"Accept-Encoding": "identity", "If-None-Match": etag})
+        assert again.status_code == 304, path
+        assert again.content == b""
+        assert again.headers["etag"] == etag
+        listed_with_others = _get(app, path, **{"If-None-Match": f'"0", {etag}'})
+        assert listed_with_others.status_code == 304, path
+
+    # A write bumps the version, so the tags handed out before it go stale.
+    old = listed.headers["etag"]
+    version = data_version.bump(session)
+    session.commit()
+    data_version.observe(version)
+    for path in paths:
+        response = _get(app, path, **{"Accept-Encoding": "identity", "If-None-Match": old})
+        assert response.status_code == 200, path
+        assert response.headers["etag"] == f'"{version}"'
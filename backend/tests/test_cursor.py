@@ -0,0 +1,90 @@
+"""Keyset cursors: encoding round-trips, and paging through ties in the list order.
+
+Runs against SQLite, so the ranked case goes through the fallback search.
+"""
+import json
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.filters import ClientFilter
+from app.main import _cursor_values, _decode_cursor, _encode_cursor, _list_clients_body
+from app.models import Base, Client
+from app.readmodel import client_book
+from app.search import fallback_index
+from app.serialize import Projection
+
+# Repeated names tie on client_name, and on rank for a search matching them.
+NAMES = ["Same Fund"] * 5 + ["same fund"] * 2 + ["Same Fund II", "Other", "Zoë Capital"]
+NAME_ONLY = Projection(("client_name",))
+
+
+@pytest.fixture
+def sqlite_session(monkeypatch):
+    monkeypatch.setattr(client_book, "enabled", False)
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    fallback_index.reset()
+    with Session(engine) as session:
+        session.add_all(Client(client_name=name) for name in NAMES)
+        session.commit()
+        yield session
+    fallback_index.reset()
+
+
+def _items(session, q, after, limit) -> dict:
+    return json.loads(_list_clients_body(session, q, ClientFilter(), after, limit, NAME_ONLY))
+
+
+def _paged(session, q, limit) -> list:
+    items, after = [], None
+    while True:
+        body = _items(session, q, after, limit)
+        items.extend(body["items"])
+        if body["next_cursor"] is None:
+            return items
+        after = _decode_cursor(body["next_cursor"], ranked=bool(q))
+
+
+def test_cursor_round_trip():
+    client_id = uuid.uuid4()
+    cursor = _encode_cursor(["Zoë Capital", client_id])
+    assert "=" not in cursor
+    assert _decode_cursor(cursor, ranked=False) == ("Zoë Capital", client_id)
+    ranked = _encode_cursor([1.25, "Same Fund", client_id])
+    assert _cursor_values(ranked) == [1.25, "Same Fund", str(client_id)]
+    assert _decode_cursor(ranked, ranked=True) == (1.25, "Same Fund", client_id)
+
+
+@pytest.mark.parametrize(
+    "cursor, ranked",
+    [
+        ("not base64!", False),
+        (_encode_cursor([]), False),
+        (_encode_cursor(["Same Fund", "not-a-uuid"]), False),
+        (_encode_cursor([1.0, "Same Fund", str(uuid.uuid4())]), False),
+        (_encode_cursor(["Same Fund", str(uuid.uuid4())]), True),
+        (_encode_cursor(["high", "Same Fund", str(uuid.uuid4())]), True),
+    ],
+)
+def test_malformed_cursor_is_400(cursor, ranked):
+    with pytest.raises(HTTPException) as excinfo:
+        _decode_cursor(cursor, ranked)
+    assert excinfo.value.status_code == 400
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 4])
+def test_paging_through_ties_visits_every_client_once(sqlite_session, limit):
+    everything = _items(sqlite_session, None, None, None)["items"]
+    assert [item["client_name"] for item in everything] == sorted(NAMES)
+    assert _paged(sqlite_session, None, limit) == everything
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3])
+def test_paging_ranked_results_through_rank_ties(sqlite_session, limit):
+    everything = _items(sqlite_session, "same fund", None, None)["items"]
+    assert len(everything) == 8
+    assert _paged(sqlite_session, "same fund", limit) == everything
@@ -0,0 +1,94 @@
+"""Database: engines built on first use, and dropped (not closed) in forked children."""
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+from app.db import Database
+
+BACKEND = Path(__file__).resolve().parents[1]
+DRIVERS = ("psycopg2", "asyncpg", "aiosqlite")
+
+
+def test_importing_the_app_needs_no_database():
+    snippet = (
+        "import json, sys; import app.main; from app.db import database; "
+        f"print(json.dumps([database._engine is None, [m for m in {DRIVERS!r} if m in sys.modules]]))"
+    )
+    env = {key: value for key, value in os.environ.items() if key != "DATABASE_URL"}
+    result = subprocess.run([sys.executable, "-c", snippet], cwd=BACKEND, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout.splitlines()[-1]) == [True, []]
+
+
+def test_engine_is_built_once_on_first_use(tmp_path, monkeypatch):
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    database = Database()
+    with pytest.raises(RuntimeError, match="DATABASE_URL is not set"):
+        database.engine
+
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'lazy.db'}")
+    assert database._engine is None
+    engines = []
+    threads = [threading.Thread(target=lambda: engines.append(database.engine)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(engine) for engine in engines}) == 1
+    assert database.sessions.kw["bind"] is engines[0]
+    with database.sessions() as session:
+        assert session.scalar(text("SELECT 1")) == 1
+    database.engine.dispose()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_opens_its_own_connections(session):
+    # The module-level database, whose after_fork runs via os.register_at_fork.
+    from app.db import database
+
+    if session.get_bind().dialect.name != "postgresql":
+        pytest.skip("needs Postgres for pg_backend_pid()")
+    engine = database.engine
+    engine.dispose()
+    # One connection idle in the pool and one in use when the process forks.
+    idle, held = engine.connect(), engine.connect()
+    pooled = idle.scalar(text("SELECT pg_backend_pid()"))
+    held_pid = held.scalar(text("SELECT pg_backend_pid()"))
+    idle.close()
+    assert engine.pool.checkedin() == 1
+
+    read_end, write_end = os.pipe()
+    child = os.fork()
+    if child == 0:
+        code = 1
+        try:
+            os.close(read_end)
+            with database.engine.connect() as connection:
+                report = {
+                    "same_engine": database.engine is engine,
+                    "pid": connection.scalar(text("SELECT pg_backend_pid()")),
+                }
+            with os.fdopen(write_end, "w") as pipe:
+                pipe.write(json.dumps(report))
+            code = 0
+        finally:
+            os._exit(code)
+
+    os.close(write_end)
+    with os.fdopen(read_end) as pipe:
+        report = json.loads(pipe.read() or "null")
+    assert os.waitpid(child, 0)[1] == 0
+    # The child keeps the engine but opens its own server connection...
+    assert report["same_engine"] is True
+    assert report["pid"] not in (pooled, held_pid)
+    # ...and the parent's connections, idle and in use, are still open.
+    assert held.scalar(text("SELECT pg_backend_pid()")) == held_pid
+    held.close()
+    with engine.connect() as connection:
+        assert connection.scalar(text("SELECT pg_backend_pid()")) == pooled
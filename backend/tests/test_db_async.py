@@ -0,0 +1,87 @@
+"""Concurrent requests on the DB_ASYNC path.
+
+With DB_ASYNC=1, run_db runs handlers through AsyncSession.run_sync on the
+event loop thread, and the session yields to other requests while it waits
+on the database. Anything holding a threading.Lock across a query then
+blocks the loop for good once a second request wants the same lock. Each
+test starts a fresh process (DB_ASYNC is read at import), fires requests
+at once through the ASGI app and fails if they don't all finish.
+
+Needs DATABASE_URL pointing at a Postgres database with tables from
+schema.sql, and asyncpg; skipped otherwise. Only reads.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parents[1]
+TIMEOUT_SECONDS = 120
+CONCURRENCY = 4
+
+SCRIPT = """
+import asyncio, json, sys
+import httpx
+from app.main import app
+
+async def main(requests):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+        responses = await asyncio.gather(
+            *(client.request(method, path, json=body) for method, path, body in requests)
+        )
+    print(json.dumps([response.status_code for response in responses]))
+
+asyncio.run(main(json.loads(sys.argv[1])))
+"""
+
+pytestmark = [
+    pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="DATABASE_URL is not set"),
+    pytest.mark.skipif(
+        subprocess.run([sys.executable, "-c", "import asyncpg"], capture_output=True).returncode != 0,
+        reason="asyncpg is not installed",
+    ),
+]
+
+
+def _concurrently(requests, **env) -> list:
+    """Status codes of ``requests`` ((method, path, json body) each), sent at once."""
+    try:
+        result = subprocess.run(
+            [sys.executable, "-c", SCRIPT, json.dumps(requests)],
+            cwd=BACKEND,
+            env=dict(os.environ, DB_ASYNC="1", **env),
+            capture_output=True,
+            text=True,
+            timeout=TIMEOUT_SECONDS,
+        )
+    except subprocess.TimeoutExpired:
+        pytest.fail(f"requests did not finish within {TIMEOUT_SECONDS}s; the event loop is blocked")
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_concurrent_match():
+    body = {"currency": "EUR", "tenor": "5Y", "limit": 5}
+    assert _concurrently([("POST", "/match", body)] * CONCURRENCY) == [200] * CONCURRENCY
+
+
+def test_concurrent_read_model_requests():
+    # The read model is loaded by the app's lifespan, which ASGITransport
+    # doesn't run, so the first requests all race to load it.
+    requests = [
+        ("GET", "/clients?limit=20", None),
+        ("GET", "/clients?currency=EUR&limit=20", None),
+        ("GET", "/clients/facets?currency=USD", None),
+        ("GET", "/clients/facets", None),
+    ]
+    assert _concurrently(requests, READ_MODEL="1") == [200] * len(requests)
+
+
+def test_concurrent_tag_autocomplete():
+    requests = [("GET", f"/tickers?prefix=T{digit}", None) for digit in range(CONCURRENCY)]
+    requests += [("GET", "/currencies?prefix=E", None), ("GET", "/currencies", None)]
+    assert _concurrently(requests) == [200] * len(requests)
@@ -0,0 +1,39 @@
+"""Export encoders: the abstract base, and CSV escaping against formula injection; needs no database."""
+import csv
+import io
+
+import pytest
+
+from app.export import CsvEncoder, Encoder
+
+NAMES = ["=HYPERLINK(\"http://x\")", "+1", "-2", "@SUM(A1)", "\tTab", "'=quoted", "O'Brien", "Acme"]
+
+
+def _export(items, fields=("client_name", "tickers")) -> str:
+    encoder = CsvEncoder(fields)
+    return (encoder.write(items) + encoder.finish()).decode()
+
+
+def test_formula_cells_are_quoted():
+    items = [{"client_name": name, "tickers": ["AAPL"]} for name in NAMES]
+    cells = [row[0] for row in csv.reader(io.StringIO(_export(items)))][1:]
+    assert cells == [
+        "'=HYPERLINK(\"http://x\")",
+        "'+1",
+        "'-2",
+        "'@SUM(A1)",
+        "'\tTab",
+        "'=quoted",
+        "O'Brien",
+        "Acme",
+    ]
+
+
+def test_tag_cells_are_quoted_by_their_first_value():
+    items = [{"client_name": "Acme", "tickers": ["-X", "AAPL"]}]
+    assert list(csv.reader(io.StringIO(_export(items))))[1] == ["Acme", "'-X,AAPL"]
+
+
+def test_encoders_must_implement_write():
+    with pytest.raises(TypeError):
+        Encoder(["client_name"])
@@ -0,0 +1,85 @@
+"""ClientFilter semantics in SQL, on a small book in SQLite."""
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.filters import ClientFilter
+from app.models import Base, Client, Currency, Ticker
+from app.terms import apply_numeric_values
+
+BOOK = {
+    "Acme": dict(
+        tickers=["AAPL", "MSFT"],
+        currencies=["USD"],
+        region="eu",
+        frn_buyer=True,
+        tenors_min="2Y",
+        tenors_max="10Y",
+        target_spread_ois="OIS+110",
+    ),
+    "Beta": dict(
+        tickers=["AAPL"],
+        currencies=["EUR", "USD"],
+        region="US",
+        callable_buyer=True,
+        tenors_min="5Y",
+        target_spread_ois="90",
+    ),
+    "Cora": dict(tickers=["MSFT"], currencies=["EUR"], tenors_max="3Y"),
+    "Dune": dict(region="Eu"),
+}
+
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    tickers = {symbol: Ticker(symbol=symbol) for symbol in ("AAPL", "MSFT", "IBM")}
+    currencies = {code: Currency(code=code) for code in ("EUR", "USD")}
+    with Session(engine) as session:
+        for name, fields in BOOK.items():
+            fields = dict(fields)
+            client = Client(
+                client_name=name,
+                tickers=[tickers[symbol] for symbol in fields.pop("tickers", [])],
+                currencies=[currencies[code] for code in fields.pop("currencies", [])],
+                **fields,
+            )
+            apply_numeric_values(client)
+            session.add(client)
+        session.commit()
+        yield session
+
+
+@pytest.mark.parametrize(
+    "filters, names",
+    [
+        (ClientFilter(), ["Acme", "Beta", "Cora", "Dune"]),
+        (ClientFilter(tickers_all=("AAPL", "MSFT")), ["Acme"]),
+        (ClientFilter(tickers_any=("AAPL", "MSFT")), ["Acme", "Beta", "Cora"]),
+        (ClientFilter(tickers_none=("AAPL",)), ["Cora", "Dune"]),
+        # Known tags nobody holds, and tags that don't exist at all.
+        (ClientFilter(tickers_all=("IBM",)), []),
+        (ClientFilter(tickers_all=("AAPL", "NOPE")), []),
+        (ClientFilter(tickers_any=("NOPE",)), []),
+        (ClientFilter(tickers_any=("NOPE", "MSFT")), ["Acme", "Cora"]),
+        (ClientFilter(tickers_none=("NOPE",)), ["Acme", "Beta", "Cora", "Dune"]),
+        (ClientFilter(tickers_any=("AAPL",), currencies_all=("EUR",)), ["Beta"]),
+        (ClientFilter(currencies_any=("EUR",), currencies_none=("USD",)), ["Cora"]),
+        (ClientFilter(regions=("EU",)), ["Acme", "Dune"]),
+        (ClientFilter(regions=("EU", "US")), ["Acme", "Beta", "Dune"]),
+        (ClientFilter(frn_buyer=True), ["Acme"]),
+        (ClientFilter(frn_buyer=False), ["Beta", "Cora", "Dune"]),
+        (ClientFilter(frn_buyer=False, callable_buyer=True), ["Beta"]),
+        # Open-ended ranges: Beta from 5Y up, Cora up to 3Y; Dune has none.
+        (ClientFilter(tenor_covers=24), ["Acme", "Cora"]),
+        (ClientFilter(tenor_covers=48), ["Acme"]),
+        (ClientFilter(tenor_covers=360), ["Beta"]),
+        (ClientFilter(ois_min=100), ["Acme"]),
+        (ClientFilter(ois_max=100), ["Beta"]),
+        (ClientFilter(ois_min=90, ois_max=110), ["Acme", "Beta"]),
+    ],
+)
+def test_filter_clauses(sqlite_session, filters, names):
+    stmt = select(Client.client_name).where(*filters.clauses(sqlite_session)).order_by(Client.client_name)
+    assert list(sqlite_session.scalars(stmt)) == names
@@ -0,0 +1,45 @@
+"""The SQL list order and keyset cursors match the read model's order."""
+import uuid
+
+from app.filters import ClientFilter
+from app.main import _client_list_statement
+from app.models import Client
+from app.serialize import Projection
+
+# Mixed case, accents and punctuation sort differently under most locale
+# collations than by code point.
+NAMES = ["beta", "Alpha", "Émile", "alpha", "Zulu", "_under", "émile", "Ålesund", "a b", "a-b", "ab"]
+REGION = "ZZ-ORDER-TEST"
+NAME_ONLY = Projection(("client_name",))
+
+
+def _page(session, after, limit):
+    stmt = _client_list_statement(session, None, ClientFilter(regions=(REGION,)), after, NAME_ONLY).limit(limit)
+    return [(row.client_name, str(row.id)) for row in session.execute(stmt)]
+
+
+def test_sql_order_matches_code_point_order(session):
+    session.add_all(Client(id=uuid.uuid4(), client_name=name, region=REGION) for name in NAMES)
+    session.flush()
+
+    keys = _page(session, None, len(NAMES))
+    # ClientBook keeps (client_name, id) keys sorted with Python comparison.
+    assert keys == sorted(keys)
+    assert len(keys) == len(NAMES)
+
+    paged, after = [], None
+    while True:
+        page = _page(session, after, 3)
+        if not page:
+            break
+        paged.extend(page)
+        after = (page[-1][0], uuid.UUID(page[-1][1]))
+    assert paged == keys
+
+
+def test_order_and_cursor_pin_the_c_collation(session):
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    after = ("m", uuid.UUID(int=0))
+    sql = str(_client_list_statement(session, None, ClientFilter(), after).compile(session.get_bind()))
+    assert sql.count('COLLATE "C"') == 2, sql
@@ -0,0 +1,68 @@
+"""Client ids in the match snapshot and read model on a backend without a
+native uuid type (SQLite), where a SQL cast to text gives undashed hex."""
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session
+
+from app.matching import ClientSnapshot, Issue
+from app.models import Base, Client, ClientTombstone, Currency, DataVersion, Ticker
+from app.readmodel import ClientBook
+from app.versioning import data_version
+
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(DataVersion(id=1, version=1))
+        session.commit()
+        yield session
+
+
+def _bump(session) -> int:
+    version = session.get(DataVersion, 1).version + 1
+    session.execute(update(DataVersion).where(DataVersion.id == 1).values(version=version))
+    return version
+
+
+def _client(name: str, version: int) -> Client:
+    return Client(
+        client_name=name,
+        tickers=[Ticker(symbol=name.upper())],
+        currencies=[Currency(code=name[:3].upper())],
+        row_version=version,
+    )
+
+
+def test_snapshot_ids_are_dashed_through_updates_and_deletes(sqlite_session):
+    acme, beta = _client("acme", 1), _client("beta", 1)
+    sqlite_session.add_all([acme, beta])
+    sqlite_session.commit()
+    snapshot = ClientSnapshot()
+    snapshot.refresh(sqlite_session)
+    assert sorted(snapshot.ids) == sorted([str(acme.id), str(beta.id)])
+    assert [item["id"] for item in snapshot.top(Issue(ticker="ACME"), 5)] == [str(acme.id)]
+
+    version = _bump(sqlite_session)
+    acme.row_version = version
+    acme.client_name = "Acme Renamed"
+    sqlite_session.delete(beta)
+    sqlite_session.add(ClientTombstone(client_id=beta.id, version=version))
+    sqlite_session.commit()
+    data_version.observe(version)
+    snapshot.refresh(sqlite_session)
+    assert len(snapshot) == 1
+    assert snapshot.top(Issue(ticker="ACME", currency="ACM"), 5)[0]["client_name"] == "Acme Renamed"
+    assert snapshot.top(Issue(ticker="BETA"), 5) == []
+
+
+def test_read_model_ids_and_tags_are_keyed_by_dashed_id(sqlite_session):
+    acme = _client("acme", 1)
+    sqlite_session.add(acme)
+    sqlite_session.commit()
+    book = ClientBook(True)
+    book.load(sqlite_session)
+    record = book.get(str(acme.id))
+    assert record is not None
+    assert record.tickers == ("ACME",)
@@ -0,0 +1,126 @@
+"""The in-memory read model answers list pages and facets as the SQL paths do, through refreshes.
+
+Runs against SQLite. Each list and facet body is computed twice, with the
+read model off and on, and the two must be identical.
+"""
+import json
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session
+
+from app import main, readmodel
+from app.filters import ClientFilter
+from app.main import _client_facets_body, _decode_cursor, _list_clients_body
+from app.models import Base, Client, ClientTombstone, Currency, DataVersion, Ticker
+from app.readmodel import ClientBook
+from app.serialize import FULL
+from app.terms import apply_numeric_values
+from app.versioning import DataVersion as Version
+
+FILTERS = [
+    ClientFilter(),
+    ClientFilter(tickers_all=("AAPL",)),
+    ClientFilter(tickers_any=("MSFT", "NOPE"), currencies_none=("JPY",)),
+    ClientFilter(currencies_all=("EUR", "USD")),
+    ClientFilter(regions=("EU",), esg_green=True),
+    ClientFilter(frn_buyer=False),
+    ClientFilter(tenor_covers=60, ois_max=120),
+]
+
+
+@pytest.fixture
+def sqlite_session(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    # A version of its own, read from the database on every refresh.
+    monkeypatch.setattr(readmodel, "data_version", Version(ttl_seconds=0, publish=False))
+    monkeypatch.setattr(main, "client_book", ClientBook(True))
+    with Session(engine) as session:
+        session.add(DataVersion(id=1, version=1))
+        tickers = {symbol: Ticker(symbol=symbol) for symbol in ("AAPL", "MSFT", "TSLA")}
+        currencies = {code: Currency(code=code) for code in ("EUR", "USD", "JPY")}
+        for n in range(12):
+            client = Client(
+                client_name=f"Client {n % 5}",
+                tickers=[tickers[symbol] for i, symbol in enumerate(tickers) if n % (i + 2) == 0],
+                currencies=[currencies[code] for i, code in enumerate(currencies) if n % (i + 2) != 1],
+                region=("eu", "EU", "us", None)[n % 4],
+                frn_buyer=n % 3 == 0,
+                esg_green=n % 2 == 0,
+                tenors_min=f"{n % 4 + 1}Y",
+                tenors_max=f"{n % 7 + 3}Y" if n % 5 else None,
+                target_spread_ois=f"OIS+{80 + 10 * n}",
+                row_version=1,
+            )
+            apply_numeric_values(client)
+            session.add(client)
+        session.commit()
+        yield session
+
+
+def _bump(session) -> int:
+    version = session.get(DataVersion, 1).version + 1
+    session.execute(update(DataVersion).where(DataVersion.id == 1).values(version=version))
+    return version
+
+
+def _both(session, body, *args):
+    """``body(session, *args)`` from SQL, then from the read model."""
+    main.client_book.enabled = False
+    from_sql = json.loads(body(session, *args))
+    main.client_book.enabled = True
+    return from_sql, json.loads(body(session, *args))
+
+
+def _paged(session, filters, limit) -> list:
+    items, after = [], None
+    while True:
+        body = json.loads(_list_clients_body(session, None, filters, after, limit, FULL))
+        items.extend(body["items"])
+        if body["next_cursor"] is None:
+            return items
+        after = _decode_cursor(body["next_cursor"], ranked=False)
+
+
+def _assert_matches_sql(session):
+    for filters in FILTERS:
+        for limit in (None, 1, 5):
+            from_sql, from_book = _both(session, _list_clients_body, None, filters, None, limit, FULL)
+            assert from_book == from_sql, (filters, limit)
+            if limit is None:
+                assert _paged(session, filters, 2) == from_book["items"], filters
+        from_sql, from_book = _both(session, _client_facets_body, None, filters)
+        assert from_book == from_sql, filters
+
+
+def test_pages_and_facets_match_sql(sqlite_session):
+    _assert_matches_sql(sqlite_session)
+    assert len(main.client_book) == 12
+    assert main.client_book.version == 1
+
+
+def test_refresh_applies_updates_inserts_and_deletes(sqlite_session):
+    book = main.client_book
+    book.refresh(sqlite_session)
+    clients = sqlite_session.query(Client).order_by(Client.client_name, Client.id).all()
+
+    version = _bump(sqlite_session)
+    renamed, retagged, deleted = clients[0], clients[5], clients[9]
+    renamed.client_name, renamed.row_version = "Zulu", version
+    retagged.tickers, retagged.region, retagged.row_version = [Ticker(symbol="NVDA")], "EU", version
+    sqlite_session.delete(deleted)
+    sqlite_session.add(ClientTombstone(client_id=deleted.id, version=version))
+    sqlite_session.add(Client(client_name="Client 2", region="eu", esg_green=True, row_version=version))
+    sqlite_session.commit()
+
+    assert book.refresh(sqlite_session) == version
+    assert len(book) == 12
+    assert book.get(str(deleted.id)) is None
+    assert book.get(str(retagged.id)).tickers == ("NVDA",)
+    assert book.page(ClientFilter(), None, None)[-1].client_name == "Zulu"
+    assert book.facets(ClientFilter(tickers_all=("NVDA",)))["total"] == 1
+    _assert_matches_sql(sqlite_session)
+
+    # Nothing written since: the same version, and nothing re-read.
+    assert book.refresh(sqlite_session) == version
@@ -0,0 +1,26 @@
+"""Tag prefix autocomplete gives the same answers with and without the cache; needs no database."""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models import Base, Ticker
+from app.refdata import ReferenceData
+
+SYMBOLS = ["A%B", "A_C", "AB", "ABC", "AXB", "B%", "B1"]
+
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(Ticker(symbol=symbol) for symbol in SYMBOLS)
+        session.commit()
+        yield session
+
+
+@pytest.mark.parametrize("prefix", ["A%", "A_", "A", "AB", "B%", "%", "_", "Z"])
+def test_cached_and_uncached_prefixes_agree(sqlite_session, prefix):
+    cached = ReferenceData(enabled=True).prefixed(sqlite_session, "tickers", prefix, 10)
+    uncached = ReferenceData(enabled=False).prefixed(sqlite_session, "tickers", prefix, 10)
+    assert cached == uncached == sorted(symbol for symbol in SYMBOLS if symbol.startswith(prefix))
@@ -0,0 +1,48 @@
+"""Search on a backend without pg_trgm (SQLite), ranked by the in-process trigram index."""
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.orm import Session
+
+from app.models import Base, Client
+from app.search import fallback_index, search_plan
+
+# SQLite's historical default; builds differ, so the test pins it.
+MAX_VARIABLES = 999
+BROAD_MATCHES = 1_200
+
+
+@pytest.fixture
+def sqlite_session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    event.listen(
+        engine,
+        "connect",
+        lambda connection, _: connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, MAX_VARIABLES),
+    )
+    Base.metadata.create_all(engine)
+    fallback_index.reset()
+    with Session(engine) as session:
+        yield session
+    fallback_index.reset()
+    engine.dispose()
+
+
+def _search(session, q: str, limit: int):
+    plan = search_plan(session, q)
+    stmt = select(Client.client_name, plan.rank).where(plan.clause)
+    return session.execute(stmt.order_by(plan.rank.desc(), Client.client_name).limit(limit)).all()
+
+
+def test_broad_query_matches_more_clients_than_bound_parameters_allow(sqlite_session):
+    rows = [{"client_name": f"Acme Fund {n:05d}"} for n in range(BROAD_MATCHES)]
+    sqlite_session.execute(insert(Client), rows + [{"client_name": "Acme"}, {"client_name": "Zenith"}])
+    sqlite_session.commit()
+
+    top = _search(sqlite_session, "acme", 3)
+    assert [name for name, _ in top] == ["Acme", "Acme Fund 00000", "Acme Fund 00001"]
+    assert len(_search(sqlite_session, "acme", None)) == BROAD_MATCHES + 1
+    # A later search on the same connection sees only its own hits.
+    assert [name for name, _ in _search(sqlite_session, "zenith", None)] == ["Zenith"]
+    assert _search(sqlite_session, "nothing like it", None) == []
@@ -0,0 +1,83 @@
+"""Tenor and spread text parsed into the numeric shadow columns; needs no database."""
+import pytest
+
+from app.terms import SOURCE_FIELDS, numeric_values, parse_spread, parse_tenor, spread_benchmark
+
+
+@pytest.mark.parametrize(
+    "value, months",
+    [
+        ("5Y", 60),
+        ("18M", 18),
+        ("1.5Y", 18),
+        (" 7 yrs ", 84),
+        ("10years", 120),
+        ("6mos", 6),
+        ("2W", 0),
+        ("45d", 2),
+        ("0Y", 0),
+        ("5", None),
+        ("Y5", None),
+        ("5Y-7Y", None),
+        ("-5Y", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_parse_tenor(value, months):
+    assert parse_tenor(value) == months
+
+
+@pytest.mark.parametrize(
+    "value, bp",
+    [
+        ("OIS+110", 110),
+        ("ois + 110bp", 110),
+        ("G+140", 140),
+        ("MS-15", -15),
+        ("-15 bps", -15),
+        ("95", 95),
+        ("1.1%", 110),
+        ("0.25 %", 25),
+        ("OIS+", None),
+        ("110bp OIS", None),
+        ("OIS+1.1.1", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_parse_spread(value, bp):
+    assert parse_spread(value) == bp
+
+
+def test_spread_benchmark():
+    assert [spread_benchmark(value) for value in ("G+140", " g+5", "OIS+110", "110", None)] == [
+        "g",
+        "g",
+        "ois",
+        "ois",
+        "ois",
+    ]
+
+
+def _numeric(**values):
+    return numeric_values({field: values.get(field) for field in SOURCE_FIELDS})
+
+
+def test_numeric_values_swaps_a_minimum_above_the_maximum():
+    result = _numeric(tenors_min="10Y", tenors_max="2Y", tenors_sweetspot="5Y", target_spread_ois="OIS+110")
+    assert result == {
+        "tenors_min_months": 24,
+        "tenors_max_months": 120,
+        "tenors_sweetspot_months": 60,
+        "target_spread_ois_bp": 110,
+        "target_g_spread_bp": None,
+    }
+
+
+def test_numeric_values_keeps_an_open_or_unparsed_bound():
+    assert _numeric(tenors_min="10Y")["tenors_min_months"] == 120
+    result = _numeric(tenors_min="10Y", tenors_max="soon")
+    assert (result["tenors_min_months"], result["tenors_max_months"]) == (120, None)
+    result = _numeric(tenors_min="5Y", tenors_max="5Y")
+    assert (result["tenors_min_months"], result["tenors_max_months"]) == (60, 60)
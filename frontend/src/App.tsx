@@ -1,4 +1,4 @@
-import { useEffect, useMemo, useState } from 'react'
+import { useEffect, useMemo, useRef, useState } from 'react'
 import './App.css'
 
 type Client = {
@@ -38,6 +38,27 @@ type AuditItem = {
   changed_at: string
 }
 
+type ClientFacets = {
+  total: number
+  tickers: Record<string, number>
+  currencies: Record<string, number>
+  regions: Record<string, number>
+  flags: Record<string, number>
+}
+
+type TagCount = {
+  value: string
+  clients: number
+}
+
+type TagKind = 'tickers' | 'currencies'
+
+type ClientChanges = {
+  version: number
+  items: Client[]
+  deleted: string[]
+}
+
 const API_BASE = import.meta.env.VITE_API_BASE ?? 'http://127.0.0.1:8000'
 
 const parseList = (value: string) =>
@@ -48,6 +69,26 @@ const parseList = (value: string) =>
 
 const formatList = (values: string[]) => values.join(', ')
 
+// Datalist options for a comma-separated input: everything typed so far,
+// with the last item completed to each suggestion.
+const completions = (value: string, suggestions: TagCount[]) => {
+  const done = value.split(',').slice(0, -1).map((item) => item.trim()).filter(Boolean)
+  return suggestions.map((tag) => ({ ...tag, value: formatList([...done, tag.value]) }))
+}
+
+const mergeChanges = (current: Client[], changes: ClientChanges) => {
+  const deleted = new Set(changes.deleted)
+  const changed = new Map(changes.items.map((item) => [item.id, item]))
+  const merged = current
+    .filter((item) => !deleted.has(item.id))
+    .map((item) => {
+      const next = changed.get(item.id)
+      changed.delete(item.id)
+      return next ?? item
+    })
+  return [...changed.values(), ...merged]
+}
+
 const applyDropdownSelection = (current: string, nextValue: string) => {
   const parts = current.split(',')
   if (parts.length <= 1) {
@@ -79,6 +120,8 @@ const columnLabels: { key: keyof Client; label: string; type: 'text' | 'boolean'
 
 function App() {
   const [clients, setClients] = useState<Client[]>([])
+  const [syncing, setSyncing] = useState(false)
+  const syncVersion = useRef<number | null>(null)
   const [filters, setFilters] = useState<FilterState>({ q: '', ticker: '', currency: '' })
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState<string | null>(null)
@@ -96,17 +139,42 @@ function App() {
   const [tickerOpen, setTickerOpen] = useState(false)
   const [currencyOpen, setCurrencyOpen] = useState(false)
 
-  const uniqueTickers = useMemo(() => {
-    const set = new Set<string>()
-    clients.forEach((client) => client.tickers.forEach((ticker) => set.add(ticker)))
-    return Array.from(set).sort()
-  }, [clients])
+  const [facets, setFacets] = useState<ClientFacets | null>(null)
+  const [suggestions, setSuggestions] = useState<Record<TagKind, TagCount[]>>({
+    tickers: [],
+    currencies: [],
+  })
 
-  const uniqueCurrencies = useMemo(() => {
-    const set = new Set<string>()
-    clients.forEach((client) => client.currencies.forEach((currency) => set.add(currency)))
-    return Array.from(set).sort()
-  }, [clients])
+  // Counts for the current result set, so the dropdowns list every value
+  // with how many clients hold it, not just the ones already loaded.
+  const uniqueTickers = useMemo(() => Object.keys(facets?.tickers ?? {}), [facets])
+  const uniqueCurrencies = useMemo(() => Object.keys(facets?.currencies ?? {}), [facets])
+
+  const fetchFacets = async (params: URLSearchParams) => {
+    try {
+      const response = await fetch(`${API_BASE}/clients/facets?${params.toString()}`)
+      if (response.ok) {
+        setFacets(await response.json())
+      }
+    } catch {
+      // Counts are a hint; the dropdowns just stay as they were.
+    }
+  }
+
+  const suggestTags = async (kind: TagKind, value: string) => {
+    const prefix = value.split(',').pop()?.trim() ?? ''
+    try {
+      const response = await fetch(
+        `${API_BASE}/${kind}?${new URLSearchParams({ prefix, limit: '10' }).toString()}`,
+      )
+      if (response.ok) {
+        const body: { items: TagCount[] } = await response.json()
+        setSuggestions((prev) => ({ ...prev, [kind]: body.items }))
+      }
+    } catch {
+      // Suggestions are optional; free text still works.
+    }
+  }
 
   const fetchClients = async (override?: Partial<FilterState>) => {
     setLoading(true)
@@ -117,6 +185,21 @@ function App() {
       if (nextFilters.q) params.set('q', nextFilters.q)
       if (nextFilters.ticker) params.set('ticker', nextFilters.ticker)
       if (nextFilters.currency) params.set('currency', nextFilters.currency)
+      fetchFacets(params)
+      if (!nextFilters.q && !nextFilters.ticker && !nextFilters.currency) {
+        // The unfiltered book is kept current with deltas from /clients/changes.
+        const response = await fetch(`${API_BASE}/clients/changes`)
+        if (!response.ok) {
+          throw new Error('Failed to load clients.')
+        }
+        const data: ClientChanges = await response.json()
+        setClients(data.items)
+        syncVersion.current = data.version
+        setSyncing(true)
+        return
+      }
+      syncVersion.current = null
+      setSyncing(false)
 
       const response = await fetch(`${API_BASE}/clients?${params.toString()}`)
       if (!response.ok) {
@@ -152,6 +235,40 @@ function App() {
     fetchClients()
   }, [])
 
+  useEffect(() => {
+    if (!syncing) return
+    // The server pushes the latest data version; fetch the delta whenever
+    // it is ahead of what we hold.
+    const source = new EventSource(`${API_BASE}/clients/events`)
+    let latest = 0
+    let catchingUp = false
+    const catchUp = async () => {
+      if (catchingUp) return
+      catchingUp = true
+      try {
+        while (syncVersion.current !== null && latest > syncVersion.current) {
+          const since = syncVersion.current
+          const response = await fetch(`${API_BASE}/clients/changes?since=${since}`)
+          if (!response.ok) break
+          const data: ClientChanges = await response.json()
+          if (syncVersion.current === null || data.version <= since) break
+          setClients((current) => mergeChanges(current, data))
+          syncVersion.current = data.version
+          fetchFacets(new URLSearchParams())
+        }
+      } catch {
+        // The next event retries.
+      } finally {
+        catchingUp = false
+      }
+    }
+    source.addEventListener('changes', (event) => {
+      latest = Math.max(latest, JSON.parse((event as MessageEvent).data).version)
+      catchUp()
+    })
+    return () => source.close()
+  }, [syncing])
+
   const updateClient = async (client: Client, field: keyof Client, value: string | boolean) => {
     const previous = { ...client }
     const updated: Client = {
@@ -294,22 +411,40 @@ function App() {
               <input
                 id="new-tickers"
                 placeholder="AAPL, NVDA"
+                list="new-tickers-suggestions"
+                autoComplete="off"
                 value={createForm.tickers}
-                onChange={(event) =>
-                  setCreateForm((prev) => ({ ...prev, tickers: event.target.value }))
-                }
+                onChange={(event) => {
+                  const value = event.target.value
+                  setCreateForm((prev) => ({ ...prev, tickers: value }))
+                  suggestTags('tickers', value)
+                }}
               />
+              <datalist id="new-tickers-suggestions">
+                {completions(createForm.tickers, suggestions.tickers).map((tag) => (
+                  <option key={tag.value} value={tag.value} label={`${tag.clients} clients`} />
+                ))}
+              </datalist>
             </div>
             <div className="field">
               <label htmlFor="new-currencies">Currencies</label>
               <input
                 id="new-currencies"
                 placeholder="USD, EUR"
+                list="new-currencies-suggestions"
+                autoComplete="off"
                 value={createForm.currencies}
-                onChange={(event) =>
-                  setCreateForm((prev) => ({ ...prev, currencies: event.target.value }))
-                }
+                onChange={(event) => {
+                  const value = event.target.value
+                  setCreateForm((prev) => ({ ...prev, currencies: value }))
+                  suggestTags('currencies', value)
+                }}
               />
+              <datalist id="new-currencies-suggestions">
+                {completions(createForm.currencies, suggestions.currencies).map((tag) => (
+                  <option key={tag.value} value={tag.value} label={`${tag.clients} clients`} />
+                ))}
+              </datalist>
             </div>
             <div className="field">
               <label htmlFor="new-region">Region</label>
@@ -422,6 +557,7 @@ function App() {
                     }}
                   >
                     {ticker}
+                    <span className="dropdown-count">{facets?.tickers[ticker]}</span>
                   </button>
                 ))}
                 {uniqueTickers.length === 0 ? (
@@ -460,6 +596,7 @@ function App() {
                     }}
                   >
                     {currency}
+                    <span className="dropdown-count">{facets?.currencies[currency]}</span>
                   </button>
                 ))}
                 {uniqueCurrencies.length === 0 ? (